@@ -0,0 +1,304 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+# Cabeçalho do snapshot colunar: assinatura + tamanho do cabeçalho JSON
+SNAPSHOT_MAGIC = b"TXCOL001"
+_HEADER = struct.Struct("<8sQ")
+
+# Colunas numéricas do snapshot e o formato de cada uma (memoryview.cast)
+_NUMERIC_COLUMNS = {
+    "user_id": "q",
+    "transaction_id": "q",
+    "transaction_date": "i",  # date.toordinal()
+    "transaction_value": "d",
+    "transaction_type": "H",  # posição em header["types"]
+    "transaction_category": "H",  # posição em header["categories"]
+    "description_offsets": "Q",  # n + 1 posições em description_data
+    "id_order": "q",  # dentro da faixa de cada usuário, as linhas ordenadas por transaction_id
+}
+
+def _sort_key(t: dict):
+    return (t.get("transaction_date"), t.get("transaction_id"))
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class _JsonIndex:
+    """
+    Transações de um arquivo JSON (lista) ou NDJSON (uma por linha), agrupadas por usuário
+    e ordenadas por (data, id).
+    """
+    def __init__(self, path: str) -> None:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith((".ndjson", ".jsonl")):
+                data = [json.loads(line) for line in f if line.strip()]
+            else:
+                data = json.load(f)
+
+        by_user: dict[int, list[dict]] = {}
+        for t in data:
+            by_user.setdefault(t.get("user_id"), []).append(t)
+
+        self.by_id = {(t.get("user_id"), t.get("transaction_id")): t for t in data}
+        self.rows: dict[int, list[dict]] = {}
+        self.keys: dict[int, list[tuple]] = {}
+        for user_id, transactions in by_user.items():
+            transactions.sort(key=_sort_key)
+            self.rows[user_id] = transactions
+            self.keys[user_id] = [_sort_key(t) for t in transactions]
+
+    def get(self, user_id, transaction_id) -> dict | None:
+        return self.by_id.get((user_id, transaction_id))
+
+    def query(self, user_id, transaction_type, transaction_category, start_date, end_date, after, limit) -> list[dict]:
+        rows = self.rows.get(user_id)
+        if not rows:
+            return []
+        keys = self.keys[user_id]
+
+        # O período e o cursor viram uma faixa [lo, hi) da lista ordenada
+        lo, hi = 0, len(rows)
+        if start_date:
+            lo = bisect_left(keys, (start_date.isoformat(),))
+        if after:
+            lo = max(lo, bisect_right(keys, (after[0].isoformat(), after[1])))
+        if end_date:
+            hi = bisect_right(keys, (end_date.isoformat(), float("inf")))
+
+        result = []
+        for t in rows[lo:hi]:
+            if transaction_type and t.get("transaction_type") != transaction_type:
+                continue
+            if transaction_category and t.get("transaction_category") != transaction_category:
+                continue
+            result.append(t)
+            if limit and len(result) == limit:
+                break
+        return result
+
+
+class _SnapshotIndex:
+    """
+    Snapshot colunar binário lido via mmap. As linhas ficam ordenadas por (user_id, data, id),
+    então cada usuário é uma faixa contínua das colunas e só as linhas devolvidas viram dict.
+    """
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, header_size = _HEADER.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"Arquivo não é um snapshot de transações: {path}")
+
+        header = json.loads(self._mmap[_HEADER.size:_HEADER.size + header_size])
+        self.count = header["count"]
+        self.types = header["types"]
+        self.categories = header["categories"]
+
+        buffer = memoryview(self._mmap)
+        self.columns = {
+            name: buffer[start:end].cast(_NUMERIC_COLUMNS[name])
+            for name, (start, end) in header["columns"].items()
+        }
+        start, end = header["description_data"]
+        self.description_data = buffer[start:end]
+
+    def _row(self, i: int) -> dict:
+        c = self.columns
+        offsets = c["description_offsets"]
+        return {
+            "user_id": c["user_id"][i],
+            "transaction_id": c["transaction_id"][i],
+            "transaction_date": date.fromordinal(c["transaction_date"][i]).isoformat(),
+            "transaction_value": c["transaction_value"][i],
+            "transaction_type": self.types[c["transaction_type"][i]],
+            "transaction_category": self.categories[c["transaction_category"][i]],
+            "transaction_description": bytes(self.description_data[offsets[i]:offsets[i + 1]]).decode("utf-8"),
+        }
+
+    def get(self, user_id, transaction_id) -> dict | None:
+        users = self.columns["user_id"]
+        lo = bisect_left(users, user_id)
+        hi = bisect_right(users, user_id, lo)
+
+        ids = self.columns["transaction_id"]
+        order = self.columns.get("id_order")
+        if order is None:
+            # Snapshot sem a coluna id_order: percorre a faixa do usuário
+            return next((self._row(i) for i in range(lo, hi) if ids[i] == transaction_id), None)
+
+        position = bisect_left(range(lo, hi), transaction_id, key=lambda i: ids[order[i]])
+        if lo + position < hi and ids[order[lo + position]] == transaction_id:
+            return self._row(order[lo + position])
+        return None
+
+    def query(self, user_id, transaction_type, transaction_category, start_date, end_date, after, limit) -> list[dict]:
+        users, dates, ids = self.columns["user_id"], self.columns["transaction_date"], self.columns["transaction_id"]
+
+        lo = bisect_left(users, user_id)
+        hi = bisect_right(users, user_id, lo)
+        if start_date:
+            lo = bisect_left(dates, start_date.toordinal(), lo, hi)
+        if end_date:
+            hi = bisect_right(dates, end_date.toordinal(), lo, hi)
+        if after:
+            # Pula as transações do mesmo dia do cursor com id menor ou igual
+            after_day = after[0].toordinal()
+            lo = max(lo, bisect_left(dates, after_day, lo, hi))
+            while lo < hi and dates[lo] == after_day and ids[lo] <= after[1]:
+                lo += 1
+
+        type_code = self.types.index(transaction_type) if transaction_type in self.types else None
+        category_code = self.categories.index(transaction_category) if transaction_category in self.categories else None
+        if (transaction_type and type_code is None) or (transaction_category and category_code is None):
+            return []
+
+        types, categories = self.columns["transaction_type"], self.columns["transaction_category"]
+        result = []
+        for i in range(lo, hi):
+            if transaction_type and types[i] != type_code:
+                continue
+            if transaction_category and categories[i] != category_code:
+                continue
+            result.append(self._row(i))
+            if limit and len(result) == limit:
+                break
+        return result
+
+
+def write_snapshot(transactions: list[dict], path: str) -> None:
+    '''
+    Grava as transações no formato colunar binário lido por TransactionJsonStore
+
+    Parâmetros:
+    transactions (list[dict]): transações no mesmo formato do transactions.json
+    path (str): arquivo de destino
+    '''
+    rows = sorted(transactions, key=lambda t: (t["user_id"], t["transaction_date"], t["transaction_id"]))
+    types = sorted({t["transaction_type"] for t in rows})
+    categories = sorted({t["transaction_category"] for t in rows})
+    type_codes = {name: code for code, name in enumerate(types)}
+    category_codes = {name: code for code, name in enumerate(categories)}
+
+    descriptions = [(t.get("transaction_description") or "").encode("utf-8") for t in rows]
+    offsets = [0]
+    for description in descriptions:
+        offsets.append(offsets[-1] + len(description))
+
+    values = {
+        "user_id": [t["user_id"] for t in rows],
+        "transaction_id": [t["transaction_id"] for t in rows],
+        "transaction_date": [date.fromisoformat(t["transaction_date"]).toordinal() for t in rows],
+        "transaction_value": [float(t["transaction_value"]) for t in rows],
+        "transaction_type": [type_codes[t["transaction_type"]] for t in rows],
+        "transaction_category": [category_codes[t["transaction_category"]] for t in rows],
+        "description_offsets": offsets,
+        "id_order": sorted(range(len(rows)), key=lambda i: (rows[i]["user_id"], rows[i]["transaction_id"])),
+    }
+    blobs = {name: struct.pack(f"<{len(column)}{_NUMERIC_COLUMNS[name]}", *column) for name, column in values.items()}
+    description_data = b"".join(descriptions)
+
+    # O cabeçalho guarda a posição de cada coluna, por isso é calculado até se estabilizar
+    header = {"count": len(rows), "types": types, "categories": categories, "columns": {}, "description_data": [0, 0]}
+    while True:
+        encoded = json.dumps(header).encode("utf-8")
+        offset = _align(_HEADER.size + len(encoded))
+        columns = {}
+        for name, blob in blobs.items():
+            columns[name] = [offset, offset + len(blob)]
+            offset = _align(offset + len(blob))
+        description_range = [offset, offset + len(description_data)]
+        if columns == header["columns"] and description_range == header["description_data"]:
+            break
+        header["columns"], header["description_data"] = columns, description_range
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, len(encoded)))
+        f.write(encoded)
+        for name, blob in blobs.items():
+            f.seek(columns[name][0])
+            f.write(blob)
+        f.seek(description_range[0])
+        f.write(description_data)
+
+
+class TransactionJsonStore:
+    """
+    Fonte de transações baseada em arquivo, carregada uma única vez e recarregada apenas
+    quando o arquivo muda (mtime/tamanho).
+
+    Formatos aceitos pela extensão: .json (lista), .ndjson/.jsonl (uma transação por linha)
+    e qualquer outra para o snapshot colunar gerado por write_snapshot.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._index = None
+
+    def signature(self) -> tuple[int, int]:
+        '''
+        Versão do arquivo (mtime em ns, tamanho): muda sempre que o conteúdo é trocado
+
+        Levanta:
+        FileNotFoundError: se o arquivo não existir
+        '''
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _current_index(self):
+        signature = self.signature()
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    if self.path.endswith((".json", ".ndjson", ".jsonl")):
+                        self._index = _JsonIndex(self.path)
+                    else:
+                        self._index = _SnapshotIndex(self.path)
+                    self._signature = signature
+        return self._index
+
+    def get_transactions(self, user_id: int, transaction_type: str | None = None, transaction_category: str | None = None, start_date: date | None = None, end_date: date | None = None, after: tuple[date, int] | None = None, limit: int | None = None) -> list[dict]:
+        '''
+        Lista as transações do usuário com os mesmos filtros e ordenação (data, id) do banco
+
+        Levanta:
+        FileNotFoundError: se o arquivo não existir
+        '''
+        return self._current_index().query(user_id, transaction_type, transaction_category, start_date, end_date, after, limit)
+
+    def get_transaction(self, user_id: int, transaction_id: int) -> dict | None:
+        '''
+        Busca uma transação do usuário pelo ID, sem percorrer o histórico dele
+
+        Levanta:
+        FileNotFoundError: se o arquivo não existir
+        '''
+        return self._current_index().get(user_id, transaction_id)
+
+
+_stores: dict[str, TransactionJsonStore] = {}
+_stores_lock = threading.Lock()
+
+def get_store(path: str) -> TransactionJsonStore:
+    # Um único store por arquivo no processo, compartilhado entre as requisições
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = TransactionJsonStore(path)
+        return _stores[path]
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3:
+        sys.exit("Uso: python -m adapter.json_store <transactions.json> <snapshot.bin>")
+
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        write_snapshot(json.load(f), sys.argv[2])
@@ -1,62 +1,128 @@
-import json
-import os
-
 from fastapi import HTTPException, status
 from sqlalchemy import Transaction
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from datetime import date
 
+from adapter.json_store import get_store
 from database import transactions as crud_transactions
-from dotenv import load_dotenv
-
-load_dotenv()
+from utils.settings import get_settings
 
 class TransactionAdapter:
-    def __init__(self, db: Session | None = None) -> None:
+    def __init__(self, db: Session | AsyncSession | None = None) -> None:
         self.db = db
-        ds = os.getenv("DATA_SOURCE")
-        if not ds:
-            self.data_source = "db"
-        else:
-            self.data_source = ds.lower()
-            self.json_path = "./database/transactions.json"
+        # Configurações lidas uma vez por processo, não a cada requisição
+        settings = get_settings()
+        self.data_source = (settings.data_source or "db").lower()
+        # .json, .ndjson/.jsonl ou snapshot colunar gerado por adapter.json_store
+        self.json_path = settings.json_data_path
 
-    def __fetch_json_data(self, user_id: int):
+    def __fetch_json_data(self, user_id: int, transaction_type: str | None = None, transaction_category: str | None = None, start_date: date | None = None, end_date: date | None = None, after: tuple[date, int] | None = None, limit: int | None = None, search: str | None = None, offset: int | None = None) -> list[dict]:
+        if search is not None:
+            # A busca depende do índice de texto do banco
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A busca por descrição só está disponível com DATA_SOURCE=db.",
+            )
         try:
-            with open(self.json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            return get_store(self.json_path).get_transactions(user_id=user_id,
+                                                              transaction_type=transaction_type,
+                                                              transaction_category=transaction_category,
+                                                              start_date=start_date,
+                                                              end_date=end_date,
+                                                              after=after,
+                                                              limit=limit)
         except FileNotFoundError:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Arquivo JSON não encontrado: {self.json_path}",
             )
 
-        user_transactions = [t for t in data if t.get("user_id") == user_id]
-
-        return user_transactions
-
-    def __fetch_db_data(self, user_id: int, transaction_type: str | None = None, transaction_category: str | None = None, start_date: date | None = None, end_date: date | None = None) -> list[Transaction]:
+    def __fetch_db_data(self, user_id: int, transaction_type: str | None = None, transaction_category: str | None = None, start_date: date | None = None, end_date: date | None = None, after: tuple[date, int] | None = None, limit: int | None = None, search: str | None = None, offset: int | None = None, stream: bool = False) -> list[Transaction]:
         if not self.db:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Sessão de banco de dados não fornecida.",
             )
 
-        return crud_transactions.get_transactions_by_user(user_id=user_id,
-                                                          transaction_type=transaction_type,
-                                                          transaction_category=transaction_category,
-                                                          start_date=start_date,
-                                                          end_date=end_date,
-                                                          db=self.db)
+        fetch = crud_transactions.stream_transactions_by_user if stream else crud_transactions.get_transactions_by_user
+        return fetch(user_id=user_id,
+                     transaction_type=transaction_type,
+                     transaction_category=transaction_category,
+                     start_date=start_date,
+                     end_date=end_date,
+                     after=after,
+                     limit=limit,
+                     search=search,
+                     offset=offset,
+                     db=self.db)
+
+    def get_transactions(self, user_id: int, transaction_type: str | None = None, transaction_category: str | None = None, start_date: date | None = None, end_date: date | None = None, after: tuple[date, int] | None = None, limit: int | None = None, search: str | None = None, offset: int | None = None) -> list[Transaction]:
+        if self.data_source == "db":
+            return self.__fetch_db_data(user_id, transaction_type, transaction_category, start_date, end_date, after, limit, search, offset)
+        elif self.data_source == "json":
+            return self.__fetch_json_data(user_id, transaction_type, transaction_category, start_date, end_date, after, limit, search, offset)
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Fonte de dados inválida: {self.data_source}",
+            )
 
-    def get_transactions(self, user_id: int, transaction_type: str | None = None, transaction_category: str | None = None, start_date: date | None = None, end_date: date | None = None) -> list[Transaction]:
+    def get_transaction(self, user_id: int, transaction_id: int) -> Transaction | dict | None:
+        """
+        Busca uma única transação do usuário pelo ID (None se não existir ou for de outro usuário).
+        """
         if self.data_source == "db":
-            return self.__fetch_db_data(user_id, transaction_type, transaction_category, start_date, end_date)
+            if not self.db:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Sessão de banco de dados não fornecida.",
+                )
+            return crud_transactions.get_user_transaction(self.db, user_id, transaction_id)
         elif self.data_source == "json":
-            return self.__fetch_json_data(user_id)
+            try:
+                return get_store(self.json_path).get_transaction(user_id, transaction_id)
+            except FileNotFoundError:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Arquivo JSON não encontrado: {self.json_path}",
+                )
         else:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Fonte de dados inválida: {self.data_source}",
             )
+
+    def stream_transactions(self, user_id: int, transaction_type: str | None = None, transaction_category: str | None = None, start_date: date | None = None, end_date: date | None = None, after: tuple[date, int] | None = None, limit: int | None = None, search: str | None = None, offset: int | None = None):
+        """
+        Igual a get_transactions, mas devolve um iterador que lê as transações sob demanda.
+        """
+        if self.data_source == "db":
+            return self.__fetch_db_data(user_id, transaction_type, transaction_category, start_date, end_date, after, limit, search, offset, stream=True)
+        return iter(self.get_transactions(user_id, transaction_type, transaction_category, start_date, end_date, after, limit, search, offset))
+
+    async def astream_transactions(self, user_id: int, transaction_type: str | None = None, transaction_category: str | None = None, start_date: date | None = None, end_date: date | None = None, after: tuple[date, int] | None = None, limit: int | None = None, search: str | None = None, offset: int | None = None):
+        """
+        Versão assíncrona de stream_transactions, para uso com AsyncSession.
+        """
+        if self.data_source == "db":
+            if not self.db:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Sessão de banco de dados não fornecida.",
+                )
+            async for transaction in crud_transactions.stream_transactions_by_user_async(user_id=user_id,
+                                                                                         transaction_type=transaction_type,
+                                                                                         transaction_category=transaction_category,
+                                                                                         start_date=start_date,
+                                                                                         end_date=end_date,
+                                                                                         after=after,
+                                                                                         limit=limit,
+                                                                                         search=search,
+                                                                                         offset=offset,
+                                                                                         db=self.db):
+                yield transaction
+        else:
+            for transaction in self.get_transactions(user_id, transaction_type, transaction_category, start_date, end_date, after, limit, search, offset):
+                yield transaction
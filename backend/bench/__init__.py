@@ -0,0 +1,3 @@
+'''
+Medições de desempenho da API (executadas fora da suíte de testes)
+'''
@@ -0,0 +1,47 @@
+'''
+Compara dois resultados de bench.run (ex.: commit anterior x atual)
+
+Uso: python -m bench.compare antes.json depois.json [--metric p95_ms] [--threshold 0.10]
+
+Sai com código 1 se algum cenário piorar mais que o limite na métrica escolhida.
+'''
+import argparse
+import json
+import sys
+from pathlib import Path
+
+def load(path: str) -> dict[tuple[str, int], dict]:
+    report = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {(result["scenario"], result["size"]): result for result in report["results"]}
+
+def compare(before: dict, after: dict, metric: str, threshold: float) -> list[tuple]:
+    '''
+    Devolve (cenário, tamanho, antes, depois, variação, piorou?) dos cenários presentes nos dois resultados
+    '''
+    rows = []
+    for key in sorted(before.keys() & after.keys(), key=lambda key: (key[1], key[0])):
+        old, new = before[key][metric], after[key][metric]
+        change = (new - old) / old if old else 0.0
+        # Na vazão, maior é melhor; nas latências, menor
+        regressed = -change > threshold if metric == "throughput_rps" else change > threshold
+        rows.append((*key, old, new, change, regressed))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.compare", description=__doc__.split("\n\n")[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--metric", default="p95_ms",
+                        choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms", "throughput_rps"])
+    parser.add_argument("--threshold", type=float, default=0.10, help="variação tolerada (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    rows = compare(load(args.before), load(args.after), args.metric, args.threshold)
+    for scenario, size, old, new, change, regressed in rows:
+        print(f"{size:>8} {scenario:<28} {old:>10.2f} {new:>10.2f} {change:>+8.1%}" + ("  PIOROU" if regressed else ""))
+
+    if any(row[-1] for row in rows):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+'''
+Gerador determinístico de dados sintéticos para os benchmarks
+
+As categorias vêm de FieldValidator.VALID_CATEGORIES, então todo dado gerado também
+seria aceito pela API. Os pesos e faixas de valor imitam um orçamento doméstico:
+muitas despesas pequenas (alimentação, transporte), poucas grandes (moradia) e
+receitas concentradas em salário.
+'''
+import random
+from datetime import date, timedelta
+from typing import Iterator
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from database.models import Goal, Transaction, User
+from utils.password_hash import get_password_hash
+from utils.validators import FieldValidator
+
+# Fração das transações que são despesas
+EXPENSE_SHARE = 0.85
+
+# Peso relativo de cada categoria dentro do seu tipo (categorias sem peso recebem 1)
+CATEGORY_WEIGHTS = {
+    "Despesa": {"Alimentação": 30, "Transporte": 18, "Entretenimento": 12, "Utilidades": 10,
+                "Moradia": 6, "Saúde": 8, "Educação": 6, "Outros": 10},
+    "Receita": {"Salário": 55, "Freelance": 20, "Investimentos": 20, "Outros": 5},
+}
+
+# Faixa (mínimo, máximo) de valor de cada categoria; o sorteio favorece valores baixos
+VALUE_RANGES = {
+    "Moradia": (800, 4000), "Alimentação": (10, 400), "Transporte": (5, 250),
+    "Entretenimento": (15, 500), "Utilidades": (50, 600), "Saúde": (30, 1500),
+    "Educação": (100, 2500), "Salário": (2500, 15000), "Freelance": (200, 5000),
+    "Investimentos": (20, 3000), "Outros": (5, 800),
+}
+
+DESCRIPTIONS = {
+    "Alimentação": ["Mercado", "Padaria", "Restaurante", "Delivery", ""],
+    "Transporte": ["Ônibus", "Combustível", "Aplicativo", "Estacionamento", ""],
+    "Moradia": ["Aluguel", "Condomínio", "Manutenção"],
+    "Salário": ["Salário mensal", "13º salário", ""],
+}
+
+BENCH_PASSWORD = "Senha@Forte123"
+
+def _weighted_categories(transaction_type: str) -> tuple[list[str], list[int]]:
+    categories = FieldValidator.VALID_CATEGORIES[transaction_type]
+    weights = CATEGORY_WEIGHTS[transaction_type]
+    return categories, [weights.get(category, 1) for category in categories]
+
+def generate_transactions(count: int, seed: int = 0, end_date: date | None = None, days: int = 730) -> Iterator[dict]:
+    '''
+    Gera transações válidas nos `days` dias até `end_date`, sempre iguais para a mesma semente
+
+    Parâmetros:
+    count (int): quantidade de transações
+    seed (int): semente do gerador
+    end_date (date): data mais recente (padrão: hoje)
+    days (int): tamanho do período coberto
+
+    Retorna:
+    Iterator[dict]: transações com as colunas de Transaction (sem user_id)
+    '''
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    start_date = end_date - timedelta(days=days - 1)
+    choices = {transaction_type: _weighted_categories(transaction_type) for transaction_type in CATEGORY_WEIGHTS}
+
+    for _ in range(count):
+        transaction_type = "Despesa" if rng.random() < EXPENSE_SHARE else "Receita"
+        categories, weights = choices[transaction_type]
+        category = rng.choices(categories, weights)[0]
+
+        low, high = VALUE_RANGES[category]
+        value = low + (high - low) * rng.random() ** 2
+
+        # Datas mais recentes são um pouco mais frequentes (o uso do app cresce com o tempo)
+        offset = int(days * rng.random() ** 0.8)
+
+        yield {
+            "transaction_date": start_date + timedelta(days=min(offset, days - 1)),
+            "transaction_value": round(value, 2),
+            "transaction_type": transaction_type,
+            "transaction_category": category,
+            "transaction_description": rng.choice(DESCRIPTIONS.get(category, [""])),
+        }
+
+def to_payload(transaction: dict) -> dict:
+    '''
+    Converte uma transação gerada no corpo aceito por POST /{user_id}/transactions
+    '''
+    return {
+        "date": transaction["transaction_date"].isoformat(),
+        "value": transaction["transaction_value"],
+        "type": transaction["transaction_type"],
+        "category": transaction["transaction_category"],
+        "description": transaction["transaction_description"],
+    }
+
+def insert_transactions(db: Session, user_id: int, transactions, chunk_size: int = 5000) -> list[int]:
+    '''
+    Insere as transações em lotes (os triggers mantêm monthly_balances) e devolve os IDs criados
+    '''
+    ids = []
+    chunk = []
+    for transaction in transactions:
+        chunk.append({**transaction, "user_id": user_id})
+        if len(chunk) == chunk_size:
+            ids += db.scalars(insert(Transaction).returning(Transaction.transaction_id), chunk).all()
+            chunk = []
+    if chunk:
+        ids += db.scalars(insert(Transaction).returning(Transaction.transaction_id), chunk).all()
+    return ids
+
+def create_user(db: Session, email: str, password_hash: str, name: str = "Usuário Benchmark") -> int:
+    user = User(user_name=name, user_email=email, user_hashed_password=password_hash)
+    db.add(user)
+    db.flush()
+    return user.user_id
+
+def create_goals(db: Session, user_id: int, seed: int = 0) -> list[int]:
+    '''
+    Cria uma meta por categoria de despesa, com valor próximo ao gasto mensal típico
+    '''
+    rng = random.Random(seed)
+    goals = [
+        {"user_id": user_id, "goal_type": "Despesa", "goal_category": category,
+         "goal_value": round(VALUE_RANGES[category][1] * rng.uniform(0.5, 3), 2)}
+        for category in FieldValidator.VALID_CATEGORIES["Despesa"]
+    ]
+    return db.scalars(insert(Goal).returning(Goal.goal_id), goals).all()
+
+def seed_database(session_factory, sizes: list[int], seed: int = 42, end_date: date | None = None) -> dict[int, dict]:
+    '''
+    Cria um usuário por tamanho de histórico (ex.: 1k / 10k / 100k transações), com metas
+
+    Parâmetros:
+    session_factory: database.config.session_for_user (sem argumento: banco principal; com o ID: shard do usuário)
+
+    Retorna:
+    dict[int, dict]: para cada tamanho, {"user_id", "email", "password", "transaction_ids", "goal_ids"}
+    '''
+    # O bcrypt é caro: todos os usuários do benchmark compartilham o mesmo hash
+    password_hash = get_password_hash(BENCH_PASSWORD)
+
+    users = {}
+    for index, size in enumerate(sizes):
+        email = f"bench{index}_{size}@example.com"
+        with session_factory() as db:
+            user_id = create_user(db, email, password_hash)
+            db.commit()
+
+        with session_factory(user_id) as db:
+            users[size] = {
+                "user_id": user_id,
+                "email": email,
+                "password": BENCH_PASSWORD,
+                "transaction_ids": insert_transactions(db, user_id, generate_transactions(size, seed + index, end_date)),
+                "goal_ids": create_goals(db, user_id, seed + index),
+            }
+            db.commit()
+    return users
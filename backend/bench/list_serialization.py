@@ -0,0 +1,87 @@
+'''
+Compara a listagem GET /{user_id}/transactions antiga (objetos do ORM -> DTO por linha ->
+revalidação pelo response_model -> json) com a atual (tuplas -> dicts -> orjson).
+
+Uso: python -m bench.list_serialization [quantidade ...]
+'''
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
+
+from bench.generator import create_user, generate_transactions, insert_transactions
+from database.config import Base, create_db_engine
+from database.models import Transaction
+from dto.transactions_dto import TransactionsListResponse
+from mapper.transactions_mapper import TransactionMapper
+from services import transaction_service
+
+def seed(db: Session, count: int) -> int:
+    # Um usuário com `count` transações geradas por bench.generator
+    user_id = create_user(db, f"bench{count}@example.com", "")
+    insert_transactions(db, user_id, generate_transactions(count, seed=count))
+    db.commit()
+    return user_id
+
+def build_app(session_factory) -> FastAPI:
+    app = FastAPI()
+
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @app.get("/{user_id}/old", response_model=list[TransactionsListResponse])
+    def old_listing(user_id: int, db: Session = Depends(get_db)):
+        # Caminho anterior: entidades do ORM, um DTO por linha e nova validação pelo response_model
+        transactions = db.query(Transaction).filter(Transaction.user_id == user_id)\
+            .order_by(Transaction.transaction_date, Transaction.transaction_id).all()
+        return TransactionMapper.to_list_response(transactions)
+
+    @app.get("/{user_id}/new", response_model=list[TransactionsListResponse], response_class=ORJSONResponse)
+    def new_listing(user_id: int, db: Session = Depends(get_db)):
+        return ORJSONResponse(transaction_service.get_transactions_by_user(user_id=user_id, db=db))
+
+    return app
+
+def measure(client: TestClient, url: str, repeat: int) -> float:
+    client.get(url)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200
+    return sorted(timings)[len(timings) // 2] * 1000
+
+def main(counts: list[int]):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(f"sqlite:///{Path(directory) / 'bench.db'}")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        client = TestClient(build_app(session_factory))
+
+        print(f"{'transações':>12} {'antes (ms)':>12} {'depois (ms)':>12} {'ganho':>8}")
+        for count in counts:
+            with session_factory() as db:
+                user_id = seed(db, count)
+
+            old = client.get(f"/{user_id}/old").json()
+            assert old == client.get(f"/{user_id}/new").json()
+
+            repeat = max(5, 20000 // count)
+            before = measure(client, f"/{user_id}/old", repeat)
+            after = measure(client, f"/{user_id}/new", repeat)
+            print(f"{count:>12} {before:>12.2f} {after:>12.2f} {before / after:>7.1f}x")
+
+        engine.dispose()
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000, 50000])
@@ -0,0 +1,267 @@
+'''
+Mede latência (p50/p95/p99) e vazão de todas as rotas dos controllers de usuários,
+transações e metas, chamando a aplicação ASGI no próprio processo (sem servidor HTTP).
+
+Uso:
+    python -m bench.run --sizes 1000 10000 100000 --requests 50 --output bench-results.json
+
+O banco é criado do zero em um diretório temporário (DATABASE_URL é sobrescrito antes de
+importar a aplicação) e populado por bench.generator. O resultado em JSON pode ser
+comparado entre commits com `python -m bench.compare antes.json depois.json`.
+'''
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from itertools import count
+from pathlib import Path
+
+# Rotas que calculam bcrypt: poucas repetições bastam e evitam respostas 429 do pool de hash
+BCRYPT_REQUESTS = 10
+
+def percentile(latencies: list[float], p: float) -> float:
+    '''
+    Percentil p (0-100) das latências, interpolado entre as amostras vizinhas
+    '''
+    if len(latencies) == 1:
+        return latencies[0]
+    return statistics.quantiles(latencies, n=100, method="inclusive")[int(p) - 1]
+
+def summarize(latencies: list[float], elapsed: float, errors: int) -> dict:
+    latencies_ms = [latency * 1000 for latency in latencies]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p95_ms": round(percentile(latencies_ms, 95), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies_ms), 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+    }
+
+def build_scenarios(user: dict, spare: dict, today: date) -> list[tuple]:
+    '''
+    Monta os cenários medidos para um usuário do benchmark
+
+    Cada cenário é (nome, rota, status esperado, requisições, fábrica) e a fábrica recebe o
+    número da iteração e devolve (método, url, kwargs do httpx)
+    '''
+    from bench.generator import generate_transactions, to_payload
+
+    user_id = user["user_id"]
+    year_ago = (today - timedelta(days=365)).isoformat()
+    period = {"start_date": year_ago, "end_date": today.isoformat()}
+    # Série anual: os últimos 10 anos (o padrão da rota), com o ano atual incompleto
+    decade = {"start_date": date(today.year - 9, 1, 1).isoformat(), "end_date": today.isoformat()}
+    reads = user["transaction_ids"]
+    payloads = [to_payload(t) for t in generate_transactions(100, seed=user_id, end_date=today)]
+    new_emails = count()
+
+    return [
+        # --- Usuários ---
+        ("create_user", "POST /users", 201, BCRYPT_REQUESTS,
+         lambda i: ("POST", "/users/", {"json": {"name": "Fulano Benchmark", "password": "Senha@Forte123",
+                                                "email": f"novo{user_id}_{next(new_emails)}@example.com"}})),
+        ("login", "POST /users/login", 200, BCRYPT_REQUESTS,
+         lambda i: ("POST", "/users/login", {"json": {"email": user["email"], "password": user["password"]}})),
+        ("get_user", "GET /users/{user_id}", 200, None,
+         lambda i: ("GET", f"/users/{user_id}", {})),
+        ("user_info", "GET /users/{user_id}/info", 200, None,
+         lambda i: ("GET", f"/users/{user_id}/info", {})),
+        ("user_info_year", "GET /users/{user_id}/info", 200, None,
+         lambda i: ("GET", f"/users/{user_id}/info", {"params": period})),
+
+        # --- Transações (leituras) ---
+        ("list_transactions", "GET /{user_id}/transactions", 200, None,
+         lambda i: ("GET", f"/{user_id}/transactions/", {})),
+        ("list_transactions_page", "GET /{user_id}/transactions", 200, None,
+         lambda i: ("GET", f"/{user_id}/transactions/", {"params": {"limit": 100, "transaction_type": "Despesa"}})),
+        ("list_transactions_ndjson", "GET /{user_id}/transactions", 200, None,
+         lambda i: ("GET", f"/{user_id}/transactions/", {"params": {"format": "ndjson"}})),
+        ("transactions_info", "GET /{user_id}/transactions/info", 200, None,
+         lambda i: ("GET", f"/{user_id}/transactions/info", {"params": period})),
+        ("transactions_series_day", "GET /{user_id}/transactions/series", 200, None,
+         lambda i: ("GET", f"/{user_id}/transactions/series", {"params": {"granularity": "day", **period}})),
+        ("transactions_series_day_by_category", "GET /{user_id}/transactions/series", 200, None,
+         lambda i: ("GET", f"/{user_id}/transactions/series", {"params": {"granularity": "day", "by_category": "true", **period}})),
+        ("transactions_series_year", "GET /{user_id}/transactions/series", 200, None,
+         lambda i: ("GET", f"/{user_id}/transactions/series", {"params": {"granularity": "year", **decade}})),
+        ("get_transaction", "GET /{user_id}/transactions/{transaction_id}", 200, None,
+         lambda i: ("GET", f"/{user_id}/transactions/{reads[i * 7919 % len(reads)]}", {})),
+
+        # --- Metas (leituras) ---
+        ("list_goals", "GET /{user_id}/goals", 200, None,
+         lambda i: ("GET", f"/{user_id}/goals/", {})),
+        ("goals_info", "GET /{user_id}/goals/info", 200, None,
+         lambda i: ("GET", f"/{user_id}/goals/info", {"params": period})),
+        ("get_goal", "GET /{user_id}/goals/{goal_id}", 200, None,
+         lambda i: ("GET", f"/{user_id}/goals/{user['goal_ids'][i % len(user['goal_ids'])]}", {})),
+
+        # --- Escritas ---
+        ("create_transaction", "POST /{user_id}/transactions", 201, None,
+         lambda i: ("POST", f"/{user_id}/transactions/", {"json": payloads[i % len(payloads)]})),
+        ("create_transactions_bulk", "POST /{user_id}/transactions/bulk", 201, None,
+         lambda i: ("POST", f"/{user_id}/transactions/bulk", {"json": payloads})),
+        ("update_transaction", "PUT /{user_id}/transactions/{transaction_id}", 200, None,
+         lambda i: ("PUT", f"/{user_id}/transactions/{spare['transaction_ids'][i]}", {"json": payloads[i % len(payloads)]})),
+        ("delete_transaction", "DELETE /{user_id}/transactions/{transaction_id}", 200, None,
+         lambda i: ("DELETE", f"/{user_id}/transactions/{spare['transaction_ids'][i]}", {})),
+        ("create_goal", "POST /{user_id}/goals", 201, None,
+         lambda i: ("POST", f"/{user_id}/goals/", {"json": {"value": 500 + i, "type": "Despesa", "category": "Moradia"}})),
+        ("update_goal", "PUT /{user_id}/goals/{goal_id}", 200, None,
+         lambda i: ("PUT", f"/{spare['goals'][i][0]}/goals/{spare['goals'][i][1]}",
+                    {"json": {"value": 900 + i, "type": "Despesa", "category": "Saúde"}})),
+        ("delete_goal", "DELETE /{user_id}/goals/{goal_id}", 200, None,
+         lambda i: ("DELETE", f"/{spare['goals'][i][0]}/goals/{spare['goals'][i][1]}", {})),
+    ]
+
+def prepare_spare(session_factory, user: dict, needed: int, seed: int, today: date) -> dict:
+    '''
+    Cria as transações e metas consumidas pelos cenários de edição e exclusão,
+    para que não alterem os dados medidos pelas leituras
+    '''
+    from bench.generator import create_user, generate_transactions, insert_transactions
+    from database.models import Goal
+
+    with session_factory(user["user_id"]) as db:
+        transaction_ids = insert_transactions(db, user["user_id"], generate_transactions(needed, seed, today))
+        db.commit()
+
+    # Uma meta de "Moradia" por usuário auxiliar: a exclusão precisa de uma meta nova a cada iteração
+    goals = []
+    for index in range(needed):
+        with session_factory() as db:
+            goal_user_id = create_user(db, f"meta{user['user_id']}_{index}@example.com", "")
+            db.commit()
+
+        with session_factory(goal_user_id) as db:
+            goal = Goal(user_id=goal_user_id, goal_value=500, goal_type="Despesa", goal_category="Moradia")
+            db.add(goal)
+            db.commit()
+            goals.append((goal_user_id, goal.goal_id))
+    return {"transaction_ids": transaction_ids, "goals": goals}
+
+async def run_scenario(client, factory, expected_status: int, requests: int, concurrency: int, warmup: int) -> dict:
+    iterations = count()
+    latencies = []
+    errors = 0
+
+    async def send(i):
+        nonlocal errors
+        method, url, kwargs = factory(i)
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        latency = time.perf_counter() - start
+        if response.status_code != expected_status:
+            errors += 1
+        return latency
+
+    for _ in range(warmup):
+        await send(next(iterations))
+
+    async def worker(remaining):
+        while remaining:
+            remaining.pop()
+            latencies.append(await send(next(iterations)))
+
+    remaining = list(range(requests))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(remaining) for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run(args) -> dict:
+    # Importados só aqui: DATABASE_URL e CACHE_BACKEND precisam estar definidos antes
+    import httpx
+    from database.config import engine, session_for_user, shard_engines
+    from database.migrations import run_all_migrations
+    from main import app
+    from bench.generator import seed_database
+
+    run_all_migrations()
+    today = date.fromisoformat(args.end_date) if args.end_date else date.today()
+
+    users = seed_database(session_for_user, args.sizes, seed=args.seed, end_date=today)
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size, user in users.items():
+            spare = prepare_spare(session_for_user, user, args.requests + args.warmup, args.seed + size, today)
+
+            for name, route, expected_status, requests, factory in build_scenarios(user, spare, today):
+                if args.only and not any(pattern in name for pattern in args.only):
+                    continue
+
+                requests = min(requests or args.requests, args.requests)
+                summary = await run_scenario(client, factory, expected_status, requests, args.concurrency, args.warmup)
+                results.append({"scenario": name, "route": route, "size": size, **summary})
+                print(f"{size:>8} {name:<28} p50 {summary['p50_ms']:>9.2f} ms  p95 {summary['p95_ms']:>9.2f} ms  "
+                      f"p99 {summary['p99_ms']:>9.2f} ms  {summary['throughput_rps']:>8.1f} req/s"
+                      + (f"  ({summary['errors']} erros)" if summary["errors"] else ""), file=sys.stderr)
+
+    for db_engine in [engine, *shard_engines]:
+        db_engine.dispose()
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "end_date": today.isoformat(),
+            "cache_backend": os.environ["CACHE_BACKEND"],
+            "db_async": os.getenv("DB_ASYNC", "false"),
+            "db_shards": args.shards,
+        },
+        "results": results,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.run", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="quantidade de transações de cada usuário medido")
+    parser.add_argument("--requests", type=int, default=50, help="requisições medidas por cenário")
+    parser.add_argument("--concurrency", type=int, default=1, help="requisições simultâneas")
+    parser.add_argument("--warmup", type=int, default=2, help="requisições descartadas antes de medir")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", help="data mais recente dos dados gerados (padrão: hoje)")
+    parser.add_argument("--cache", choices=["none", "memory"], default="none",
+                        help="cache dos resumos do dashboard (padrão: desligado, mede as consultas)")
+    parser.add_argument("--database-url", help="banco a usar (padrão: SQLite novo em um diretório temporário)")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="arquivos SQLite entre os quais os usuários são distribuídos (DB_SHARDS)")
+    parser.add_argument("--only", nargs="+", help="mede só os cenários cujo nome contém um dos textos")
+    parser.add_argument("--output", default="bench-results.json", help="arquivo JSON de saída")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{Path(directory) / 'bench.db'}"
+        os.environ["CACHE_BACKEND"] = args.cache
+        os.environ["DB_SHARDS"] = str(args.shards)
+        report = asyncio.run(run(args))
+
+    Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Resultados gravados em {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
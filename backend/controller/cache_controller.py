@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+
+from utils.cache import dashboard_cache
+
+router = APIRouter(
+    prefix="/cache",
+    tags=["4. Cache"]
+)
+
+@router.get(
+    "/stats" # Rota: GET /cache/stats
+)
+def get_cache_stats():
+    # Acertos e falhas do cache dos resumos (/users/{id}/info, /{id}/transactions/info, /{id}/goals/info)
+    return dashboard_cache.stats()
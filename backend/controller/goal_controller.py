@@ -5,7 +5,8 @@ from datetime import date
 from typing import Dict
 
 from services import goal_service
-from database.config import get_db
+from database.config import get_db, get_read_db
+from utils.etag import user_etag
 
 from database.schemas import GoalCreate
 from dto.goals_dto import (
@@ -43,11 +44,12 @@ def create_goal(
 
 @router.get(
     "/",
-    response_model=list[GoalsListResponse]
+    response_model=list[GoalsListResponse],
+    dependencies=[Depends(user_etag)]
 )
 def get_goals(
     user_id: int, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     try:
         return goal_service.get_goals_by_user(user_id=user_id, db=db)
@@ -61,13 +63,14 @@ def get_goals(
 
 @router.get(
     "/info",
-    response_model=list[GoalInfoResponse]
+    response_model=list[GoalInfoResponse],
+    dependencies=[Depends(user_etag)]
 )
 def get_goals(
     user_id: int,
     start_date: date | None = None,
     end_date: date | None = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     try:
         return goal_service.get_goals_progress_by_user(user_id=user_id, start_date=start_date, end_date=end_date, db=db)
@@ -81,12 +84,13 @@ def get_goals(
 
 @router.get(
     "/{goal_id}",
-    response_model=GoalRegisterResponse
+    response_model=GoalRegisterResponse,
+    dependencies=[Depends(user_etag)]
 )
 def get_goal(
     user_id: int, 
     goal_id: int, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     try:
         return goal_service.get_specific_goal(
@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from utils.cache import dashboard_cache
+from utils.metrics import registry
+
+router = APIRouter(
+    tags=["5. Métricas"]
+)
+
+def _cache_lines() -> list[str]:
+    # Acertos e falhas do cache dos resumos, os mesmos números de /cache/stats
+    stats = dashboard_cache.stats()
+    lines = ["# HELP dashboard_cache_requests_total Consultas ao cache dos resumos do dashboard.",
+             "# TYPE dashboard_cache_requests_total counter"]
+    for endpoint, counters in sorted(stats["endpoints"].items()):
+        for counter, outcome in (("hits", "hit"), ("misses", "miss")):
+            lines.append(f'dashboard_cache_requests_total{{endpoint="{endpoint}",outcome="{outcome}"}} {counters[counter]}')
+    return lines
+
+@router.get(
+    "/metrics", # Rota: GET /metrics
+    response_class=PlainTextResponse
+)
+def get_metrics():
+    # Requisições, comandos SQL e cache no formato texto do Prometheus
+    return PlainTextResponse(registry.render(_cache_lines()), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,20 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
 from datetime import date, datetime as dt
 
-from typing import Dict
+from typing import Dict, Literal
 
 from datetime import date
 
 from services import transaction_service
-from database.config import get_db
+from database.config import get_db, get_import_db, get_read_db, get_stream_db
+from services.runner import call_service
+from utils.etag import dated_user_etag, user_etag
 
 from database.schemas import TransactionCreate
 from dto.transactions_dto import (
+    TransactionBulkResponse,
     TransactionRegisterResponse, 
     TransactionsListResponse
 )
-from dto.info_dto import TransactionInfoResponse
+from dto.info_dto import TransactionInfoResponse, TransactionSeriesResponse
+from utils.pagination import decode_offset_cursor, encode_cursor, encode_offset_cursor
+from utils.settings import get_settings
+from utils.transaction_import import parse_file
 
 router = APIRouter(
     prefix="/{user_id}/transactions",
@@ -43,26 +55,168 @@ def create_transaction(
             detail=f"An unexpected error occurred: {str(e)}"
         )
 
+def _body_too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"O envio passa do limite de {max_bytes} bytes da importação em lote.",
+    )
+
+class _BodyTooLarge(MultiPartException):
+    # Exceção do próprio parser: ao interromper um multipart, ele fecha os arquivos temporários já criados
+    pass
+
+async def _limited_stream(request: Request, max_bytes: int):
+    # Corpo lido em partes, parando no limite mesmo sem Content-Length (envio chunked)
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise _BodyTooLarge(f"Corpo maior que {max_bytes} bytes.")
+        yield chunk
+
+async def _read_bulk_rows(request: Request) -> list:
+    # Aceita um array JSON de transações ou um arquivo CSV/OFX enviado no campo "file",
+    # até BULK_MAX_BYTES de corpo e BULK_MAX_ROWS transações
+    settings = get_settings()
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > settings.bulk_max_bytes:
+        raise _body_too_large(settings.bulk_max_bytes)
+
+    stream = _limited_stream(request, settings.bulk_max_bytes)
+    try:
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            # O mesmo parser de request.form(), mas lendo o corpo com limite
+            form = await MultiPartParser(request.headers, stream).parse()
+            try:
+                upload = form.get("file")
+                if not isinstance(upload, UploadFile):
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Envie o arquivo no campo 'file'.",
+                    )
+                content = await upload.read()
+            finally:
+                await form.close()
+            # Leitura do arquivo (só CPU) fora do event loop
+            rows = await run_in_threadpool(parse_file, upload.filename, content)
+        else:
+            try:
+                rows = orjson.loads(b"".join([chunk async for chunk in stream]))
+            except orjson.JSONDecodeError:
+                rows = None
+
+            if not isinstance(rows, list):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Envie uma lista de transações em JSON ou um arquivo .csv/.ofx.",
+                )
+    except _BodyTooLarge:
+        raise _body_too_large(settings.bulk_max_bytes)
+    except MultiPartException as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+
+    if len(rows) > settings.bulk_max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Envie no máximo {settings.bulk_max_rows} transações por importação.",
+        )
+    return rows
+
+@router.post(
+    "/bulk", # Rota: POST /{user_id}/transactions/bulk
+    response_model=TransactionBulkResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/TransactionCreate"}}
+                },
+                "multipart/form-data": {
+                    "schema": {"type": "object", "properties": {"file": {"type": "string", "format": "binary"}}}
+                },
+            },
+            "required": True,
+        }
+    }
+)
+async def create_transactions_bulk(
+    user_id: int,
+    request: Request,
+    db: Session | AsyncSession = Depends(get_import_db)
+):
+    try:
+        rows = await _read_bulk_rows(request)
+
+        return await call_service(transaction_service.import_transactions, db,
+            async_fn=transaction_service.import_transactions_async,
+            user_id=user_id, rows=rows
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
 @router.get(
-    "/", # Rota: GET /{user_id}/transactions/?transaction_type=..&end_date=
-    response_model=list[TransactionsListResponse]
+    "/", # Rota: GET /{user_id}/transactions/?transaction_type=..&end_date=..&search=..&limit=..&after=..
+    response_model=list[TransactionsListResponse],
+    response_class=ORJSONResponse
 )
-def get_transactions(
+async def get_transactions(
     user_id: int,
     transaction_type: str | None = None,
     transaction_category: str | None = None,
     start_date: date | None = None,
     end_date: date | None = None,
-    db: Session = Depends(get_db)
+    limit: int | None = Query(None, ge=1, le=1000),
+    after: str | None = None,
+    # Palavras da descrição (ex.: "uber"); o resultado vem ordenado por relevância
+    search: str | None = Query(None, min_length=1, max_length=200),
+    format: Literal["json", "ndjson"] = "json",
+    etag: str = Depends(user_etag),
+    db: Session | AsyncSession = Depends(get_stream_db)
 ):
     try:
+        if format == "ndjson":
+            # Uma transação por linha, enviada conforme é lida do banco
+            lines = await call_service(transaction_service.stream_transactions_by_user, db,
+                                       async_fn=transaction_service.stream_transactions_by_user_async,
+                                       user_id=user_id,
+                                       transaction_type=transaction_type,
+                                       transaction_category=transaction_category,
+                                       start_date=start_date,
+                                       end_date=end_date,
+                                       after=after,
+                                       limit=limit,
+                                       search=search)
+            return StreamingResponse(lines, media_type="application/x-ndjson", headers={"ETag": etag})
 
-        return transaction_service.get_transactions_by_user(user_id=user_id,
-                                                         db=db,
-                                                         transaction_type=transaction_type,
-                                                         transaction_category=transaction_category,
-                                                         start_date=start_date,
-                                                         end_date=end_date)
+        transactions = await call_service(transaction_service.get_transactions_by_user, db,
+                                          user_id=user_id,
+                                          transaction_type=transaction_type,
+                                          transaction_category=transaction_category,
+                                          start_date=start_date,
+                                          end_date=end_date,
+                                          after=after,
+                                          limit=limit,
+                                          search=search)
+
+        headers = {"ETag": etag}
+
+        # Página cheia: informa o cursor para buscar a próxima
+        if limit and len(transactions) == limit:
+            if search is not None:
+                # Busca ordenada por relevância: o cursor guarda quantos resultados já foram entregues
+                headers["X-Next-Cursor"] = encode_offset_cursor((decode_offset_cursor(after) if after else 0) + limit)
+            else:
+                last = transactions[-1]
+                headers["X-Next-Cursor"] = encode_cursor(last["transaction_date"], last["transaction_id"])
+
+        # Resposta devolvida pronta: o FastAPI não revalida as linhas contra o response_model
+        return ORJSONResponse(transactions, headers=headers)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -73,19 +227,49 @@ def get_transactions(
 
 @router.get(
     "/info", # Rota: GET /{user_id}/transactions/?transaction_type=..&end_date=
-    response_model=TransactionInfoResponse
+    response_model=TransactionInfoResponse,
+    dependencies=[Depends(dated_user_etag)]
 )
 def get_transactions_info(
     user_id: int,
     start_date: date | None = None,
     end_date: date | None = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     try:
         return transaction_service.get_transactions_info(user_id=user_id,
-                                                         db=db,
                                                          start_date=start_date,
-                                                         end_date=end_date)
+                                                         end_date=end_date,
+                                                         db=db)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
+@router.get(
+    "/series", # Rota: GET /{user_id}/transactions/series?granularity=..&start_date=..&end_date=..&by_category=..
+    response_model=TransactionSeriesResponse,
+    dependencies=[Depends(dated_user_etag)]
+)
+def get_transactions_series(
+    user_id: int,
+    granularity: Literal["day", "week", "month", "quarter", "year"] = "month",
+    start_date: date | None = None,
+    end_date: date | None = None,
+    # Também devolve a série de cada categoria (matriz categoria x período)
+    by_category: bool = False,
+    db: Session = Depends(get_read_db)
+):
+    try:
+        return transaction_service.get_transactions_series(user_id=user_id,
+                                                           granularity=granularity,
+                                                           start_date=start_date,
+                                                           end_date=end_date,
+                                                           by_category=by_category,
+                                                           db=db)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -96,12 +280,13 @@ def get_transactions_info(
 
 @router.get(
     "/{transaction_id}", # Rota: GET /{id}/transactions/{id}
-    response_model=TransactionRegisterResponse
+    response_model=TransactionRegisterResponse,
+    dependencies=[Depends(user_etag)]
 )
 def get_transaction(
     user_id: int, 
     transaction_id: int, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     try:
         return transaction_service.get_specific_transaction(
@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from datetime import date
 
-from database.config import get_db
+from database.config import get_db, get_read_db
+from utils.etag import user_etag
 from database.schemas import UserCreate
 from services import user_service
 from dto.user_dto import  UserLogin, UserLoginResponse , UserResponse, UserRegisterResponse
@@ -71,11 +72,12 @@ def login_user(
 @router.get(
     "/{user_id}",
     response_model=UserResponse,
-    status_code=status.HTTP_200_OK
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(user_etag)]
 )
 def get_user(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     
     # Recebe user_id da URL
@@ -97,13 +99,14 @@ def get_user(
 @router.get(
     "/{user_id}/info",
     response_model=UserInfoResponse,
-    status_code=status.HTTP_200_OK
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(user_etag)]
 )
 def get_user_info(
     user_id: int,
     start_date: date | None = None,
     end_date: date | None = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     try:
         user_info = user_service.get_user_info(user_id=user_id, db=db, start_date=start_date, end_date=end_date)
@@ -1,15 +1,304 @@
-from sqlalchemy import create_engine
+from pathlib import Path
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-DATABASE_URL = 'sqlite:///./database/transactions.db'
-engine = create_engine(DATABASE_URL, connect_args={'check_same_thread': False})
+from utils.settings import get_settings
+
+settings = get_settings()
+
+DATABASE_URL = settings.database_url
+
+# Usa AsyncSession (aiosqlite / asyncpg) em vez de Session nas rotas
+DB_ASYNC = settings.db_async
+
+# Sharding (só SQLite): com DB_SHARDS > 1 os dados de cada usuário ficam em um de N arquivos,
+# cada um com a sua trava de escrita; o arquivo de DATABASE_URL guarda a tabela de usuários
+DB_SHARDS = settings.db_shards
+
+# Driver assíncrono equivalente a cada banco suportado
+_ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL deixa leitores e escritor trabalharem ao mesmo tempo; NORMAL só sincroniza o disco nos checkpoints
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+    cursor.execute(f"PRAGMA cache_size={settings.sqlite_cache_size}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout}")
+    cursor.close()
+
+def _set_sqlite_query_only(dbapi_connection, connection_record):
+    # Conexão de leitura: qualquer escrita falha com "attempt to write a readonly database"
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+def _pool_options():
+    return {'pool_size': settings.db_pool_size,
+            'max_overflow': settings.db_max_overflow,
+            'pool_pre_ping': settings.db_pool_pre_ping,
+            'pool_recycle': settings.db_pool_recycle}
+
+def create_db_engine(url: str, read_only: bool = False):
+    '''
+    Cria a engine do banco de dados a partir da URL
+
+    - SQLite: aplica os PRAGMAs de desempenho em cada nova conexão
+    - Outros bancos (ex.: PostgreSQL): pool de conexões configurável por variáveis de ambiente
+
+    Parâmetros:
+    url (str): URL do banco no formato do SQLAlchemy
+    read_only (bool): conexões só de leitura (SQLite: PRAGMA query_only; PostgreSQL: default_transaction_read_only)
+
+    Retorna:
+    Engine: engine pronta para uso
+    '''
+    if make_url(url).get_backend_name() == 'sqlite':
+        db_engine = create_engine(url, connect_args={'check_same_thread': False})
+        event.listen(db_engine, 'connect', _set_sqlite_pragmas)
+        if read_only:
+            event.listen(db_engine, 'connect', _set_sqlite_query_only)
+        return db_engine
+
+    connect_args = {'options': '-c default_transaction_read_only=on'} if read_only else {}
+    return create_engine(url, connect_args=connect_args, **_pool_options())
+
+def create_async_db_engine(url: str, read_only: bool = False):
+    '''
+    Cria a engine assíncrona equivalente à URL informada (sqlite -> aiosqlite, postgresql -> asyncpg)
+
+    Parâmetros:
+    url (str): URL do banco no formato do SQLAlchemy (com ou sem o driver)
+    read_only (bool): conexões só de leitura, como em create_db_engine
+
+    Retorna:
+    AsyncEngine: engine assíncrona com as mesmas configurações da síncrona
+    '''
+    async_url = make_url(url)
+    async_url = async_url.set(drivername=_ASYNC_DRIVERS.get(async_url.get_backend_name(), async_url.drivername))
+
+    if async_url.get_backend_name() == 'sqlite':
+        db_engine = create_async_engine(async_url)
+        event.listen(db_engine.sync_engine, 'connect', _set_sqlite_pragmas)
+        if read_only:
+            event.listen(db_engine.sync_engine, 'connect', _set_sqlite_query_only)
+        return db_engine
+
+    connect_args = {'server_settings': {'default_transaction_read_only': 'on'}} if read_only else {}
+    return create_async_engine(async_url, connect_args=connect_args, **_pool_options())
+
+def _warmup_count(db_engine, connections: int | None) -> int:
+    if connections is not None:
+        return connections
+    # Sem valor configurado: enche o pool (SQLite em memória usa um pool sem tamanho fixo)
+    size = getattr(db_engine.pool, 'size', None)
+    return size() if callable(size) else 1
+
+def warm_up_engine(db_engine, connections: int | None = None):
+    '''
+    Abre conexões antes da primeira requisição e as devolve ao pool, já com os PRAGMAs aplicados
+
+    Parâmetros:
+    db_engine (Engine): engine a aquecer
+    connections (int | None): quantidade de conexões (None: o tamanho do pool)
+
+    Retorna:
+    None
+    '''
+    # Todas ficam abertas ao mesmo tempo para que o pool crie conexões distintas
+    opened = [db_engine.connect() for _ in range(_warmup_count(db_engine, connections))]
+    for conn in opened:
+        conn.exec_driver_sql('SELECT 1')
+        conn.close()
+
+async def warm_up_async_engine(db_engine, connections: int | None = None):
+    '''
+    Versão de warm_up_engine para a engine assíncrona
+    '''
+    opened = [await db_engine.connect() for _ in range(_warmup_count(db_engine.sync_engine, connections))]
+    for conn in opened:
+        await conn.exec_driver_sql('SELECT 1')
+        await conn.close()
+
+# INSERT com suporte a ON CONFLICT de cada banco suportado
+_DIALECT_INSERTS = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+
+def dialect_insert(db, table):
+    '''
+    INSERT do dialeto em uso pela sessão, que aceita on_conflict_do_update (upsert)
+    '''
+    return _DIALECT_INSERTS[db.get_bind().dialect.name](table)
+
+def shard_urls(url: str, shards: int) -> list[str]:
+    '''
+    URLs dos arquivos de cada shard, ao lado do banco principal
+    (ex.: database/transactions.db -> database/transactions.shard0.db, ...)
+
+    Parâmetros:
+    url (str): URL do banco principal (SQLite em arquivo)
+    shards (int): quantidade de shards
+
+    Retorna:
+    list[str]: uma URL por shard, na ordem de shard_of
+    '''
+    db_url = make_url(url)
+    if db_url.get_backend_name() != 'sqlite' or db_url.database in (None, '', ':memory:'):
+        raise RuntimeError("DB_SHARDS > 1 requer um DATABASE_URL de SQLite em arquivo.")
+
+    path = Path(db_url.database)
+    return [db_url.set(database=str(path.with_name(f'{path.stem}.shard{shard}{path.suffix}'))).render_as_string(hide_password=False)
+            for shard in range(shards)]
+
+def shard_of(user_id: int, shards: int | None = None) -> int:
+    '''
+    Shard que guarda os dados do usuário (mesma regra de database.migrations.move_to_shards)
+    '''
+    return user_id % (shards or DB_SHARDS)
+
+def _attach_directory(directory_url: str):
+    # Anexa o banco principal como "directory": "users" (que não existe no shard) passa a ser a tabela dele
+    directory_path = make_url(directory_url).database
+
+    def attach(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("ATTACH DATABASE ? AS directory", (directory_path,))
+        cursor.close()
+    return attach
+
+def create_shard_engine(url: str, directory_url: str, read_only: bool = False):
+    '''
+    Cria a engine de um shard: cada conexão anexa o banco principal, então as consultas
+    continuam enxergando a tabela de usuários (junções, existência do usuário e exclusão)
+
+    Parâmetros:
+    url (str): URL do arquivo do shard
+    directory_url (str): URL do banco principal
+    read_only (bool): conexões só de leitura, como em create_db_engine
+
+    Retorna:
+    Engine: engine pronta para uso
+    '''
+    db_engine = create_db_engine(url, read_only)
+    event.listen(db_engine, 'connect', _attach_directory(directory_url))
+    return db_engine
+
+def create_async_shard_engine(url: str, directory_url: str, read_only: bool = False):
+    '''
+    Versão de create_shard_engine para a engine assíncrona
+    '''
+    db_engine = create_async_db_engine(url, read_only)
+    event.listen(db_engine.sync_engine, 'connect', _attach_directory(directory_url))
+    return db_engine
+
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+# Vazias sem sharding: todos os dados ficam em engine
+shard_engines = [create_shard_engine(url, DATABASE_URL) for url in shard_urls(DATABASE_URL, DB_SHARDS)] if DB_SHARDS > 1 else []
+ShardSessionLocal = [sessionmaker(autocommit=False, autoflush=False, bind=shard_engine) for shard_engine in shard_engines]
+
+# Leituras das rotas GET: pool próprio, só de leitura. No SQLite (WAL) abre o mesmo arquivo e os
+# leitores não esperam o escritor; DATABASE_READ_URL aponta as leituras para uma réplica.
+# Um SQLite em memória não pode ser aberto por outra engine: as leituras usam a de escrita
+_IN_MEMORY = make_url(DATABASE_URL).get_backend_name() == 'sqlite' and make_url(DATABASE_URL).database in (None, '', ':memory:')
+DATABASE_READ_URL = settings.database_read_url or DATABASE_URL
+
+read_engine = engine if _IN_MEMORY and not settings.database_read_url else create_db_engine(DATABASE_READ_URL, read_only=True)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+read_shard_engines = [create_shard_engine(url, DATABASE_READ_URL, read_only=True) for url in shard_urls(DATABASE_READ_URL, DB_SHARDS)] if DB_SHARDS > 1 else []
+ReadShardSessionLocal = [sessionmaker(autocommit=False, autoflush=False, bind=shard_engine) for shard_engine in read_shard_engines]
+
+def _path_user_id(request: Request) -> int | None:
+    # Rotas /{user_id}/...; um ID inválido é rejeitado depois pela validação da própria rota
+    try:
+        return int(request.path_params['user_id'])
+    except (KeyError, ValueError):
+        return None
+
+def session_for_user(user_id: int | None = None, read_only: bool = False):
+    '''
+    Nova sessão do banco que guarda os dados do usuário: o shard dele com DB_SHARDS > 1;
+    sem user_id (cadastro e login, que só usam a tabela de usuários) ou sem sharding, o banco principal.
+    Com read_only, a sessão vem do pool só de leitura.
+    '''
+    session_factory, shard_session_factories = (ReadSessionLocal, ReadShardSessionLocal) if read_only else (SessionLocal, ShardSessionLocal)
+    if user_id is None or not shard_session_factories:
+        return session_factory()
+    return shard_session_factories[shard_of(user_id)]()
+
+def shard_sessions(read_only: bool = False) -> list:
+    '''
+    Uma nova sessão por shard, na ordem de shard_of (lista vazia sem sharding), para as tarefas
+    que percorrem os dados de todos os usuários. Quem chama fecha as sessões.
+    '''
+    shard_session_factories = ReadShardSessionLocal if read_only else ShardSessionLocal
+    return [session_factory() for session_factory in shard_session_factories]
+
+def get_db(request: Request):
+    db = session_for_user(_path_user_id(request))
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db(request: Request):
+    # Dependência das rotas GET: mesma escolha de banco de get_db, com a sessão só de leitura
+    db = session_for_user(_path_user_id(request), read_only=True)
+    try:
+        yield db
+    finally:
+        db.close()
+
+# A engine assíncrona só é criada quando habilitada, pois depende do driver assíncrono instalado
+async_engine = create_async_db_engine(DATABASE_URL) if DB_ASYNC else None
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False) if DB_ASYNC else None
+
+async_shard_engines = [create_async_shard_engine(url, DATABASE_URL) for url in shard_urls(DATABASE_URL, DB_SHARDS)] if DB_ASYNC and DB_SHARDS > 1 else []
+AsyncShardSessionLocal = [async_sessionmaker(bind=shard_engine, autoflush=False, expire_on_commit=False) for shard_engine in async_shard_engines]
+
+async_read_engine = (async_engine if _IN_MEMORY and not settings.database_read_url else create_async_db_engine(DATABASE_READ_URL, read_only=True)) if DB_ASYNC else None
+AsyncReadSessionLocal = async_sessionmaker(bind=async_read_engine, autoflush=False, expire_on_commit=False) if DB_ASYNC else None
+
+async_read_shard_engines = [create_async_shard_engine(url, DATABASE_READ_URL, read_only=True) for url in shard_urls(DATABASE_READ_URL, DB_SHARDS)] if DB_ASYNC and DB_SHARDS > 1 else []
+AsyncReadShardSessionLocal = [async_sessionmaker(bind=shard_engine, autoflush=False, expire_on_commit=False) for shard_engine in async_read_shard_engines]
+
+def _async_session_factory(request: Request, session_factory, shard_session_factories):
+    user_id = _path_user_id(request)
+    if user_id is None or not shard_session_factories:
+        return session_factory
+    return shard_session_factories[shard_of(user_id)]
+
+async def get_async_db(request: Request):
+    async with _async_session_factory(request, AsyncSessionLocal, AsyncShardSessionLocal)() as db:
+        yield db
+
+async def get_async_read_db(request: Request):
+    async with _async_session_factory(request, AsyncReadSessionLocal, AsyncReadShardSessionLocal)() as db:
+        yield db
+
+# Com DB_ASYNC=true só a importação em lote e a listagem de transações (NDJSON) recebem AsyncSession,
+# pois passam a maior parte do tempo esperando o banco; as demais rotas são "def" com Session no threadpool
+if DB_ASYNC:
+    async def get_import_db(request: Request):
+        async for db in get_async_db(request):
+            yield db
+
+    async def get_stream_db(request: Request):
+        async for db in get_async_read_db(request):
+            yield db
+else:
+    def get_import_db(request: Request):
+        yield from get_db(request)
+
+    def get_stream_db(request: Request):
+        yield from get_read_db(request)
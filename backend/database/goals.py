@@ -1,17 +1,34 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime as dt
-from database.models import Goal
+from sqlalchemy import delete, func, literal, select, update
+from datetime import date, datetime as dt
+from database.config import dialect_insert
+from database.models import Goal, User
 from database.schemas import GoalCreate
+from database.transactions import _balance_source, _user_condition
+from database.versions import bump_user_version
 
 def create_goal_db(db: Session, user_id: int, goal: GoalCreate):
-    new_goal = Goal(user_id=user_id,
-                    goal_value=goal.value,
-                    goal_type=goal.type,
-                    goal_category=goal.category)
-    db.add(new_goal)
-    db.commit()
-    db.refresh(new_goal)
+    # Uma meta por categoria de cada usuário: se já existir, é atualizada (upsert).
+    # O WHERE EXISTS garante que o usuário existe sem uma consulta prévia
+    columns = Goal.__table__.c
+    values = select(literal(user_id, columns.user_id.type),
+                    literal(goal.value, columns.goal_value.type),
+                    literal(goal.type, columns.goal_type.type),
+                    literal(goal.category, columns.goal_category.type))\
+        .where(select(User.user_id).where(User.user_id == user_id).exists())
+
+    upsert = dialect_insert(db, Goal.__table__)\
+        .from_select(['user_id', 'goal_value', 'goal_type', 'goal_category'], values)
+    new_goal = db.execute(
+        upsert.on_conflict_do_update(index_elements=['user_id', 'goal_category'],
+                                     set_={'goal_value': upsert.excluded.goal_value,
+                                           'goal_type': upsert.excluded.goal_type})
+        .returning(*columns)
+    ).first()
+
+    if (new_goal):
+        bump_user_version(db, user_id)
+        db.commit()
     return new_goal
 
 def get_goal_by_id(db: Session, goal_id: int):
@@ -23,6 +40,31 @@ def get_goal_by_category(db: Session, goal_category: str):
 def get_goal_by_user(db: Session, user_id: int):
     return db.query(Goal).filter(Goal.user_id == user_id).all()
 
+def stream_goal_progress(db: Session, user_ids: int | list[int] | None = None, start_date: date | None = None, end_date: date | None = None, batch_size: int = 1000, shard: tuple[int, int] | None = None):
+    # Metas de vários usuários (ou de todos, com user_ids=None) com o total gasto/recebido na categoria,
+    # em uma única consulta lida em lotes e ordenada por usuário.
+    # Usuários sem metas aparecem uma vez com as colunas da meta nulas.
+    # shard=(shard, total de shards): só os usuários desse shard (a tabela de usuários do shard é a do banco principal)
+    model, value, _, conditions = _balance_source(user_ids, start_date, end_date)
+    sums = select(model.user_id, model.transaction_type, model.transaction_category, func.sum(value).label('progress'))\
+        .where(*conditions)\
+        .group_by(model.user_id, model.transaction_type, model.transaction_category)\
+        .subquery()
+
+    query = select(User.user_id, Goal.goal_id, Goal.goal_value, Goal.goal_type, Goal.goal_category,
+                   func.coalesce(sums.c.progress, 0).label('goal_progress'))\
+        .select_from(User)\
+        .outerjoin(Goal, Goal.user_id == User.user_id)\
+        .outerjoin(sums, (sums.c.user_id == Goal.user_id)
+                   & (sums.c.transaction_type == Goal.goal_type)
+                   & (sums.c.transaction_category == Goal.goal_category))\
+        .where(*_user_condition(User.user_id, user_ids))\
+        .order_by(User.user_id, Goal.goal_id)
+    if shard is not None:
+        query = query.where(User.user_id % shard[1] == shard[0])
+
+    yield from db.execute(query.execution_options(yield_per=batch_size))
+
 def get_general_goals(db: Session, user_id: int):
     general_goals = db.query(Goal.goal_type, func.sum(Goal.goal_value))\
         .filter(Goal.user_id == user_id)\
@@ -39,17 +81,36 @@ def get_general_goals(db: Session, user_id: int):
     else:
         return {"Receita": 0, "Despesa": 0}
 
-def update_goal(db: Session, goal_id: int, goal_new_data: GoalCreate):
-    goal = get_goal_by_id(db, goal_id)
-    if (goal):
-        goal.goal_value = goal_new_data.value
-        goal.goal_type = goal_new_data.type
-        goal.goal_category = goal_new_data.category
+def get_goal_owner(db: Session, user_id: int, goal_id: int):
+    # Usado só quando uma escrita não encontra a linha: (usuário existe?, dono da meta ou None)
+    user_exists = select(User.user_id).where(User.user_id == user_id).exists()
+    owner = select(Goal.user_id).where(Goal.goal_id == goal_id).scalar_subquery()
+    return tuple(db.execute(select(user_exists, owner)).one())
+
+def update_goal(db: Session, user_id: int, goal_id: int, goal_new_data: GoalCreate):
+    # A verificação do dono faz parte do WHERE; devolve a linha atualizada ou None
+    updated_goal = db.execute(
+        update(Goal.__table__)
+        .where(Goal.goal_id == goal_id, Goal.user_id == user_id)
+        .values(goal_value=goal_new_data.value,
+                goal_type=goal_new_data.type,
+                goal_category=goal_new_data.category)
+        .returning(*Goal.__table__.c)
+    ).first()
+
+    if (updated_goal):
+        bump_user_version(db, user_id)
         db.commit()
-        db.refresh(goal)
+    return updated_goal
 
-def delete_goal(db: Session, goal_id: int):   
-    goal = get_goal_by_id(db, goal_id)
-    if (goal):
-        db.delete(goal)
-        db.commit()
\ No newline at end of file
+def delete_goal(db: Session, user_id: int, goal_id: int):
+    deleted = db.execute(
+        delete(Goal.__table__)
+        .where(Goal.goal_id == goal_id, Goal.user_id == user_id)
+        .returning(Goal.goal_id)
+    ).first()
+
+    if (deleted):
+        bump_user_version(db, user_id)
+        db.commit()
+    return deleted is not None
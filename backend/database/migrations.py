@@ -0,0 +1,205 @@
+from sqlalchemy import DDL, Integer, delete, func, insert, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from database.config import Base, engine, shard_engines
+from database.models import MONTHLY_BALANCE_TRIGGERS, TRANSACTION_SEARCH_DDL, Goal, MonthlyBalance, SchemaMigration, Transaction, User, UserDataVersion
+from database.transactions import month_key as transaction_month_key
+
+
+def _monthly_balances(conn: Connection):
+    '''
+    Cria os triggers da tabela de resumo mensal e a preenche a partir das transações existentes
+    '''
+    for trigger in MONTHLY_BALANCE_TRIGGERS.get(conn.dialect.name, []):
+        conn.execute(DDL(trigger))
+
+    month_key = transaction_month_key(Transaction.transaction_date)
+    conn.execute(delete(MonthlyBalance))
+    conn.execute(
+        insert(MonthlyBalance).from_select(
+            ['user_id', 'year_month', 'transaction_type', 'transaction_category', 'total_value', 'transaction_count'],
+            select(Transaction.user_id,
+                   month_key,
+                   Transaction.transaction_type,
+                   Transaction.transaction_category,
+                   func.sum(Transaction.transaction_value),
+                   func.count())
+            .group_by(Transaction.user_id, month_key, Transaction.transaction_type, Transaction.transaction_category)
+        )
+    )
+
+# Índices que existiam quando quase todas as colunas tinham index=True
+_LEGACY_INDEXES = [
+    'ix_users_user_id',
+    'ix_users_user_name',
+    'ix_users_user_hashed_password',
+    'ix_transactions_user_id',
+    'ix_transactions_transaction_id',
+    'ix_transactions_transaction_date',
+    'ix_transactions_transaction_value',
+    'ix_transactions_transaction_type',
+    'ix_transactions_transaction_category',
+    'ix_transactions_transaction_description',
+    'ix_goals_user_id',
+    'ix_goals_goal_id',
+    'ix_goals_goal_value',
+    'ix_goals_goal_type',
+]
+
+_GOAL_CATEGORY_INDEX = 'ux_goals_user_category'
+
+def _composite_indexes(conn: Connection):
+    '''
+    Troca os índices de coluna única criados pelo esquema antigo pelos índices compostos dos modelos
+    '''
+    for index_name in _LEGACY_INDEXES:
+        conn.execute(text(f'DROP INDEX IF EXISTS {index_name}'))
+
+    for table in (User.__table__, Transaction.__table__, Goal.__table__):
+        # Os shards não têm a tabela de usuários
+        if not inspect(conn).has_table(table.name):
+            continue
+        for index in table.indexes:
+            # O índice único das metas depende da limpeza de duplicatas feita em _unique_goal_category
+            if index.name == _GOAL_CATEGORY_INDEX:
+                continue
+            index.create(conn, checkfirst=True)
+
+def _unique_goal_category(conn: Connection):
+    '''
+    Mantém só a meta mais recente de cada categoria por usuário e cria o índice único usado no upsert das metas
+    '''
+    latest = select(func.max(Goal.goal_id)).group_by(Goal.user_id, Goal.goal_category)
+    conn.execute(delete(Goal).where(Goal.goal_id.not_in(latest)))
+
+    for index in Goal.__table__.indexes:
+        if index.name == _GOAL_CATEGORY_INDEX:
+            index.create(conn, checkfirst=True)
+
+# Colunas de dinheiro que eram REAL/double precision e passam a guardar centavos (database.types.Money)
+_MONEY_COLUMNS = [
+    (Transaction.__table__, 'transaction_value'),
+    (Goal.__table__, 'goal_value'),
+]
+
+def _money_cents(conn: Connection):
+    '''
+    Converte os valores em reais (ponto flutuante) para centavos inteiros
+
+    - PostgreSQL: ALTER COLUMN ... TYPE bigint, que reescreve a tabela e recria os índices
+    - SQLite (sem ALTER COLUMN): a tabela é recriada pelo modelo e os dados voltam convertidos
+    Em seguida monthly_balances é recriada e recalculada em centavos, junto com os triggers.
+    Colunas que já são inteiras (banco criado depois desta versão) não são alteradas.
+    '''
+    columns = {table.name: {column['name']: column['type'] for column in inspect(conn).get_columns(table.name)}
+               for table, _ in _MONEY_COLUMNS}
+
+    for table, column in _MONEY_COLUMNS:
+        if isinstance(columns[table.name][column], Integer):
+            continue
+
+        if conn.dialect.name == 'postgresql':
+            # O trigger de monthly_balances depende de transaction_value; _monthly_balances o recria
+            conn.execute(text('DROP TRIGGER IF EXISTS trg_transactions_balance ON transactions'))
+            conn.execute(text(f'ALTER TABLE {table.name} ALTER COLUMN {column} TYPE bigint '
+                              f'USING round({column} * 100)::bigint'))
+            continue
+
+        names = ', '.join(c.name for c in table.columns)
+        converted = ', '.join(f'CAST(ROUND({c.name} * 100) AS INTEGER)' if c.name == column else c.name
+                              for c in table.columns)
+        conn.execute(text(f'CREATE TEMP TABLE {table.name}_backup AS SELECT {names} FROM {table.name}'))
+        # Remove também os índices e triggers da tabela antiga
+        table.drop(conn)
+        table.create(conn)
+        conn.execute(text(f'INSERT INTO {table.name} ({names}) SELECT {converted} FROM temp.{table.name}_backup'))
+        conn.execute(text(f'DROP TABLE temp.{table.name}_backup'))
+
+    MonthlyBalance.__table__.drop(conn)
+    MonthlyBalance.__table__.create(conn)
+    _monthly_balances(conn)
+
+def _transaction_search(conn: Connection):
+    '''
+    Cria o índice de busca textual das descrições (FTS5 ou GIN) e indexa as transações existentes
+    '''
+    for statement in TRANSACTION_SEARCH_DDL.get(conn.dialect.name, []):
+        conn.execute(DDL(statement))
+
+    # O índice FTS5 de conteúdo externo é preenchido a partir da tabela transactions
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')"))
+
+# Lista ordenada de migrações: (versão, nome, função)
+MIGRATIONS = [
+    (1, 'monthly_balances', _monthly_balances),
+    (2, 'composite_indexes', _composite_indexes),
+    (3, 'unique_goal_category', _unique_goal_category),
+    (4, 'money_cents', _money_cents),
+    (5, 'transaction_search', _transaction_search),
+]
+
+def run_migrations(engine: Engine, shard: bool = False):
+    '''
+    Cria as tabelas que ainda não existem e aplica, em ordem, as migrações pendentes
+
+    Parâmetros:
+    engine (Engine): engine do banco de dados a ser migrado
+    shard (bool): banco de um shard, que não tem a tabela de usuários (ela vem do banco principal anexado)
+
+    Retorna:
+    None
+    '''
+    tables = [table for table in Base.metadata.sorted_tables if table is not User.__table__] if shard else None
+    Base.metadata.create_all(bind=engine, tables=tables)
+
+    with engine.begin() as conn:
+        applied = set(conn.execute(select(SchemaMigration.version)).scalars())
+        for version, name, migrate in MIGRATIONS:
+            if version in applied:
+                continue
+            migrate(conn)
+            conn.execute(insert(SchemaMigration).values(version=version, name=name))
+
+# Tabelas com os dados de cada usuário, que ficam no shard dele
+_SHARDED_TABLES = [Transaction.__table__, Goal.__table__, UserDataVersion.__table__]
+
+def move_to_shards(shard_engines: list[Engine]):
+    '''
+    Move para o shard de cada usuário as linhas que ainda estão no banco principal (dados
+    gravados antes de ativar o sharding). Pode ser repetida: as linhas já copiadas são ignoradas
+    e só as que chegaram ao shard são removidas do banco principal. Os triggers de cada banco
+    mantêm monthly_balances e o índice de busca.
+
+    Parâmetros:
+    shard_engines (list[Engine]): engines dos shards, na ordem de database.config.shard_of
+
+    Retorna:
+    None
+    '''
+    for shard, shard_engine in enumerate(shard_engines):
+        with shard_engine.begin() as conn:
+            for table in _SHARDED_TABLES:
+                names = ', '.join(column.name for column in table.columns)
+                key = ', '.join(dict.fromkeys([*table.primary_key.columns.keys(), 'user_id']))
+                of_shard = 'user_id % :shards = :shard'
+                parameters = {'shards': len(shard_engines), 'shard': shard}
+
+                conn.execute(text(f'INSERT OR IGNORE INTO main.{table.name} ({names}) '
+                                  f'SELECT {names} FROM directory.{table.name} WHERE {of_shard}'), parameters)
+                conn.execute(text(f'DELETE FROM directory.{table.name} WHERE {of_shard} '
+                                  f'AND ({key}) IN (SELECT {key} FROM main.{table.name})'), parameters)
+
+def run_all_migrations():
+    '''
+    Migra o banco principal e, com DB_SHARDS > 1, cada shard, movendo para eles os dados antigos
+    '''
+    run_migrations(engine)
+    for shard_engine in shard_engines:
+        run_migrations(shard_engine, shard=True)
+    if shard_engines:
+        move_to_shards(shard_engines)
+
+if __name__ == '__main__':
+    # Passo único de deploy (python -m database.migrations), para rodar os workers com DB_MIGRATE_ON_STARTUP=false
+    run_all_migrations()
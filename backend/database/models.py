@@ -1,14 +1,15 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Date, Float
+from sqlalchemy import DDL, Column, ForeignKey, Index, Integer, String, Date, event
 from sqlalchemy.orm import relationship
 from database.config import Base
+from database.types import Money
 
 class User(Base):
     __tablename__ = 'users'
 
-    user_id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, primary_key=True)
     user_email = Column(String, unique=True, index=True)
-    user_name = Column(String, index=True)
-    user_hashed_password = Column(String, index=True)
+    user_name = Column(String)
+    user_hashed_password = Column(String)
 
     user_transactions = relationship('Transaction', back_populates='user', cascade='all, delete-orphan')
     user_goals = relationship('Goal', back_populates='user', cascade='all, delete-orphan')
@@ -16,23 +17,207 @@ class User(Base):
 class Transaction(Base):
     __tablename__ = 'transactions'
 
-    user_id = Column(Integer, ForeignKey('users.user_id'), index=True)
-    transaction_id = Column(Integer, primary_key=True, index=True)
-    transaction_date = Column(Date, index=True)
-    transaction_value = Column(Float, index=True)
-    transaction_type = Column(String, index=True)
-    transaction_category = Column(String, index=True)
-    transaction_description = Column(String, nullable=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.user_id'))
+    transaction_id = Column(Integer, primary_key=True)
+    transaction_date = Column(Date)
+    transaction_value = Column(Money)
+    transaction_type = Column(String)
+    transaction_category = Column(String)
+    transaction_description = Column(String, nullable=True)
 
     user = relationship('User', back_populates='user_transactions')
 
+    __table_args__ = (
+        # Listagem das transações do usuário filtrada e ordenada por data
+        Index('ix_transactions_user_date', 'user_id', 'transaction_date'),
+        # Filtros por tipo/categoria e somas agrupadas: o valor no fim torna o índice de cobertura
+        Index('ix_transactions_user_type_category_date',
+              'user_id', 'transaction_type', 'transaction_category', 'transaction_date', 'transaction_value'),
+    )
+
 class Goal(Base):
     __tablename__ = 'goals'
 
-    user_id = Column(Integer, ForeignKey('users.user_id'), index=True)
-    goal_id = Column(Integer, primary_key=True, index=True)
-    goal_value = Column(Float, index=True)
-    goal_type = Column(String, index=True)
+    user_id = Column(Integer, ForeignKey('users.user_id'))
+    goal_id = Column(Integer, primary_key=True)
+    goal_value = Column(Money)
+    goal_type = Column(String)
     goal_category = Column(String, index=True)
 
-    user = relationship('User', back_populates='user_goals')
\ No newline at end of file
+    user = relationship('User', back_populates='user_goals')
+
+    __table_args__ = (
+        # Metas do usuário e soma por tipo sem acessar a tabela
+        Index('ix_goals_user_type_value', 'user_id', 'goal_type', 'goal_value'),
+        # Uma meta por categoria de cada usuário (alvo do upsert na criação)
+        Index('ux_goals_user_category', 'user_id', 'goal_category', unique=True),
+    )
+
+class MonthlyBalance(Base):
+    __tablename__ = 'monthly_balances'
+
+    user_id = Column(Integer, ForeignKey('users.user_id'), primary_key=True)
+    year_month = Column(String, primary_key=True)
+    transaction_type = Column(String, primary_key=True)
+    transaction_category = Column(String, primary_key=True)
+    total_value = Column(Money, nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+class UserDataVersion(Base):
+    # Versão dos dados de cada usuário, incrementada a cada escrita (base do ETag das rotas GET).
+    # Sem chave estrangeira: a versão continua crescendo mesmo se o ID for reaproveitado
+    __tablename__ = 'user_data_versions'
+
+    user_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class SchemaMigration(Base):
+    __tablename__ = 'schema_migrations'
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+
+def _balance_statements(month_of: str):
+    """
+    Gera os comandos que mantêm monthly_balances: (remove OLD do seu mês, soma NEW ao seu mês).
+    month_of é a expressão do dialeto que converte uma data na chave "YYYY-MM" ({} recebe a coluna).
+    """
+    subtract_old = f"""
+        UPDATE monthly_balances
+        SET total_value = total_value - OLD.transaction_value,
+            transaction_count = transaction_count - 1
+        WHERE user_id = OLD.user_id
+          AND year_month = {month_of.format('OLD.transaction_date')}
+          AND transaction_type = OLD.transaction_type
+          AND transaction_category = OLD.transaction_category;
+        DELETE FROM monthly_balances
+        WHERE user_id = OLD.user_id
+          AND year_month = {month_of.format('OLD.transaction_date')}
+          AND transaction_type = OLD.transaction_type
+          AND transaction_category = OLD.transaction_category
+          AND transaction_count <= 0;
+    """
+
+    add_new = f"""
+        INSERT INTO monthly_balances (user_id, year_month, transaction_type, transaction_category, total_value, transaction_count)
+        VALUES (NEW.user_id, {month_of.format('NEW.transaction_date')}, NEW.transaction_type, NEW.transaction_category, NEW.transaction_value, 1)
+        ON CONFLICT (user_id, year_month, transaction_type, transaction_category)
+        DO UPDATE SET total_value = monthly_balances.total_value + excluded.total_value,
+                      transaction_count = monthly_balances.transaction_count + 1;
+    """
+
+    return subtract_old, add_new
+
+# Os '%%' são escapes do DDL do SQLAlchemy
+_SQLITE_SUBTRACT_OLD, _SQLITE_ADD_NEW = _balance_statements("strftime('%%Y-%%m', {})")
+_POSTGRES_SUBTRACT_OLD, _POSTGRES_ADD_NEW = _balance_statements("to_char({}, 'YYYY-MM')")
+
+# Mantém monthly_balances em dia na mesma transação de banco que altera a tabela transactions
+MONTHLY_BALANCE_TRIGGERS = {
+    'sqlite': [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_balance_insert
+        AFTER INSERT ON transactions
+        BEGIN
+            {_SQLITE_ADD_NEW}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_balance_delete
+        AFTER DELETE ON transactions
+        BEGIN
+            {_SQLITE_SUBTRACT_OLD}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_balance_update
+        AFTER UPDATE OF user_id, transaction_date, transaction_value, transaction_type, transaction_category ON transactions
+        BEGIN
+            {_SQLITE_SUBTRACT_OLD}
+            {_SQLITE_ADD_NEW}
+        END
+        """,
+    ],
+    'postgresql': [
+        f"""
+        CREATE OR REPLACE FUNCTION transactions_monthly_balance() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                {_POSTGRES_SUBTRACT_OLD}
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                {_POSTGRES_ADD_NEW}
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        DROP TRIGGER IF EXISTS trg_transactions_balance ON transactions
+        """,
+        """
+        CREATE TRIGGER trg_transactions_balance
+        AFTER INSERT OR DELETE OR UPDATE OF user_id, transaction_date, transaction_value, transaction_type, transaction_category
+        ON transactions
+        FOR EACH ROW EXECUTE FUNCTION transactions_monthly_balance()
+        """,
+    ],
+}
+
+# Busca textual na descrição das transações (parâmetro "search" da listagem)
+TRANSACTION_SEARCH_DDL = {
+    # Tabela FTS5 de conteúdo externo: guarda só o índice, os textos continuam em transactions.
+    # O user_id também é indexado para que a busca já saia restrita ao usuário;
+    # remove_diacritics faz "onibus" encontrar "Ônibus"
+    'sqlite': [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+            user_id, transaction_description,
+            content='transactions', content_rowid='transaction_id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_insert
+        AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO transactions_fts (rowid, user_id, transaction_description)
+            VALUES (NEW.transaction_id, NEW.user_id, NEW.transaction_description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_delete
+        AFTER DELETE ON transactions
+        BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, user_id, transaction_description)
+            VALUES ('delete', OLD.transaction_id, OLD.user_id, OLD.transaction_description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_update
+        AFTER UPDATE OF user_id, transaction_description ON transactions
+        BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, user_id, transaction_description)
+            VALUES ('delete', OLD.transaction_id, OLD.user_id, OLD.transaction_description);
+            INSERT INTO transactions_fts (rowid, user_id, transaction_description)
+            VALUES (NEW.transaction_id, NEW.user_id, NEW.transaction_description);
+        END
+        """,
+    ],
+    # Índice GIN sobre a expressão: o próprio PostgreSQL o mantém a cada escrita.
+    # A expressão precisa ser idêntica à usada em database.transactions para o índice ser usado
+    'postgresql': [
+        """
+        CREATE INDEX IF NOT EXISTS ix_transactions_description_search ON transactions
+        USING gin (to_tsvector('portuguese'::regconfig, coalesce(transaction_description, '')))
+        """,
+    ],
+}
+
+for ddl_by_dialect in (MONTHLY_BALANCE_TRIGGERS, TRANSACTION_SEARCH_DDL):
+    for dialect, statements in ddl_by_dialect.items():
+        for statement in statements:
+            event.listen(Base.metadata, 'after_create', DDL(statement).execute_if(dialect=dialect))
+
+# A tabela FTS não faz parte do metadata: é removida junto com as demais em drop_all
+event.listen(Base.metadata, 'before_drop', DDL('DROP TABLE IF EXISTS transactions_fts').execute_if(dialect='sqlite'))
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, StrictStr
 from datetime import date
 
 class GoalCreate(BaseModel):
@@ -17,7 +17,16 @@ class GoalResponse(BaseModel):
         from_attributes = True
 
 class TransactionCreate(BaseModel):
-    date: str
+    # Só texto ISO: números e outros tipos não são convertidos em data (validada em utils.validators)
+    date: StrictStr
+    value: float
+    type: str
+    category: str
+    description: str | None = None
+
+class TransactionData(BaseModel):
+    # Transação já validada por utils.validators.validate_transaction, com a data convertida; usada pelo CRUD
+    date: date
     value: float
     type: str
     category: str
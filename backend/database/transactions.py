@@ -1,26 +1,113 @@
+import re
+
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime as dt, date
-from database.models import Transaction
-from database.schemas import TransactionCreate
-
-def create_transaction_db(db: Session, user_id: int, transaction: TransactionCreate):
-    new_transaction = Transaction(user_id=user_id,
-                                  transaction_date=dt.fromisoformat(transaction.date),
-                                  transaction_value=transaction.value,
-                                  transaction_type=transaction.type,
-                                  transaction_category=transaction.category,
-                                  transaction_description=transaction.description)
-    db.add(new_transaction)
-    db.commit()
-    db.refresh(new_transaction)
+from sqlalchemy import Date, String, case, column, delete, false, func, insert, literal, literal_column, null, select, table, tuple_, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from datetime import date, timedelta
+from database.models import Goal, MonthlyBalance, Transaction, User
+from database.schemas import TransactionData
+from database.versions import bump_user_version
+
+def create_transaction_db(db: Session, user_id: int, transaction: TransactionData):
+    # INSERT ... SELECT ... WHERE EXISTS: só insere se o usuário existir, sem consulta prévia
+    # A transação chega de validate_transaction, com a data já convertida
+    columns = Transaction.__table__.c
+    values = select(literal(user_id, columns.user_id.type),
+                    literal(transaction.date, columns.transaction_date.type),
+                    literal(transaction.value, columns.transaction_value.type),
+                    literal(transaction.type, columns.transaction_type.type),
+                    literal(transaction.category, columns.transaction_category.type),
+                    literal(transaction.description, columns.transaction_description.type))\
+        .where(select(User.user_id).where(User.user_id == user_id).exists())
+
+    new_transaction = db.execute(
+        insert(Transaction.__table__)
+        .from_select(['user_id', 'transaction_date', 'transaction_value', 'transaction_type',
+                      'transaction_category', 'transaction_description'], values)
+        .returning(*columns)
+    ).first()
+
+    if (new_transaction):
+        bump_user_version(db, user_id)
+        db.commit()
     return new_transaction
 
+def create_transactions_bulk(db: Session, user_id: int, transactions: list[TransactionData], chunk_size: int = 5000):
+    # Insere em lotes com um único INSERT executemany e um COMMIT por lote
+    inserted = 0
+    for i in range(0, len(transactions), chunk_size):
+        chunk = [
+            {"user_id": user_id,
+             "transaction_date": transaction.date,
+             "transaction_value": transaction.value,
+             "transaction_type": transaction.type,
+             "transaction_category": transaction.category,
+             "transaction_description": transaction.description}
+            for transaction in transactions[i:i + chunk_size]
+        ]
+        db.execute(insert(Transaction.__table__), chunk)
+        bump_user_version(db, user_id)
+        db.commit()
+        inserted += len(chunk)
+
+    return inserted
+
 def get_transaction_by_id(db: Session, transaction_id: int):
     return db.query(Transaction).filter(Transaction.transaction_id == transaction_id).first()
 
-def get_transactions_by_user(db: Session, user_id: int, transaction_type: str | None = None, transaction_category: str | None = None, start_date: date | None = None, end_date: date | None = None):
-    query = db.query(Transaction).filter(Transaction.user_id == user_id)
+def get_user_transaction(db: Session, user_id: int, transaction_id: int):
+    # Busca pela chave primária; o filtro por usuário garante que a transação é dele
+    return db.query(Transaction)\
+        .filter(Transaction.transaction_id == transaction_id, Transaction.user_id == user_id)\
+        .first()
+
+# Colunas da listagem, na ordem de TransactionsListResponse: as linhas vêm como tuplas, sem montar objetos do ORM
+LIST_COLUMNS = (
+    Transaction.transaction_id,
+    Transaction.transaction_date,
+    Transaction.transaction_value,
+    Transaction.transaction_type,
+    Transaction.transaction_category,
+    Transaction.transaction_description,
+)
+
+# Índice FTS5 das descrições (SQLite), mantido pelos triggers de database.models.TRANSACTION_SEARCH_DDL
+transactions_fts = table('transactions_fts', column('rowid'), column('transactions_fts'))
+
+# Configuração de texto do PostgreSQL: literal (não parâmetro) para casar com a expressão do índice GIN
+_SEARCH_CONFIG = literal_column("'portuguese'::regconfig")
+
+def search_terms(search: str) -> list[str]:
+    # Palavras da busca, sem pontuação nem operadores: cada uma casa como prefixo ("ube" encontra "Uber")
+    return re.findall(r'\w+', search.lower())
+
+def _search_query(query, db: Session, user_id: int, search: str):
+    """
+    Restringe a listagem às transações cuja descrição contém todas as palavras da busca,
+    ordenadas pela relevância e, no empate, das mais recentes para as mais antigas.
+    """
+    terms = search_terms(search)
+    if (not terms):
+        return query.filter(false())
+
+    recent_first = (Transaction.transaction_date.desc(), Transaction.transaction_id.desc())
+
+    if (db.get_bind().dialect.name == 'postgresql'):
+        document = func.to_tsvector(_SEARCH_CONFIG, func.coalesce(Transaction.transaction_description, ''))
+        terms_query = func.to_tsquery(_SEARCH_CONFIG, ' & '.join(f'{term}:*' for term in terms))
+        return query.filter(document.op('@@')(terms_query))\
+            .order_by(func.ts_rank(document, terms_query).desc(), *recent_first)
+
+    # O user_id também está no índice FTS: a busca não percorre as transações dos outros usuários
+    match = f'user_id:"{user_id}" AND transaction_description:(' + ' '.join(f'"{term}"*' for term in terms) + ')'
+    return query.join(transactions_fts, transactions_fts.c.rowid == Transaction.transaction_id)\
+        .filter(transactions_fts.c.transactions_fts.op('MATCH')(match))\
+        .order_by(func.bm25(transactions_fts.c.transactions_fts, 0.0, 1.0), *recent_first)
+
+def _transactions_by_user_query(db: Session, user_id: int, transaction_type: str | None = None, transaction_category: str | None = None, start_date: date | None = None, end_date: date | None = None, after: tuple[date, int] | None = None, limit: int | None = None, search: str | None = None, offset: int | None = None):
+    query = db.query(*LIST_COLUMNS).filter(Transaction.user_id == user_id)
 
     if (transaction_type):
         query = query.filter(Transaction.transaction_type == transaction_type)
@@ -33,22 +120,232 @@ def get_transactions_by_user(db: Session, user_id: int, transaction_type: str |
     
     if (end_date):
         query = query.filter(Transaction.transaction_date <= end_date)
-    
-    return query.all()
 
-def get_transaction_agregate(db: Session, user_id: int, transaction_type: str, start_date: date | None = None, end_date: date | None = None):
-    transaction_agregate = db.query(Transaction.transaction_category, func.sum(Transaction.transaction_value))\
-        .filter(Transaction.user_id == user_id)
-    
+    if (search is not None):
+        # Resultado ordenado por relevância: a paginação usa offset em vez do cursor (data, id)
+        query = _search_query(query, db, user_id, search)
+    else:
+        # Paginação por cursor: continua a partir da última (data, id) entregue
+        if (after):
+            query = query.filter(tuple_(Transaction.transaction_date, Transaction.transaction_id) > tuple_(*after))
+
+        query = query.order_by(Transaction.transaction_date, Transaction.transaction_id)
+
+    if (limit):
+        query = query.limit(limit)
+
+    if (offset):
+        query = query.offset(offset)
+
+    return query
+
+def get_transactions_by_user(db: Session, user_id: int, transaction_type: str | None = None, transaction_category: str | None = None, start_date: date | None = None, end_date: date | None = None, after: tuple[date, int] | None = None, limit: int | None = None, search: str | None = None, offset: int | None = None):
+    return _transactions_by_user_query(db, user_id, transaction_type, transaction_category, start_date, end_date, after, limit, search, offset).all()
+
+# Linhas lidas por vez nas listagens em stream (e por bloco da resposta NDJSON)
+STREAM_BATCH_SIZE = 500
+
+def stream_transactions_by_user(db: Session, user_id: int, transaction_type: str | None = None, transaction_category: str | None = None, start_date: date | None = None, end_date: date | None = None, after: tuple[date, int] | None = None, limit: int | None = None, search: str | None = None, offset: int | None = None, batch_size: int = STREAM_BATCH_SIZE):
+    # Lê as linhas em lotes conforme são consumidas, sem carregar todo o resultado na memória
+    query = _transactions_by_user_query(db, user_id, transaction_type, transaction_category, start_date, end_date, after, limit, search, offset)
+    yield from query.yield_per(batch_size)
+
+async def stream_transactions_by_user_async(db: AsyncSession, user_id: int, transaction_type: str | None = None, transaction_category: str | None = None, start_date: date | None = None, end_date: date | None = None, after: tuple[date, int] | None = None, limit: int | None = None, search: str | None = None, offset: int | None = None, batch_size: int = STREAM_BATCH_SIZE):
+    # Mesma consulta de stream_transactions_by_user, lida em lotes pelo driver assíncrono
+    query = _transactions_by_user_query(db.sync_session, user_id, transaction_type, transaction_category, start_date, end_date, after, limit, search, offset)
+    result = await db.stream(query.statement.execution_options(yield_per=batch_size))
+    async for transaction in result:
+        yield transaction
+
+class year_month(FunctionElement):
+    # Chave "YYYY-MM" de uma data, compilada de acordo com o banco em uso
+    type = String()
+    inherit_cache = True
+
+@compiles(year_month)
+def _year_month_sqlite(element, compiler, **kw):
+    return "strftime('%%Y-%%m', %s)" % compiler.process(element.clauses, **kw)
+
+@compiles(year_month, 'postgresql')
+def _year_month_postgresql(element, compiler, **kw):
+    return "to_char(%s, 'YYYY-MM')" % compiler.process(element.clauses, **kw)
+
+def month_key(column):
+    # Chave "YYYY-MM" usada para agrupar transações por mês
+    return year_month(column)
+
+class month_start(FunctionElement):
+    # Primeiro dia do mês de uma chave "YYYY-MM" (monthly_balances.year_month)
+    type = Date()
+    inherit_cache = True
+
+@compiles(month_start)
+def _month_start_sqlite(element, compiler, **kw):
+    return "(%s || '-01')" % compiler.process(element.clauses, **kw)
+
+@compiles(month_start, 'postgresql')
+def _month_start_postgresql(element, compiler, **kw):
+    return "to_date(%s, 'YYYY-MM')" % compiler.process(element.clauses, **kw)
+
+# Granularidades da série temporal; semanas começam na segunda-feira (ISO 8601)
+SERIES_GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year')
+
+class period_start(FunctionElement):
+    # Início ("YYYY-MM-DD") do período que contém a data; cada granularidade é uma subclasse
+    type = String()
+    inherit_cache = True
+    granularity = None
+
+PERIOD_START = {
+    granularity: type(f'{granularity}_start', (period_start,), {'granularity': granularity, 'inherit_cache': True})
+    for granularity in SERIES_GRANULARITIES
+}
+
+_SQLITE_PERIOD_START = {
+    'day': "date({0})",
+    'week': "date({0}, 'weekday 0', '-6 days')",
+    'month': "date({0}, 'start of month')",
+    'quarter': "date({0}, 'start of month', printf('-%d months', (CAST(strftime('%m', {0}) AS INTEGER) - 1) % 3))",
+    'year': "date({0}, 'start of year')",
+}
+
+@compiles(period_start)
+def _period_start_sqlite(element, compiler, **kw):
+    return _SQLITE_PERIOD_START[element.granularity].format(compiler.process(element.clauses, **kw))
+
+@compiles(period_start, 'postgresql')
+def _period_start_postgresql(element, compiler, **kw):
+    return "to_char(date_trunc('%s', %s), 'YYYY-MM-DD')" % (element.granularity, compiler.process(element.clauses, **kw))
+
+def _covers_whole_months(start_date: date | None, end_date: date | None):
+    # O resumo mensal só pode ser usado quando o período começa no dia 1 e termina no último dia de um mês
+    if (start_date and start_date.day != 1):
+        return False
+
+    if (end_date and (end_date + timedelta(days=1)).day != 1):
+        return False
+
+    return True
+
+def _user_condition(column, user_id: int | list[int] | None):
+    # Um usuário, uma lista de usuários ou todos (None)
+    if (user_id is None):
+        return []
+    if (isinstance(user_id, int)):
+        return [column == user_id]
+    return [column.in_(user_id)]
+
+def _balance_source(user_id: int | list[int] | None, start_date: date | None = None, end_date: date | None = None, monthly: bool = True):
+    """
+    Escolhe de onde somar os valores do usuário no período: monthly_balances quando o
+    período cobre meses inteiros (e monthly=True), senão a tabela de transações.
+    user_id também aceita uma lista de IDs ou None (todos os usuários).
+    Retorna (modelo, coluna de valor, chave do mês, condições do filtro).
+    """
+    if (monthly and _covers_whole_months(start_date, end_date)):
+        conditions = _user_condition(MonthlyBalance.user_id, user_id)
+
+        if (start_date):
+            conditions.append(MonthlyBalance.year_month >= start_date.strftime('%Y-%m'))
+
+        if (end_date):
+            conditions.append(MonthlyBalance.year_month <= end_date.strftime('%Y-%m'))
+
+        return MonthlyBalance, MonthlyBalance.total_value, MonthlyBalance.year_month, conditions
+
+    conditions = _user_condition(Transaction.user_id, user_id)
+
     if (start_date):
-        transaction_agregate = transaction_agregate.filter(Transaction.transaction_date >= start_date)
-    
+        conditions.append(Transaction.transaction_date >= start_date)
+
     if (end_date):
-        transaction_agregate = transaction_agregate.filter(Transaction.transaction_date <= end_date)
+        conditions.append(Transaction.transaction_date <= end_date)
+
+    return Transaction, Transaction.transaction_value, month_key(Transaction.transaction_date), conditions
 
-    transaction_agregate = transaction_agregate.filter(Transaction.transaction_type == transaction_type)\
-        .group_by(Transaction.transaction_category)\
+def _sum_grouped_by(db: Session, user_id: int, group_by: list[str], start_date: date | None = None, end_date: date | None = None, **filters):
+    """
+    Soma o valor das transações do usuário agrupando pelas colunas informadas
+    (transaction_type, transaction_category e/ou year_month).
+    Lê da tabela monthly_balances sempre que o período cobrir meses inteiros.
+    """
+    model, value, month, conditions = _balance_source(user_id, start_date, end_date)
+    columns = [month if column == 'year_month' else getattr(model, column) for column in group_by]
+
+    for column, column_value in filters.items():
+        conditions.append(getattr(model, column) == column_value)
+
+    return db.query(*columns, func.sum(value))\
+        .filter(*conditions)\
+        .group_by(*columns)\
         .all()
+
+def get_user_summary(db: Session, user_id: int, start_date: date | None = None, end_date: date | None = None):
+    """
+    Resumo do dashboard em uma única consulta: se o usuário existe, os totais por tipo,
+    os totais por tipo e categoria e a soma das metas por tipo.
+
+    No PostgreSQL os dois níveis saem de um GROUPING SETS; no SQLite o nível por tipo
+    (equivalente ao ROLLUP) é agregado a partir do nível por categoria em uma CTE.
+    """
+    model, value, _, conditions = _balance_source(user_id, start_date, end_date)
+    transaction_type, transaction_category = model.transaction_type, model.transaction_category
+
+    if (db.get_bind().dialect.name == 'postgresql'):
+        levels = [
+            select(case((func.grouping(transaction_category) == 1, 'type'), else_='category').label('level'),
+                   transaction_type.label('group_type'),
+                   transaction_category.label('category'),
+                   func.sum(value).label('total'))
+            .where(*conditions)
+            .group_by(func.grouping_sets(tuple_(transaction_type, transaction_category), tuple_(transaction_type)))
+        ]
+    else:
+        # O nível por tipo é somado a partir do nível por categoria, sem reler as transações
+        by_category = select(transaction_type.label('group_type'),
+                             transaction_category.label('category'),
+                             func.sum(value).label('total'))\
+            .where(*conditions)\
+            .group_by(transaction_type, transaction_category)\
+            .cte('by_category')
+        levels = [
+            select(literal('category').label('level'), by_category.c.group_type, by_category.c.category, by_category.c.total),
+            select(literal('type'), by_category.c.group_type, null(), func.sum(by_category.c.total))
+            .group_by(by_category.c.group_type),
+        ]
+
+    goals = select(literal('goal'), Goal.goal_type, null(), func.sum(Goal.goal_value))\
+        .where(Goal.user_id == user_id)\
+        .group_by(Goal.goal_type)
+    user = select(literal('user'), null(), null(), null()).where(User.user_id == user_id)
+
+    statement = union_all(*levels, goals, user).order_by('level', 'group_type', 'category')
+
+    summary = {"user_exists": False,
+               "totals": {"Receita": 0, "Despesa": 0},
+               "by_category": {"Receita": {}, "Despesa": {}},
+               "goals": {"Receita": 0, "Despesa": 0}}
+
+    goals_by_type = {}
+    for level, group_type, category, total in db.execute(statement):
+        if (level == 'user'):
+            summary["user_exists"] = True
+        elif (level == 'type'):
+            summary["totals"][group_type] = total
+        elif (level == 'category'):
+            summary["by_category"].setdefault(group_type, {})[category] = total
+        else:
+            goals_by_type[group_type] = total
+
+    # Mesma ordem de get_general_goals: tipos com metas primeiro, depois os que faltarem
+    if (goals_by_type):
+        summary["goals"] = {**goals_by_type, **{t: 0 for t in ("Receita", "Despesa") if t not in goals_by_type}}
+
+    return summary
+
+def get_transaction_agregate(db: Session, user_id: int, transaction_type: str, start_date: date | None = None, end_date: date | None = None):
+    transaction_agregate = _sum_grouped_by(db, user_id, ['transaction_category'], start_date, end_date,
+                                           transaction_type=transaction_type)
     
     if (transaction_agregate):
         return dict(transaction_agregate)
@@ -56,16 +353,7 @@ def get_transaction_agregate(db: Session, user_id: int, transaction_type: str, s
         return {}
 
 def get_transaction_sum(db: Session, user_id: int, start_date: date | None = None, end_date: date | None = None):
-    transactions_sum = db.query(Transaction.transaction_type, func.sum(Transaction.transaction_value))\
-        .filter(Transaction.user_id == user_id)
-
-    if (start_date):
-        transactions_sum = transactions_sum.filter(Transaction.transaction_date >= start_date)
-    
-    if (end_date):
-        transactions_sum = transactions_sum.filter(Transaction.transaction_date <= end_date)
-        
-    transactions_sum = transactions_sum.group_by(Transaction.transaction_type).all()    
+    transactions_sum = _sum_grouped_by(db, user_id, ['transaction_type'], start_date, end_date)
     
     if (transactions_sum):
         transactions_sum = dict(transactions_sum)
@@ -77,35 +365,76 @@ def get_transaction_sum(db: Session, user_id: int, start_date: date | None = Non
     else:
         return {"Receita": 0, "Despesa": 0}
 
-def get_transactiom_sum_by_category(db: Session, user_id: int, start_date: date | None = None, end_date: date | None = None):
-    transactions_sum = db.query(Transaction.transaction_type, Transaction.transaction_category, func.sum(Transaction.transaction_value))\
-        .filter(Transaction.user_id == user_id)
+def get_transaction_sum_by_month(db: Session, user_id: int, start_date: date, end_date: date):
+    transactions_sum = _sum_grouped_by(db, user_id, ['year_month', 'transaction_type'], start_date, end_date)
 
-    if (start_date):
-        transactions_sum = transactions_sum.filter(Transaction.transaction_date >= start_date)
-    
-    if (end_date):
-        transactions_sum = transactions_sum.filter(Transaction.transaction_date <= end_date)
-        
-    transactions_sum = transactions_sum.group_by(Transaction.transaction_type, Transaction.transaction_category).all()
+    # Agrupa por mês: {"YYYY-MM": {"Receita": x, "Despesa": y}}
+    months_sum = {}
+    for month, transaction_type, transaction_value in transactions_sum:
+        months_sum.setdefault(month, {})[transaction_type] = transaction_value
+
+    return months_sum
+
+def get_transaction_series(db: Session, user_id: int, granularity: str, start_date: date, end_date: date, by_category: bool = False):
+    """
+    Soma as transações do usuário por período e tipo (e categoria, se by_category) em uma
+    única consulta agrupada. Períodos sem transações não aparecem no resultado.
+    Granularidades de mês em diante leem monthly_balances quando o período cobre meses inteiros.
+    Retorna linhas (início do período "YYYY-MM-DD", tipo, [categoria,] total).
+    """
+    model, value, month, conditions = _balance_source(user_id, start_date, end_date,
+                                                      monthly=granularity in ('month', 'quarter', 'year'))
+    day = Transaction.transaction_date if model is Transaction else month_start(month)
+
+    columns = [PERIOD_START[granularity](day), model.transaction_type]
+    if (by_category):
+        columns.append(model.transaction_category)
+
+    return db.query(*columns, func.sum(value))\
+        .filter(*conditions)\
+        .group_by(*columns)\
+        .all()
+
+def get_transactiom_sum_by_category(db: Session, user_id: int, start_date: date | None = None, end_date: date | None = None):
+    transactions_sum = _sum_grouped_by(db, user_id, ['transaction_type', 'transaction_category'], start_date, end_date)
     
     if (transactions_sum):
         return transactions_sum
     else:
         return []
 
-def update_transaction(db: Session, transaction_id: int, transaction_new_data: TransactionCreate):
-    transaction = get_transaction_by_id(db, transaction_id)
-    if (transaction):
-        transaction.transaction_date = dt.fromisoformat(transaction_new_data.date)
-        transaction.transaction_value = transaction_new_data.value
-        transaction.transaction_category = transaction_new_data.category
-        transaction.transaction_description = transaction_new_data.description
+def get_transaction_owner(db: Session, user_id: int, transaction_id: int):
+    # Usado só quando uma escrita não encontra a linha: (usuário existe?, dono da transação ou None)
+    user_exists = select(User.user_id).where(User.user_id == user_id).exists()
+    owner = select(Transaction.user_id).where(Transaction.transaction_id == transaction_id).scalar_subquery()
+    return tuple(db.execute(select(user_exists, owner)).one())
+
+def update_transaction(db: Session, user_id: int, transaction_id: int, transaction_new_data: TransactionData):
+    # A verificação do dono faz parte do WHERE; devolve a linha atualizada ou None
+    updated_transaction = db.execute(
+        update(Transaction.__table__)
+        .where(Transaction.transaction_id == transaction_id, Transaction.user_id == user_id)
+        .values(transaction_date=transaction_new_data.date,
+                transaction_value=transaction_new_data.value,
+                transaction_type=transaction_new_data.type,
+                transaction_category=transaction_new_data.category,
+                transaction_description=transaction_new_data.description)
+        .returning(*Transaction.__table__.c)
+    ).first()
+
+    if (updated_transaction):
+        bump_user_version(db, user_id)
         db.commit()
-        db.refresh(transaction)
+    return updated_transaction
 
-def delete_transaction(db: Session, transaction_id: int):   
-    transaction = get_transaction_by_id(db, transaction_id)
-    if (transaction):
-        db.delete(transaction)
-        db.commit()
\ No newline at end of file
+def delete_transaction(db: Session, user_id: int, transaction_id: int):
+    deleted = db.execute(
+        delete(Transaction.__table__)
+        .where(Transaction.transaction_id == transaction_id, Transaction.user_id == user_id)
+        .returning(Transaction.transaction_id)
+    ).first()
+
+    if (deleted):
+        bump_user_version(db, user_id)
+        db.commit()
+    return deleted is not None
@@ -0,0 +1,37 @@
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+def to_cents(value) -> int:
+    '''
+    Converte um valor em reais (float, int ou Decimal) para centavos inteiros
+
+    Valores com até duas casas decimais ficam a menos de 1e-9 de um inteiro depois de
+    multiplicados por 100, então o arredondamento recupera os centavos exatos
+    '''
+    return round(value * 100)
+
+def from_cents(cents) -> float:
+    '''
+    Converte centavos (int; Decimal nas somas de BIGINT do PostgreSQL) no float mais próximo do valor em reais
+    '''
+    return int(cents) / 100
+
+class Money(TypeDecorator):
+    """
+    Valor monetário guardado como inteiro de centavos (BIGINT).
+
+    O restante da aplicação continua lendo e escrevendo float em reais: a conversão é feita
+    na escrita (parâmetros) e na leitura (resultados, inclusive de SUM e COALESCE, que herdam
+    o tipo da coluna). Somas e comparações no banco são exatas e mais baratas que em REAL.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_cents(value)
+
+    def result_processor(self, dialect, coltype):
+        # Chamado em cada linha lida (a listagem lê milhares): evita o envoltório de process_result_value
+        def process(value):
+            return None if value is None else int(value) / 100
+        return process
@@ -1,10 +1,13 @@
 from sqlalchemy.orm import Session
 from database.models import User
 from database.schemas import UserCreate
+from database.versions import bump_user_version
 
 def create_user_db(db: Session, user: UserCreate):
     new_user = User(user_email=user.email, user_name=user.name, user_hashed_password=user.password)
     db.add(new_user)
+    db.flush()
+    bump_user_version(db, new_user.user_id)
     db.commit()
     db.refresh(new_user)
     return new_user
@@ -19,6 +22,7 @@ def update_user_email(db: Session, user_id: int, new_email: str):
     user = get_user_by_id(db, user_id)
     if (user):
         user.user_email = new_email
+        bump_user_version(db, user_id)
         db.commit()
         db.refresh(user)
 
@@ -26,6 +30,15 @@ def update_user_name(db: Session, user_id: int, new_name: str):
     user = get_user_by_id(db, user_id)
     if (user):
         user.user_name = new_name
+        bump_user_version(db, user_id)
+        db.commit()
+        db.refresh(user)
+
+def update_user_password(db: Session, user_id: int, new_hashed_password: str):
+    user = get_user_by_id(db, user_id)
+    if (user):
+        user.user_hashed_password = new_hashed_password
+        bump_user_version(db, user_id)
         db.commit()
         db.refresh(user)
 
@@ -33,4 +46,5 @@ def delete_user(db: Session, user_id: int):
     user = get_user_by_id(db, user_id)
     if (user):
         db.delete(user)
+        bump_user_version(db, user_id)
         db.commit()
\ No newline at end of file
@@ -0,0 +1,15 @@
+from sqlalchemy.orm import Session
+from database.config import dialect_insert
+from database.models import UserDataVersion
+
+def bump_user_version(db: Session, user_id: int):
+    # Executado antes do commit da escrita, na mesma transação do banco
+    upsert = dialect_insert(db, UserDataVersion).values(user_id=user_id, version=1)
+    db.execute(upsert.on_conflict_do_update(
+        index_elements=[UserDataVersion.user_id],
+        set_={'version': UserDataVersion.version + 1}
+    ))
+
+def get_user_version(db: Session, user_id: int):
+    version = db.query(UserDataVersion.version).filter(UserDataVersion.user_id == user_id).scalar()
+    return version or 0
@@ -0,0 +1,44 @@
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from database import goals as crud_goals
+from database import transactions as crud_transactions
+from database import users as crud_users
+from database import versions as crud_versions
+
+# Os IDs começam em 1: as consultas de aquecimento não encontram nenhuma linha
+_NO_USER = 0
+
+def warm_up_queries(db: Session):
+    '''
+    Executa uma vez as consultas das rotas de leitura para um usuário inexistente
+
+    A primeira execução de cada formato de consulta compila o SQL (alguns ms); depois ele fica
+    no cache da engine, então a primeira requisição real de cada rota não paga esse custo.
+
+    Parâmetros:
+    db (Session): sessão da engine a aquecer (na AsyncSession, usar via run_sync)
+
+    Retorna:
+    None
+    '''
+    year = date.today().year
+    # Sem período, meses inteiros (monthly_balances) e período parcial (transactions)
+    periods = [(None, None), (date(year, 1, 1), date(year, 12, 31)), (date(year, 1, 2), date(year, 12, 30))]
+
+    crud_users.get_user_by_id(db, _NO_USER)
+    crud_versions.get_user_version(db, _NO_USER)
+
+    crud_transactions.get_transactions_by_user(db, _NO_USER)
+    crud_transactions.get_user_transaction(db, _NO_USER, _NO_USER)
+    crud_transactions.get_transaction_sum_by_month(db, _NO_USER, *periods[1])
+    crud_goals.get_goal_by_user(db, _NO_USER)
+    crud_goals.get_goal_by_id(db, _NO_USER)
+    for granularity in crud_transactions.SERIES_GRANULARITIES:
+        crud_transactions.get_transaction_series(db, _NO_USER, granularity, *periods[1])
+
+    for start_date, end_date in periods:
+        crud_transactions.get_user_summary(db, _NO_USER, start_date, end_date)
+        crud_transactions.get_transaction_agregate(db, _NO_USER, "Despesa", start_date, end_date)
+        list(crud_goals.stream_goal_progress(db, _NO_USER, start_date=start_date, end_date=end_date))
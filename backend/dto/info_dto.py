@@ -1,3 +1,5 @@
+from datetime import date
+
 from pydantic import BaseModel
 
 class FinancialData(BaseModel):
@@ -36,4 +38,18 @@ class TransactionByMonth(BaseModel):
 class TransactionInfoResponse(BaseModel):
     lastYearTransactions: list[TransactionByMonth]
     incomeList: list[TransactionByCategory]
-    expenseList: list[TransactionByCategory]
\ No newline at end of file
+    expenseList: list[TransactionByCategory]
+
+
+class TransactionSeriesByCategory(BaseModel):
+    transaction_type: str
+    transaction_category: str
+    values: list[float]
+
+class TransactionSeriesResponse(BaseModel):
+    granularity: str
+    # Início de cada período; income, expense e values seguem a mesma ordem
+    periods: list[date]
+    income: list[float]
+    expense: list[float]
+    categories: list[TransactionSeriesByCategory]
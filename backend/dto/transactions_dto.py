@@ -19,3 +19,13 @@ class TransactionsListResponse(BaseModel):
     transaction_type: str
     transaction_category: str
     transaction_description: str | None
+
+
+class TransactionBulkError(BaseModel):
+    row: int
+    detail: str
+
+
+class TransactionBulkResponse(BaseModel):
+    inserted: int
+    errors: list[TransactionBulkError]
@@ -1,8 +1,12 @@
+from contextlib import asynccontextmanager
+
 from fastapi import Depends, FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 # from sqlalchemy.orm import Session
 
+from controller import cache_controller
 from controller import goal_controller
+from controller import metrics_controller
 from controller import transaction_controller
 from controller import user_controller
 
@@ -12,8 +16,29 @@ from controller import user_controller
 # from mapper.user_mapper import UserMapper
 # from mapper.transactions_mapper import TransactionMapper
 
-from database import models
-from database.config import engine, get_db
+from database.config import (
+    AsyncReadSessionLocal,
+    AsyncReadShardSessionLocal,
+    ReadSessionLocal,
+    ReadShardSessionLocal,
+    async_engine,
+    async_read_engine,
+    async_read_shard_engines,
+    async_shard_engines,
+    engine,
+    get_db,
+    get_read_db,
+    read_engine,
+    read_shard_engines,
+    shard_engines,
+    warm_up_async_engine,
+    warm_up_engine,
+)
+from database.migrations import run_all_migrations
+from database.warmup import warm_up_queries
+from utils.metrics import METRICS_ENABLED, MetricsMiddleware, instrument_engine
+from utils.password_hash import shutdown_pool as shutdown_password_hash_pool
+from utils.settings import get_settings
 # from database.schemas import (
 #     GoalCreate,
 #     TransactionCreate,
@@ -36,9 +61,55 @@ from database.config import engine, get_db
 #     validate_unique_email,
 # )
 
-models.Base.metadata.create_all(bind=engine)
-
-app = FastAPI()
+def _sync_engines():
+    # A engine de leitura é a própria engine de escrita quando o SQLite está em memória
+    return list(dict.fromkeys([engine, *shard_engines, read_engine, *read_shard_engines]))
+
+def _async_engines():
+    return list(dict.fromkeys(db_engine for db_engine in [async_engine, *async_shard_engines, async_read_engine, *async_read_shard_engines]
+                              if db_engine is not None))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    '''
+    Inicialização e encerramento de cada worker
+
+    Nada disso roda na importação do módulo: importar main (testes, ferramentas) não toca no banco.
+    Antes da primeira requisição aplica as migrações pendentes, abre as conexões do pool e
+    compila as consultas de leitura (no banco principal e em cada shard); no encerramento
+    finaliza os processos de hash de senhas e fecha as conexões.
+    '''
+    settings = get_settings()
+    if settings.db_migrate_on_startup:
+        run_all_migrations()
+
+    # Pools de escrita: só as conexões; pools de leitura: conexões e consultas das rotas GET
+    if async_engine is not None:
+        for db_engine in [async_engine, *async_shard_engines]:
+            await warm_up_async_engine(db_engine, settings.db_warmup_connections)
+        for db_engine, session_factory in [(async_read_engine, AsyncReadSessionLocal), *zip(async_read_shard_engines, AsyncReadShardSessionLocal)]:
+            await warm_up_async_engine(db_engine, settings.db_warmup_connections)
+            if settings.db_warmup_queries:
+                async with session_factory() as db:
+                    await db.run_sync(warm_up_queries)
+    else:
+        for db_engine in [engine, *shard_engines]:
+            warm_up_engine(db_engine, settings.db_warmup_connections)
+        for db_engine, session_factory in [(read_engine, ReadSessionLocal), *zip(read_shard_engines, ReadShardSessionLocal)]:
+            warm_up_engine(db_engine, settings.db_warmup_connections)
+            if settings.db_warmup_queries:
+                with session_factory() as db:
+                    warm_up_queries(db)
+
+    yield
+
+    shutdown_password_hash_pool()
+    for db_engine in _async_engines():
+        await db_engine.dispose()
+    for db_engine in _sync_engines():
+        db_engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:5173"
@@ -55,6 +126,16 @@ app.add_middleware(
 app.include_router(user_controller.router)
 app.include_router(transaction_controller.router)
 app.include_router(goal_controller.router)
+app.include_router(cache_controller.router)
+
+# Contagem e duração dos comandos SQL por requisição (Server-Timing e GET /metrics)
+if METRICS_ENABLED:
+    for db_engine in _sync_engines():
+        instrument_engine(db_engine)
+    for db_engine in _async_engines():
+        instrument_engine(db_engine.sync_engine)
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_controller.router)
 
 
 # """
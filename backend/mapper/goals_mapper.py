@@ -1,5 +1,6 @@
 from database.models import Goal
 from dto.goals_dto import GoalRegisterResponse, GoalsListResponse
+from dto.info_dto import GoalInfoResponse
 
 
 class GoalMapper:
@@ -25,3 +26,14 @@ class GoalMapper:
             )
             for g in goals
         ]
+
+    @staticmethod
+    def to_info_response(row) -> GoalInfoResponse:
+        # Linha de database.goals.stream_goal_progress
+        return GoalInfoResponse(
+            goal_id=row.goal_id,
+            goal_value=row.goal_value,
+            goal_progress=row.goal_progress,
+            goal_type=row.goal_type,
+            goal_category=row.goal_category,
+        )
@@ -1,7 +1,14 @@
+import orjson
+from sqlalchemy import Row
+
 from database.models import Transaction
 from dto.transactions_dto import TransactionRegisterResponse, TransactionsListResponse
 
 
+# Campos da listagem, na mesma ordem de database.transactions.LIST_COLUMNS
+LIST_FIELDS = tuple(TransactionsListResponse.model_fields)
+
+
 class TransactionMapper:
     @staticmethod
     def to_response(transaction) -> TransactionRegisterResponse:
@@ -18,8 +25,8 @@ class TransactionMapper:
                 transaction_category=transaction.get("transaction_category"),
                 transaction_description=transaction.get("transaction_description"),
             )
-        elif isinstance(transaction, Transaction):
-            # Quando vem do banco
+        elif isinstance(transaction, (Transaction, Row)):
+            # Quando vem do banco (modelo ou linha devolvida por RETURNING)
             return TransactionRegisterResponse(
                 transaction_id=transaction.transaction_id,
                 transaction_date=transaction.transaction_date,
@@ -33,37 +40,75 @@ class TransactionMapper:
                 f"Tipo inesperado ao mapear transação: {type(transaction).__name__}"
             )
 
+    @staticmethod
+    def to_list_item(t) -> TransactionsListResponse:
+        """
+        Converte uma transação (Transaction ou dict) em um item da listagem.
+        """
+        if isinstance(t, dict):
+            return TransactionsListResponse(
+                transaction_id=t.get("transaction_id"),
+                transaction_date=t.get("transaction_date"),
+                transaction_value=t.get("transaction_value"),
+                transaction_type=t.get("transaction_type"),
+                transaction_category=t.get("transaction_category"),
+                transaction_description=t.get("transaction_description"),
+            )
+        elif isinstance(t, (Transaction, Row)):
+            return TransactionsListResponse(
+                transaction_id=t.transaction_id,
+                transaction_date=t.transaction_date,
+                transaction_value=t.transaction_value,
+                transaction_type=t.transaction_type,
+                transaction_category=t.transaction_category,
+                transaction_description=t.transaction_description,
+            )
+        else:
+            raise TypeError(
+                f"Tipo inesperado na lista de transações: {type(t).__name__}"
+            )
+
     @staticmethod
     def to_list_response(transactions: list) -> list[TransactionsListResponse]:
         """
         Converte uma lista de transações (Transaction ou dict) em DTOs.
         """
-        mapped = []
-        for t in transactions:
-            if isinstance(t, dict):
-                mapped.append(
-                    TransactionsListResponse(
-                        transaction_id=t.get("transaction_id"),
-                        transaction_date=t.get("transaction_date"),
-                        transaction_value=t.get("transaction_value"),
-                        transaction_type=t.get("transaction_type"),
-                        transaction_category=t.get("transaction_category"),
-                        transaction_description=t.get("transaction_description"),
-                    )
-                )
-            elif isinstance(t, Transaction):
-                mapped.append(
-                    TransactionsListResponse(
-                        transaction_id=t.transaction_id,
-                        transaction_date=t.transaction_date,
-                        transaction_value=t.transaction_value,
-                        transaction_type=t.transaction_type,
-                        transaction_category=t.transaction_category,
-                        transaction_description=t.transaction_description,
-                    )
-                )
-            else:
-                raise TypeError(
-                    f"Tipo inesperado na lista de transações: {type(t).__name__}"
-                )
-        return mapped
+        return [TransactionMapper.to_list_item(t) for t in transactions]
+
+    @staticmethod
+    def to_list_row(t) -> dict:
+        """
+        Converte uma linha da listagem (tupla do banco ou dict do JSON) no dict que vai na resposta,
+        sem validar por um DTO: as colunas já têm os tipos de TransactionsListResponse.
+        """
+        if isinstance(t, Row):
+            return dict(zip(LIST_FIELDS, t))
+        elif isinstance(t, dict):
+            row = {field: t.get(field) for field in LIST_FIELDS}
+            row["transaction_value"] = float(row["transaction_value"])
+            return row
+        else:
+            raise TypeError(
+                f"Tipo inesperado na lista de transações: {type(t).__name__}"
+            )
+
+    @staticmethod
+    def to_list_rows(transactions: list) -> list[dict]:
+        """
+        Converte a listagem em dicts prontos para o orjson (ORJSONResponse).
+        """
+        return [TransactionMapper.to_list_row(t) for t in transactions]
+
+    @staticmethod
+    def to_ndjson_line(t) -> bytes:
+        """
+        Serializa uma transação da listagem como uma linha NDJSON.
+        """
+        return orjson.dumps(TransactionMapper.to_list_row(t)) + b"\n"
+
+    @staticmethod
+    def to_ndjson_chunk(transactions: list) -> bytes:
+        """
+        Serializa um lote de transações como um único bloco NDJSON (uma linha por transação).
+        """
+        return b"".join([TransactionMapper.to_ndjson_line(t) for t in transactions])
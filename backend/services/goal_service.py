@@ -1,16 +1,22 @@
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from datetime import date
+from heapq import merge
+from itertools import groupby
+from operator import attrgetter
+from typing import Iterable, Iterator
 
 from database import goals as crud_goals
-from database import transactions as crud_transactions
 from database import users as crud_user
+from database.config import shard_of, shard_sessions
 from database.schemas import GoalCreate
 
 from dto.goals_dto import GoalRegisterResponse, GoalsListResponse
 from dto.info_dto import GoalInfoResponse
 from mapper.goals_mapper import GoalMapper
 
+from utils.cache import dashboard_cache
 from utils.validators import FieldValidator as val
 
 
@@ -20,18 +26,6 @@ def create_new_goal(
     db: Session
 ) -> GoalRegisterResponse:
     
-    # Valida o usuário
-    user = crud_user.get_user_by_id(db, user_id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Usuário não cadastrado.",
-        )
-
-    goal = crud_goals.get_goal_by_category(db, goal_data.category)
-    if goal:
-        return update_specific_goal(user_id, goal.goal_id, goal_data, db)
-
     # Validações
     val.validate_type(goal_data.type)
 
@@ -39,10 +33,16 @@ def create_new_goal(
     
     val.validate_value(goal_data.value)
 
-    # Chama o crud de meta
+    # Chama o crud de meta: cria, ou atualiza a meta que o usuário já tiver na categoria
     goal_model = crud_goals.create_goal_db(
-        db, user.user_id, goal_data
+        db, user_id, goal_data
     )
+    if not goal_model:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Usuário não cadastrado.",
+        )
+    dashboard_cache.invalidate_user(user_id)
     
     # Converte para o DTO de resposta
     return GoalMapper.to_response(goal_model)
@@ -66,39 +66,92 @@ def get_goals_by_user(
     # Converte para a lista de DTOs de resposta
     return GoalMapper.to_list_response(goals_list)
 
+@dashboard_cache.cached("goals_info", list[GoalInfoResponse])
 def get_goals_progress_by_user(
     user_id: int,
     db: Session,
     start_date: date | None = None,
     end_date: date | None = None
 ) -> list[GoalInfoResponse]:
-    
-    # Valida o usuário
-    user = crud_user.get_user_by_id(db, user_id)
-    if not user:
+
+    # Mesma consulta do processamento em lote, restrita a um usuário
+    rows = list(crud_goals.stream_goal_progress(db, user_id, start_date=start_date, end_date=end_date))
+
+    # Nenhuma linha: o usuário não existe
+    if not rows:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Usuário com ID {user_id} não encontrado.",
         )
 
-    goals_list = crud_goals.get_goal_by_user(db, user.user_id)
-    transactions_list = crud_transactions.get_transactiom_sum_by_category(db, user.user_id, start_date=start_date, end_date=end_date)
-    transactions_dict = {"Receita": {}, "Despesa": {}}
-    for typ, cat, val in transactions_list:
-        transactions_dict[typ][cat] = val
-
-    goals_info_list = []
-    for goal in goals_list:
-        progress = transactions_dict[goal.goal_type].get(goal.goal_category, 0)
-        goals_info_list.append(GoalInfoResponse(
-            goal_id=goal.goal_id,
-            goal_value=goal.goal_value,
-            goal_progress=progress,
-            goal_type=goal.goal_type,
-            goal_category=goal.goal_category
-        ))
-    
-    return goals_info_list
+    return [GoalMapper.to_info_response(row) for row in rows if row.goal_id is not None]
+
+def get_goals_progress_for_users(
+    db: Session,
+    user_ids: Iterable[int] | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    chunk_size: int = 5000
+) -> Iterator[tuple[int, list[GoalInfoResponse]]]:
+    """
+    Progresso das metas de vários usuários de uma vez (ex.: e-mail noturno de progresso).
+
+    Com user_ids=None percorre todos os usuários em uma única consulta; com uma lista, faz
+    uma consulta a cada chunk_size IDs (limite de parâmetros do SQLite). As linhas são lidas
+    em lotes e agrupadas por usuário, então a memória não cresce com a quantidade de usuários.
+    IDs inexistentes são ignorados; usuários sem metas vêm com a lista vazia.
+
+    Com DB_SHARDS > 1 cada shard é lido em uma sessão só de leitura própria (db não é usado),
+    com os IDs do próprio shard, e os resultados são intercalados por user_id.
+
+    Retorna:
+    Iterator[tuple[int, list[GoalInfoResponse]]]: (user_id, progresso das metas), em ordem de user_id
+    """
+    sessions = shard_sessions(read_only=True)
+    if not sessions:
+        rows = _goal_progress_rows(db, user_ids, start_date, end_date, chunk_size)
+        yield from _group_goal_progress(rows)
+        return
+
+    try:
+        shards = len(sessions)
+        if user_ids is not None:
+            user_ids = set(user_ids)
+
+        streams = []
+        for shard, session in enumerate(sessions):
+            shard_user_ids = None if user_ids is None else sorted(user_id for user_id in user_ids if shard_of(user_id, shards) == shard)
+            if shard_user_ids != []:
+                streams.append(_goal_progress_rows(session, shard_user_ids, start_date, end_date, chunk_size, (shard, shards)))
+
+        # Cada shard já vem ordenado por usuário: merge mantém a ordem sem carregar os resultados
+        yield from _group_goal_progress(merge(*streams, key=attrgetter("user_id")))
+    finally:
+        for session in sessions:
+            session.close()
+
+def _goal_progress_rows(
+    db: Session,
+    user_ids: list[int] | None,
+    start_date: date | None,
+    end_date: date | None,
+    chunk_size: int,
+    shard: tuple[int, int] | None = None
+) -> Iterator:
+    # Linhas de stream_goal_progress de um banco, uma consulta a cada chunk_size IDs
+    if user_ids is None:
+        chunks = [None]
+    else:
+        user_ids = list(user_ids)
+        chunks = (user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size))
+
+    for chunk in chunks:
+        yield from crud_goals.stream_goal_progress(db, chunk, start_date=start_date, end_date=end_date, shard=shard)
+
+def _group_goal_progress(rows: Iterable) -> Iterator[tuple[int, list[GoalInfoResponse]]]:
+    # Agrupa as linhas (ordenadas por usuário) no progresso das metas de cada usuário
+    for user_id, user_rows in groupby(rows, key=attrgetter("user_id")):
+        yield user_id, [GoalMapper.to_info_response(row) for row in user_rows if row.goal_id is not None]
 
 def _get_goal_and_verify_user(
     db: Session, user_id: int, goal_id: int
@@ -133,6 +186,30 @@ def _get_goal_and_verify_user(
         
     return goal
 
+def _raise_write_error(db: Session, user_id: int, goal_id: int):
+    """
+    Chamada quando um UPDATE/DELETE não encontrou a meta do usuário:
+    descobre o motivo e levanta o erro correspondente.
+    """
+    user_exists, owner_id = crud_goals.get_goal_owner(db, user_id, goal_id)
+
+    if not user_exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail="User not found"
+        )
+
+    if owner_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail="Goal not found"
+        )
+
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Not authorized to access this goal"
+    )
+
 # --- FUNÇÃO 2: GET (Específico) ---
 def get_specific_goal(
     user_id: int, goal_id: int, db: Session
@@ -154,9 +231,6 @@ def update_specific_goal(
     db: Session
 ) -> GoalRegisterResponse:
     
-    # Usa a helper para garantir que temos permissão
-    _get_goal_and_verify_user(db, user_id, goal_id)
-    
     # Validações
     val.validate_type(goal_data.type)
 
@@ -164,17 +238,23 @@ def update_specific_goal(
     
     val.validate_value(goal_data.value)
         
-    # Chama a função de update do banco
-    crud_goals.update_goal(
-        db=db,
-        goal_id=goal_id,
-        goal_new_data=goal_data
-    )
-    
-    # Busca o objeto atualizado no banco para retornar
-    updated_goal_model = crud_goals.get_goal_by_id(
-        db, goal_id
-    )
+    # Verifica o dono e atualiza em um único UPDATE ... RETURNING
+    try:
+        updated_goal_model = crud_goals.update_goal(
+            db=db,
+            user_id=user_id,
+            goal_id=goal_id,
+            goal_new_data=goal_data
+        )
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Já existe uma meta para essa categoria.",
+        )
+    if not updated_goal_model:
+        _raise_write_error(db, user_id, goal_id)
+    dashboard_cache.invalidate_user(user_id)
     
     # Converte para DTO e retorna
     return GoalMapper.to_response(updated_goal_model)
@@ -184,11 +264,10 @@ def delete_specific_goal(
     user_id: int, goal_id: int, db: Session
 ):
     
-    # Usa a helper
-    _get_goal_and_verify_user(db, user_id, goal_id)
-    
-    # Chama a função de delete do banco
-    crud_goals.delete_goal(db, goal_id)
+    # Verifica o dono e exclui em um único DELETE ... RETURNING
+    if not crud_goals.delete_goal(db, user_id, goal_id):
+        _raise_write_error(db, user_id, goal_id)
+    dashboard_cache.invalidate_user(user_id)
     
     # Retorna uma mensagem de sucesso
-    return {"detail": "Goal successfully deleted"}
\ No newline at end of file
+    return {"detail": "Goal successfully deleted"}
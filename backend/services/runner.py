@@ -0,0 +1,25 @@
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def call_service(fn, db, async_fn=None, **kwargs):
+    """
+    Executa uma função de serviço com a sessão recebida pela rota. Usado só pelas rotas
+    que recebem AsyncSession com DB_ASYNC=true (get_import_db e get_stream_db); as demais
+    são rotas "def" que chamam o serviço diretamente.
+
+    - Session: a função síncrona roda no threadpool, como nas rotas "def"
+    - AsyncSession: usa async_fn, se houver; senão roda a função síncrona via
+      run_sync, que aguarda o I/O do banco no event loop sem ocupar uma thread
+
+    Com run_sync o código Python da função roda no próprio event loop: serve para serviços
+    que só consultam o banco e montam a resposta. Um serviço com trabalho pesado de CPU
+    (ex.: validar uma importação em lote) deve ter um async_fn que faça esse trabalho com
+    run_in_threadpool e use run_sync só nas consultas (ver import_transactions_async).
+    """
+    if isinstance(db, AsyncSession):
+        if async_fn:
+            return await async_fn(db=db, **kwargs)
+        return await db.run_sync(lambda session: fn(db=session, **kwargs))
+
+    return await run_in_threadpool(fn, db=db, **kwargs)
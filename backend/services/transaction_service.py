@@ -1,30 +1,78 @@
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import date
+from datetime import date, datetime as dt
+from itertools import islice
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
 from dateutil.relativedelta import relativedelta
 
 from database import transactions as crud_transaction
 from database import users as crud_user
-from database.schemas import TransactionCreate
+from database.schemas import TransactionCreate, TransactionData
 from dto.transactions_dto import (
+    TransactionBulkError,
+    TransactionBulkResponse,
     TransactionRegisterResponse,
-    TransactionsListResponse,
 )
-from dto.info_dto import TransactionInfoResponse
-from utils.validators import validate_date_ISO_format
+from dto.info_dto import TransactionInfoResponse, TransactionSeriesByCategory, TransactionSeriesResponse
 
 from adapter.transactions_adapter import TransactionAdapter
 from mapper.transactions_mapper import TransactionMapper
 
-from utils.validators import (
-    FieldValidator as val,
-    validate_date_ISO_format
-)
+from utils.cache import dashboard_cache
+from utils.pagination import decode_cursor, decode_offset_cursor
+from utils.validators import validate_transaction
 
 def create_new_transaction(
     user_id: int, transaction_data: TransactionCreate, db: Session
 ) -> TransactionRegisterResponse:
-    # Valida o usuário
+    # Validações (a data volta convertida para o CRUD)
+    transaction_data = validate_transaction(transaction_data)
+
+    # Chama o crud de transação (só insere se o usuário existir)
+    transaction_model = crud_transaction.create_transaction_db(
+        db, user_id, transaction_data
+    )
+    if not transaction_model:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Usuário não cadastrado.",
+        )
+    dashboard_cache.invalidate_user(user_id)
+
+    # Converte para o DTO de resposta
+    return TransactionMapper.to_response(transaction_model)
+
+
+def _validate_bulk_rows(rows: list) -> tuple[list[TransactionData], list[TransactionBulkError]]:
+    # Aplica as mesmas validações da criação individual, guardando o erro de cada linha (numeradas a partir de 1).
+    # Só CPU, sem banco: no modo assíncrono roda no threadpool (ver import_transactions_async)
+    valid_transactions = []
+    errors = []
+    now = dt.now()
+    for row, raw_transaction in enumerate(rows, start=1):
+        try:
+            transaction_data = validate_transaction(TransactionCreate.model_validate(raw_transaction), now)
+        except HTTPException as e:
+            errors.append(TransactionBulkError(row=row, detail=e.detail))
+            continue
+        except ValidationError as e:
+            errors.append(TransactionBulkError(row=row, detail="; ".join(
+                f"{'.'.join(str(loc) for loc in error['loc']) or 'row'}: {error['msg']}" for error in e.errors()
+            )))
+            continue
+
+        valid_transactions.append(transaction_data)
+
+    return valid_transactions, errors
+
+
+def import_transactions(
+    user_id: int, rows: list, db: Session
+) -> TransactionBulkResponse:
+    # Valida o usuário uma única vez para todo o lote
     user = crud_user.get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(
@@ -32,23 +80,42 @@ def create_new_transaction(
             detail="Usuário não cadastrado.",
         )
 
-    # Validações
-    val.validate_type(transaction_data.type)
+    valid_transactions, errors = _validate_bulk_rows(rows)
 
-    val.validate_category(transaction_data.category, transaction_data.type)
-    
-    val.validate_value(transaction_data.value)
+    # Insere as linhas válidas em lotes
+    inserted = crud_transaction.create_transactions_bulk(db, user.user_id, valid_transactions)
+    dashboard_cache.invalidate_user(user.user_id)
 
-    validate_date_ISO_format(transaction_data.date)
+    return TransactionBulkResponse(inserted=inserted, errors=errors)
 
-    # Chama o crud de transação
-    transaction_model = crud_transaction.create_transaction_db(
-        db, user.user_id, transaction_data
-    )
 
-    # Converte para o DTO de resposta
-    return TransactionMapper.to_response(transaction_model)
+async def import_transactions_async(
+    user_id: int, rows: list, db: AsyncSession
+) -> TransactionBulkResponse:
+    # Versão de import_transactions para AsyncSession (DB_ASYNC=true): só as consultas usam run_sync;
+    # a validação das linhas vai para o threadpool em vez de ocupar o event loop
+    user = await db.run_sync(crud_user.get_user_by_id, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Usuário não cadastrado.",
+        )
 
+    valid_transactions, errors = await run_in_threadpool(_validate_bulk_rows, rows)
+
+    inserted = await db.run_sync(crud_transaction.create_transactions_bulk, user.user_id, valid_transactions)
+    dashboard_cache.invalidate_user(user.user_id)
+
+    return TransactionBulkResponse(inserted=inserted, errors=errors)
+
+
+def _page_position(after: str | None, search: str | None) -> tuple[tuple[date, int] | None, int | None]:
+    # Listagem comum: cursor (data, id) da última transação; busca (ordenada por relevância): posição
+    if not after:
+        return None, None
+    if search is not None:
+        return None, decode_offset_cursor(after)
+    return decode_cursor(after), None
 
 def get_transactions_by_user(
     user_id: int,
@@ -56,8 +123,11 @@ def get_transactions_by_user(
     transaction_type: str | None = None,
     transaction_category: str | None = None,
     start_date: date | None = None,
-    end_date: date | None = None
-) -> list[TransactionsListResponse]:
+    end_date: date | None = None,
+    after: str | None = None,
+    limit: int | None = None,
+    search: str | None = None
+) -> list[dict]:
     # Valida o usuário
     user = crud_user.get_user_by_id(db, user_id)
     if not user:
@@ -67,17 +137,124 @@ def get_transactions_by_user(
         )
 
     # Busca as transações
+    cursor, offset = _page_position(after, search)
     adapter = TransactionAdapter(db)
     transactions_list = adapter.get_transactions(user_id=user_id,
                                                  transaction_type=transaction_type,
                                                  transaction_category=transaction_category,
                                                  start_date=start_date,
-                                                 end_date=end_date)
+                                                 end_date=end_date,
+                                                 after=cursor,
+                                                 limit=limit,
+                                                 search=search,
+                                                 offset=offset)
+
+    # Linhas já no formato de TransactionsListResponse, serializadas direto pelo orjson
+    return TransactionMapper.to_list_rows(transactions_list)
 
-    # Converte para a lista de DTOs de resposta
-    return TransactionMapper.to_list_response(transactions_list)
 
+def _ndjson_chunks(transactions: Iterable) -> Iterator[bytes]:
+    # Um bloco por lote lido do banco: o StreamingResponse faz uma ida ao threadpool por bloco, e não por linha
+    transactions = iter(transactions)
+    while batch := list(islice(transactions, crud_transaction.STREAM_BATCH_SIZE)):
+        yield TransactionMapper.to_ndjson_chunk(batch)
 
+
+async def _ndjson_chunks_async(transactions: AsyncIterable) -> AsyncIterator[bytes]:
+    # Versão de _ndjson_chunks para o stream assíncrono: um envio por lote, e não por linha
+    batch = []
+    async for transaction in transactions:
+        batch.append(transaction)
+        if len(batch) == crud_transaction.STREAM_BATCH_SIZE:
+            yield TransactionMapper.to_ndjson_chunk(batch)
+            batch = []
+    if batch:
+        yield TransactionMapper.to_ndjson_chunk(batch)
+
+
+def stream_transactions_by_user(
+    user_id: int,
+    db: Session,
+    transaction_type: str | None = None,
+    transaction_category: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    after: str | None = None,
+    limit: int | None = None,
+    search: str | None = None
+) -> Iterator[bytes]:
+    # Valida o usuário antes de começar a resposta
+    user = crud_user.get_user_by_id(db, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuário com ID {user_id} não encontrado.",
+        )
+
+    cursor, offset = _page_position(after, search)
+
+    # As linhas são lidas e convertidas em lotes, conforme a resposta é enviada (NDJSON)
+    def ndjson_lines():
+        try:
+            adapter = TransactionAdapter(db)
+            transactions = adapter.stream_transactions(user_id=user_id,
+                                                       transaction_type=transaction_type,
+                                                       transaction_category=transaction_category,
+                                                       start_date=start_date,
+                                                       end_date=end_date,
+                                                       after=cursor,
+                                                       limit=limit,
+                                                       search=search,
+                                                       offset=offset)
+            yield from _ndjson_chunks(transactions)
+        finally:
+            db.close()
+
+    return ndjson_lines()
+
+
+async def stream_transactions_by_user_async(
+    user_id: int,
+    db: AsyncSession,
+    transaction_type: str | None = None,
+    transaction_category: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    after: str | None = None,
+    limit: int | None = None,
+    search: str | None = None
+) -> AsyncIterator[bytes]:
+    # Versão de stream_transactions_by_user para AsyncSession (DB_ASYNC=true)
+    user = await db.run_sync(crud_user.get_user_by_id, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuário com ID {user_id} não encontrado.",
+        )
+
+    cursor, offset = _page_position(after, search)
+
+    async def ndjson_lines():
+        try:
+            adapter = TransactionAdapter(db)
+            transactions = adapter.astream_transactions(user_id=user_id,
+                                                        transaction_type=transaction_type,
+                                                        transaction_category=transaction_category,
+                                                        start_date=start_date,
+                                                        end_date=end_date,
+                                                        after=cursor,
+                                                        limit=limit,
+                                                        search=search,
+                                                        offset=offset)
+            async for chunk in _ndjson_chunks_async(transactions):
+                yield chunk
+        finally:
+            await db.close()
+
+    return ndjson_lines()
+
+
+@dashboard_cache.cached("transactions_info", TransactionInfoResponse)
 def get_transactions_info(
     user_id: int,
     db: Session,
@@ -104,77 +281,158 @@ def get_transactions_info(
         { "transaction_category": transaction_category, "transaction_value": transaction_value} for transaction_category, transaction_value in expenseDict.items()
     ]
     
-    start_date = end_date - relativedelta(months=11)
+    # Sem end_date, os 12 meses terminam no mês atual
+    start_date = (end_date or date.today()) - relativedelta(months=11)
     start_date = start_date.replace(day=1)
+    last_date = (start_date + relativedelta(months=12)) - relativedelta(days=1)
+
+    # Uma única consulta agrupada por mês; meses sem transações são preenchidos com zero
+    months_sum = crud_transaction.get_transaction_sum_by_month(db=db,
+                                                               user_id=user.user_id,
+                                                               start_date=start_date,
+                                                               end_date=last_date)
 
     transactions_list = []
     for i in range(12):
         lower = start_date + relativedelta(months=i)
-        upper = (start_date + relativedelta(months=i+1)) - relativedelta(days=1)
+        month_transactions = months_sum.get(lower.strftime("%Y-%m"), {})
 
-        month_transactions = crud_transaction.get_transaction_sum(db=db,
-                                                                   user_id=user.user_id,
-                                                                   start_date=lower,
-                                                                   end_date=upper)
-        
         transactions_list.append({ "transaction_month": months[lower.month-1],
-                                  "month_income": month_transactions["Receita"],
-                                  "month_expense": month_transactions["Despesa"]})
+                                  "month_income": month_transactions.get("Receita", 0),
+                                  "month_expense": month_transactions.get("Despesa", 0)})
 
     return TransactionInfoResponse(lastYearTransactions=transactions_list,
                                    incomeList=incomeList,
                                    expenseList=expenseList)
 
-def _get_transaction_and_verify_user(db: Session, user_id: int, transaction_id: int):
-    """
-    Busca o usuário, busca a transação,
-    e verifica se a transação pertence ao usuário.
-    Retorna o modelo da transação se tudo estiver OK.
-    """
-    # 1. Verifica se o usuário existe
+# Duração de cada período da série e quantos períodos mostrar quando start_date não é informado
+SERIES_STEP = {
+    "day": relativedelta(days=1),
+    "week": relativedelta(weeks=1),
+    "month": relativedelta(months=1),
+    "quarter": relativedelta(months=3),
+    "year": relativedelta(years=1),
+}
+SERIES_DEFAULT_PERIODS = {"day": 30, "week": 12, "month": 12, "quarter": 8, "year": 10}
+# Limite de pontos por série (ex.: pouco mais de 2 anos de dias)
+SERIES_MAX_PERIODS = 1000
+
+def _period_start(day: date, granularity: str) -> date:
+    # Mesmo início de período calculado no banco por database.transactions.PERIOD_START
+    if granularity == "week":
+        return day - relativedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "quarter":
+        return day.replace(month=day.month - (day.month - 1) % 3, day=1)
+    if granularity == "year":
+        return day.replace(month=1, day=1)
+    return day
+
+def get_transactions_series(
+    user_id: int,
+    db: Session,
+    granularity: str = "month",
+    start_date: date | None = None,
+    end_date: date | None = None,
+    by_category: bool = False
+) -> TransactionSeriesResponse:
     user = crud_user.get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuário com ID {user_id} não encontrado.",
         )
 
-    # 2. Busca a transação
-    transaction = crud_transaction.get_transaction_by_id(db, transaction_id)
-    if not transaction:
+    # Sem datas: os últimos SERIES_DEFAULT_PERIODS períodos completos até hoje
+    step = SERIES_STEP[granularity]
+    if end_date is None:
+        end_date = _period_start(date.today(), granularity) + step - relativedelta(days=1)
+    if start_date is None:
+        start_date = _period_start(end_date, granularity) - step * (SERIES_DEFAULT_PERIODS[granularity] - 1)
+
+    if start_date > end_date:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A data inicial deve ser anterior à data final.",
+        )
+
+    periods = []
+    period = _period_start(start_date, granularity)
+    while period <= end_date:
+        periods.append(period)
+        if len(periods) > SERIES_MAX_PERIODS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"A série teria mais de {SERIES_MAX_PERIODS} períodos; use uma granularidade maior ou um período menor.",
+            )
+        period += step
+
+    # Uma única consulta agrupada; os períodos sem transações ficam com zero
+    rows = crud_transaction.get_transaction_series(db, user.user_id, granularity, start_date, end_date, by_category)
+
+    position = {period.isoformat(): i for i, period in enumerate(periods)}
+    totals = {"Receita": [0] * len(periods), "Despesa": [0] * len(periods)}
+    categories = {}
+    for period, transaction_type, *category, transaction_value in rows:
+        i = position[period]
+        totals.setdefault(transaction_type, [0] * len(periods))[i] += transaction_value
+        if by_category:
+            categories.setdefault((transaction_type, category[0]), [0] * len(periods))[i] = transaction_value
+
+    return TransactionSeriesResponse(
+        granularity=granularity,
+        periods=periods,
+        income=[round(value, 2) for value in totals["Receita"]],
+        expense=[round(value, 2) for value in totals["Despesa"]],
+        categories=[
+            TransactionSeriesByCategory(transaction_type=transaction_type, transaction_category=transaction_category, values=values)
+            for (transaction_type, transaction_category), values in sorted(categories.items())
+        ],
+    )
+
+def _raise_write_error(db: Session, user_id: int, transaction_id: int):
+    """
+    Chamada quando um UPDATE/DELETE não encontrou a transação do usuário:
+    descobre o motivo e levanta o erro correspondente.
+    """
+    user_exists, owner_id = crud_transaction.get_transaction_owner(db, user_id, transaction_id)
+
+    # 1. Verifica se o usuário existe
+    if not user_exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
-    # 3. VERIFICAÇÃO DE SEGURANÇA CRUCIAL
-    if transaction.user_id != user_id:
+    # 2. Verifica se a transação existe
+    if owner_id is None:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this transaction",
+            status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found"
         )
 
-    return transaction
+    # 3. A transação existe, mas pertence a outro usuário
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Not authorized to access this transaction",
+    )
 
 
 # --- FUNÇÃO 2: GET (Específico) ---
 def get_specific_transaction(
     user_id: int, transaction_id: int, db: Session
 ) -> TransactionRegisterResponse:
-    # Usa a função helper para buscar e verificar a transação
-    # 1. Verifica se o usuário existe
+    # Busca só a transação pedida (chave primária + dono)
+    adapter = TransactionAdapter(db)
+    transaction = adapter.get_transaction(user_id, transaction_id)
+    if transaction:
+        return TransactionMapper.to_list_item(transaction)
+
+    # Não encontrada: verifica se o usuário existe para escolher a mensagem
     user = crud_user.get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-
-    # Busca as transações
-    adapter = TransactionAdapter(db)
-    transactions_list = adapter.get_transactions(user_id)
-
-    transactions = TransactionMapper.to_list_response(transactions_list)
-    for t in transactions:
-        if t.transaction_id == transaction_id:
-            return t
     
     raise HTTPException(status_code=404, detail="Transação Não Encontrada.")
 
@@ -183,28 +441,18 @@ def get_specific_transaction(
 def update_specific_transaction(
     user_id: int, transaction_id: int, transaction_data: TransactionCreate, db: Session
 ) -> TransactionRegisterResponse:
-    # Usa a helper para garantir que temos permissão
-    _get_transaction_and_verify_user(db, user_id, transaction_id)
-    
-    val.validate_type(transaction_data.type)
+    transaction_data = validate_transaction(transaction_data)
 
-    val.validate_category(transaction_data.category, transaction_data.type)
-    
-    val.validate_value(transaction_data.value)
-        
-    validate_date_ISO_format(transaction_data.date)
-
-    # Chama a função de update do banco
-    crud_transaction.update_transaction(
+    # Verifica o dono e atualiza em um único UPDATE ... RETURNING
+    updated_transaction_model = crud_transaction.update_transaction(
         db=db,
+        user_id=user_id,
         transaction_id=transaction_id,
         transaction_new_data=transaction_data
     )
-
-    # Busca o objeto atualizado no banco para retornar
-    updated_transaction_model = crud_transaction.get_transaction_by_id(
-        db, transaction_id
-    )
+    if not updated_transaction_model:
+        _raise_write_error(db, user_id, transaction_id)
+    dashboard_cache.invalidate_user(user_id)
 
     # Converte para DTO e retorna
     return TransactionMapper.to_response(updated_transaction_model)
@@ -212,11 +460,10 @@ def update_specific_transaction(
 
 # --- FUNÇÃO 4: DELETE (Excluir) ---
 def delete_specific_transaction(user_id: int, transaction_id: int, db: Session):
-    # Usa a helper
-    _get_transaction_and_verify_user(db, user_id, transaction_id)
-
-    # Chama a função de delete do banco
-    crud_transaction.delete_transaction(db, transaction_id)
+    # Verifica o dono e exclui em um único DELETE ... RETURNING
+    if not crud_transaction.delete_transaction(db, user_id, transaction_id):
+        _raise_write_error(db, user_id, transaction_id)
+    dashboard_cache.invalidate_user(user_id)
 
     # Retorna uma mensagem de sucesso
     return {"detail": "Transaction successfully deleted"}
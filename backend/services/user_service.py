@@ -4,7 +4,7 @@ from datetime import date
 
 from database import users as crud_user
 from database import transactions as crud_transaction
-from database import goals as crud_goal
+from database.types import from_cents, to_cents
 
 from database.schemas import UserCreate
 from dto.user_dto import UserLogin, UserRegisterResponse, UserResponse
@@ -15,7 +15,8 @@ from utils.validators import (
     validate_unique_email,
     PasswordValidator as pv
 )
-from utils.password_hash import get_password_hash, verify_password
+from utils.cache import dashboard_cache
+from utils.password_hash import get_password_hash, verify_and_update_password
 
 def create_new_user(user_data: UserCreate, db: Session) -> UserRegisterResponse:
     if not user_data.name:
@@ -50,11 +51,16 @@ def authenticate_user(user_data: UserLogin, db: Session):
         )
         
     # Verifica se a senha está correta
-    if not verify_password(user_data.password, db_user.user_hashed_password):
+    verified, new_hash = verify_and_update_password(user_data.password, db_user.user_hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect password"
         )
+
+    # Refaz o hash se o custo do bcrypt (BCRYPT_ROUNDS) mudou desde o cadastro
+    if new_hash:
+        crud_user.update_user_password(db, db_user.user_id, new_hash)
         
     # Retorna o objeto do usuário se tudo estiver OK
     return db_user
@@ -74,33 +80,36 @@ def get_user(user_id: int, db: Session) -> UserResponse:
     # Retorna o usuário
     return UserMapper.to_response(db_user)
 
+@dashboard_cache.cached("user_info", UserInfoResponse)
 def get_user_info(user_id: int, db: Session, start_date: date | None = None, end_date: date | None = None) -> UserInfoResponse:
-    db_user = crud_user.get_user_by_id(db, user_id=user_id)
+    # Usuário, totais, categorias e metas vêm de uma única consulta
+    summary = crud_transaction.get_user_summary(db, user_id, start_date, end_date)
 
-    if not db_user:
+    if not summary["user_exists"]:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    userTransactions = crud_transaction.get_transaction_sum(db, user_id, start_date, end_date)
+    userTransactions = summary["totals"]
     financialData = {
         "totalIncome": userTransactions["Receita"],
         "totalExpense": userTransactions["Despesa"],
-        "currentBalance": userTransactions["Receita"] - userTransactions["Despesa"],
+        # Subtração em centavos: os totais já são exatos e o saldo não acumula erro do float
+        "currentBalance": from_cents(to_cents(userTransactions["Receita"]) - to_cents(userTransactions["Despesa"])),
     }
 
-    userGoals = crud_goal.get_general_goals(db, user_id)
+    userGoals = summary["goals"]
     generalGoals = [
         { "goal_type": goal_type, "goal_value": goal_value} for goal_type, goal_value in userGoals.items()
     ]
 
-    incomeDict = crud_transaction.get_transaction_agregate(db, user_id, "Receita", start_date, end_date)
+    incomeDict = summary["by_category"]["Receita"]
     incomeList = [
         { "transaction_category": transaction_category, "transaction_value": transaction_value} for transaction_category, transaction_value in incomeDict.items()
     ]
 
-    expenseDict = crud_transaction.get_transaction_agregate(db, user_id, "Despesa", start_date, end_date)
+    expenseDict = summary["by_category"]["Despesa"]
     expenseList = [
         { "transaction_category": transaction_category, "transaction_value": transaction_value} for transaction_category, transaction_value in expenseDict.items()
     ]
@@ -1,9 +1,10 @@
 import pytest
 from fastapi.testclient import TestClient
-from main import app, get_db
+from main import app, get_db, get_read_db
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
-from database.config import Base
+from database.config import Base, get_import_db, get_stream_db
+from utils.cache import dashboard_cache
 
 DATABASE_URL = 'sqlite:///./test/test.db'
 engine = create_engine(DATABASE_URL, connect_args={'check_same_thread': False})
@@ -30,6 +31,8 @@ def test_db_session():
     try:
         for table in reversed(Base.metadata.sorted_tables):
             db.execute(text(f'DELETE FROM {table.name}'))
+        # Os IDs são reaproveitados entre testes, então os resumos em cache também são descartados
+        dashboard_cache.clear()
         yield db
     finally:
         db.close()
@@ -44,5 +47,8 @@ def test_client(test_db_session):
         yield test_db_session
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_import_db] = override_get_db
+    app.dependency_overrides[get_stream_db] = override_get_db
     yield TestClient(app)
     app.dependency_overrides.clear()
\ No newline at end of file
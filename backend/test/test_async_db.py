@@ -0,0 +1,129 @@
+import pytest
+from contextlib import asynccontextmanager
+from fastapi import Request
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database.config import create_async_db_engine, get_import_db, get_stream_db
+from main import app, get_db, get_read_db
+
+DATABASE_URL = 'sqlite:///./test/test.db'
+
+@asynccontextmanager
+async def no_lifespan(app):
+    yield
+
+@pytest.fixture(scope='function')
+def async_client(test_db_session, monkeypatch):
+    '''
+    Sobrescreve as dependências do banco como no modo DB_ASYNC=true: AsyncSession só na importação
+    em lote e na listagem de transações, Session nas demais rotas
+    '''
+    # O with abaixo mantém um único event loop para a engine assíncrona; sem o lifespan do app,
+    # que aplicaria as migrações e aqueceria os pools no banco real (database/transactions.db)
+    monkeypatch.setattr(app.router, "lifespan_context", no_lifespan)
+
+    # Libera a limpeza feita pela sessão síncrona para a conexão assíncrona poder escrever
+    test_db_session.commit()
+
+    async_engine = create_async_db_engine(DATABASE_URL)
+    AsyncTestSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    def override_get_db():
+        yield test_db_session
+
+    # Rotas que receberam uma AsyncSession
+    async_paths = []
+    async def override_get_async_db(request: Request):
+        async with AsyncTestSessionLocal() as db:
+            async_paths.append(request.url.path)
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_import_db] = override_get_async_db
+    app.dependency_overrides[get_stream_db] = override_get_async_db
+    with TestClient(app) as client:
+        client.async_paths = async_paths
+        yield client
+    app.dependency_overrides.clear()
+    async_engine.sync_engine.dispose()
+
+@pytest.fixture(scope='function')
+def mock_user(async_client):
+    '''
+    Cria um usuário dublê (rota síncrona)
+    '''
+    response = async_client.post(
+        "/users",
+        json={"name": "Fulano Testador", "email": "emailasync@gmail.com", "password": "Senha@Forte123"}
+    )
+    assert response.status_code == 201
+    return response.json()
+
+def test_async_transaction_flow(async_client, mock_user):
+    '''
+    Testa criação, listagem (JSON e NDJSON), resumo e remoção de transações com DB_ASYNC=true:
+    só a listagem usa a AsyncSession
+    '''
+    user_id = mock_user["user"]["id"]
+
+    for date, value in [("2025-04-20", 100), ("2025-04-21", 50)]:
+        response = async_client.post(
+            f"/{user_id}/transactions",
+            json={"date": date, "value": value, "type": "Despesa", "category": "Moradia", "description": ""}
+        )
+        assert response.status_code == 201
+
+    transactions = async_client.get(f"/{user_id}/transactions").json()
+    assert [t["transaction_value"] for t in transactions] == [100, 50]
+
+    response = async_client.get(f"/{user_id}/transactions", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.text.count("\n") == 2
+
+    response = async_client.get(
+        f"/{user_id}/transactions/info",
+        params={"start_date": "2025-01-01", "end_date": "2025-12-31"}
+    )
+    assert response.status_code == 200
+
+    response = async_client.delete(f"/{user_id}/transactions/{transactions[0]["transaction_id"]}")
+    assert response.status_code == 200
+    assert len(async_client.get(f"/{user_id}/transactions").json()) == 1
+
+    assert async_client.async_paths == [f"/{user_id}/transactions/"] * 3
+
+def test_async_unregistered_user(async_client):
+    '''
+    Testa se os erros HTTP dos serviços também são devolvidos no modo assíncrono
+    '''
+    response = async_client.get("/999999/transactions", params={"format": "ndjson"})
+    assert response.status_code == 404
+
+def test_async_bulk_validation_off_event_loop(async_client, mock_user, monkeypatch):
+    '''
+    Testa se, no modo assíncrono, a validação da importação em lote roda fora do event loop
+    '''
+    import asyncio
+    from services import transaction_service
+
+    validate = transaction_service._validate_bulk_rows
+    loops = []
+    def validate_and_record(rows):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return validate(rows)
+    monkeypatch.setattr(transaction_service, "_validate_bulk_rows", validate_and_record)
+
+    response = async_client.post(
+        f"/{mock_user["user"]["id"]}/transactions/bulk",
+        json=[{"date": "2025-04-20", "value": 10, "type": "Despesa", "category": "Moradia"},
+              {"date": "2025-04-21", "value": -1, "type": "Despesa", "category": "Moradia"}]
+    )
+    assert response.status_code == 201
+    assert response.json()["inserted"] == 1
+    assert loops == [None]
+    assert async_client.async_paths == [f"/{mock_user["user"]["id"]}/transactions/bulk"]
@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+from bench.compare import compare
+from bench.generator import generate_transactions, to_payload
+from bench.run import percentile
+from database.schemas import TransactionCreate
+from utils.validators import FieldValidator
+
+def test_generator_is_valid_and_deterministic():
+    '''
+    Testa se o gerador produz sempre as mesmas transações para a mesma semente, todas aceitas pela API
+    '''
+    end_date = date(2025, 6, 30)
+    transactions = list(generate_transactions(2000, seed=7, end_date=end_date, days=365))
+
+    assert transactions == list(generate_transactions(2000, seed=7, end_date=end_date, days=365))
+    assert transactions != list(generate_transactions(2000, seed=8, end_date=end_date, days=365))
+
+    for transaction in transactions:
+        FieldValidator.validate_type(transaction["transaction_type"])
+        FieldValidator.validate_category(transaction["transaction_category"], transaction["transaction_type"])
+        FieldValidator.validate_value(transaction["transaction_value"])
+        assert end_date - timedelta(days=364) <= transaction["transaction_date"] <= end_date
+        TransactionCreate(**to_payload(transaction))
+
+    # Todas as categorias aparecem e as despesas são a maioria
+    categories = {(t["transaction_type"], t["transaction_category"]) for t in transactions}
+    assert categories == {(transaction_type, category)
+                          for transaction_type, valid in FieldValidator.VALID_CATEGORIES.items()
+                          for category in valid}
+    assert sum(t["transaction_type"] == "Despesa" for t in transactions) > len(transactions) / 2
+
+def test_percentiles_and_regressions():
+    '''
+    Testa o cálculo dos percentis e a detecção de piora entre dois resultados
+    '''
+    latencies = [float(value) for value in range(1, 101)]
+    assert percentile(latencies, 50) == 50.5
+    assert 99 < percentile(latencies, 99) <= 100
+    assert percentile([3.0], 95) == 3.0
+
+    before = {("list", 1000): {"p95_ms": 10.0}, ("info", 1000): {"p95_ms": 10.0}, ("old", 1000): {"p95_ms": 1.0}}
+    after = {("list", 1000): {"p95_ms": 10.5}, ("info", 1000): {"p95_ms": 12.0}}
+    rows = compare(before, after, "p95_ms", 0.10)
+    assert [(row[0], row[-1]) for row in rows] == [("info", True), ("list", False)]
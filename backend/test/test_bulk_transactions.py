@@ -0,0 +1,168 @@
+import pytest
+
+@pytest.fixture(scope='function')
+def mock_user(test_client):
+    '''
+    Cria um usuário dublê para realizar testes de importação em lote
+    '''
+    response = test_client.post(
+        "/users",
+        json={"name": "Fulano Testador", "email": "emaillote@gmail.com", "password": "Senha@Forte123"}
+    )
+    return response.json()
+
+def test_bulk_json_with_row_errors(test_client, mock_user):
+    '''
+    Testa se a importação em JSON insere as linhas válidas e devolve o erro de cada linha inválida
+    '''
+    response = test_client.post(
+        f"/{mock_user["user"]["id"]}/transactions/bulk",
+        json=[
+            {"date": "2025-04-20", "value": 201, "type": "Despesa", "category": "Moradia", "description": "Aluguel"},
+            {"date": "2025-04-21", "value": -5, "type": "Despesa", "category": "Moradia"},
+            {"date": "2025-04-22", "value": 50, "type": "Receita", "category": "Moradia"},
+            {"date": "20/04/2025", "value": 50, "type": "Receita", "category": "Salário"},
+            {"value": 50, "type": "Receita", "category": "Salário"},
+            {"date": "2025-04-23", "value": 3000, "type": "Receita", "category": "Salário"},
+            {"date": 4102444800, "value": 50, "type": "Receita", "category": "Salário"},
+        ]
+    )
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["inserted"] == 2
+    assert [error["row"] for error in data["errors"]] == [2, 3, 4, 5, 7]
+    assert data["errors"][0]["detail"] == "Valor informado é inválido. Informe um valor maior ou igual a zero."
+    assert data["errors"][4]["detail"].startswith("date: ")
+
+    transactions = test_client.get(f"/{mock_user["user"]["id"]}/transactions").json()
+    assert sorted(t["transaction_value"] for t in transactions) == [201, 3000]
+
+def test_bulk_csv_file(test_client, mock_user):
+    '''
+    Testa a importação de um arquivo CSV
+    '''
+    content = (
+        "date,value,type,category,description\n"
+        "2025-04-20,201.5,Despesa,Alimentação,Mercado\n"
+        "2025-04-21,3000,Receita,Salário,\n"
+    )
+
+    response = test_client.post(
+        f"/{mock_user["user"]["id"]}/transactions/bulk",
+        files={"file": ("extrato.csv", content.encode("utf-8"), "text/csv")}
+    )
+
+    assert response.status_code == 201
+    assert response.json() == {"inserted": 2, "errors": []}
+
+def test_bulk_ofx_file(test_client, mock_user):
+    '''
+    Testa a importação de um extrato OFX, usando o sinal do valor para definir o tipo
+    '''
+    content = (
+        "OFXHEADER:100\n"
+        "<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n"
+        "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250420120000[-3:BRT]<TRNAMT>-42.90<MEMO>Uber</STMTTRN>\n"
+        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250421<TRNAMT>1500.00<MEMO>Pix recebido</STMTTRN>\n"
+        "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+    )
+
+    response = test_client.post(
+        f"/{mock_user["user"]["id"]}/transactions/bulk",
+        files={"file": ("extrato.ofx", content.encode("latin-1"), "application/x-ofx")}
+    )
+
+    assert response.status_code == 201
+    assert response.json() == {"inserted": 2, "errors": []}
+
+    transactions = test_client.get(f"/{mock_user["user"]["id"]}/transactions").json()
+    assert {(t["transaction_type"], t["transaction_value"], t["transaction_description"]) for t in transactions} == {
+        ("Despesa", 42.90, "Uber"),
+        ("Receita", 1500.00, "Pix recebido"),
+    }
+
+def test_bulk_unregistered_user(test_client, mock_user):
+    '''
+    Testa se a importação em lote recusa um usuário não cadastrado
+    '''
+    response = test_client.post(
+        f"/{mock_user["user"]["id"]+999}/transactions/bulk",
+        json=[{"date": "2025-04-20", "value": 10, "type": "Despesa", "category": "Moradia"}]
+    )
+
+    assert response.status_code == 403
+    assert response.json() == {"detail": "Usuário não cadastrado."}
+
+def test_bulk_csv_not_utf8(test_client, mock_user):
+    '''
+    Testa se um CSV em outra codificação é recusado com 400, e não com um erro interno
+    '''
+    content = "date,value,type,category,description\n2025-04-20,10,Despesa,Alimentação,Padaria São João\n"
+
+    response = test_client.post(
+        f"/{mock_user["user"]["id"]}/transactions/bulk",
+        files={"file": ("extrato.csv", content.encode("latin-1"), "text/csv")}
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("O arquivo CSV deve estar codificado em UTF-8")
+
+def test_bulk_limits(test_client, mock_user, monkeypatch):
+    '''
+    Testa os limites da importação: corpo ou arquivo grande demais (413) e transações demais (400)
+    '''
+    from utils.settings import get_settings
+
+    monkeypatch.setattr(get_settings(), "bulk_max_bytes", 300)
+    monkeypatch.setattr(get_settings(), "bulk_max_rows", 2)
+    url = f"/{mock_user["user"]["id"]}/transactions/bulk"
+    row = {"date": "2025-04-20", "value": 10, "type": "Despesa", "category": "Moradia"}
+
+    response = test_client.post(url, json=[row] * 3)
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Envie no máximo 2 transações por importação."}
+
+    response = test_client.post(url, json=[dict(row, description="x" * 300)])
+    assert response.status_code == 413
+
+    content = "date,value,type,category,description\n" + "2025-04-20,10,Despesa,Moradia,Aluguel\n" * 10
+    response = test_client.post(url, files={"file": ("extrato.csv", content.encode("utf-8"), "text/csv")})
+    assert response.status_code == 413
+
+    assert test_client.post(url, json=[row] * 2).json() == {"inserted": 2, "errors": []}
+
+def test_bulk_chunked_upload_limit(test_client, mock_user, monkeypatch):
+    '''
+    Testa se um arquivo enviado sem Content-Length (chunked) também para no limite de tamanho
+    '''
+    from utils.settings import get_settings
+
+    monkeypatch.setattr(get_settings(), "bulk_max_bytes", 300)
+    content = (
+        b"--limite\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="extrato.csv"\r\n'
+        b"Content-Type: text/csv\r\n\r\n"
+        b"date,value,type,category,description\n" + b"2025-04-20,10,Despesa,Moradia,Aluguel\n" * 20 +
+        b"\r\n--limite--\r\n"
+    )
+
+    def chunks(size=64):
+        for start in range(0, len(content), size):
+            yield content[start:start + size]
+
+    response = test_client.post(
+        f"/{mock_user["user"]["id"]}/transactions/bulk",
+        content=chunks(),
+        headers={"Content-Type": "multipart/form-data; boundary=limite"}
+    )
+    assert response.status_code == 413
+
+    # Abaixo do limite o mesmo envio é aceito
+    monkeypatch.setattr(get_settings(), "bulk_max_bytes", len(content))
+    response = test_client.post(
+        f"/{mock_user["user"]["id"]}/transactions/bulk",
+        content=chunks(),
+        headers={"Content-Type": "multipart/form-data; boundary=limite"}
+    )
+    assert response.json() == {"inserted": 20, "errors": []}
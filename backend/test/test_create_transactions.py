@@ -255,6 +255,24 @@ def test_future_date(test_client, mock_user):
     assert response.json() == {"detail": "A data informada é no futuro. Informe uma data até o dia atual."}
 
 
+def test_numeric_date(test_client, mock_user):
+    '''
+    Testa se o sistema recusa uma data numérica (timestamp), em vez de convertê-la sem as validações de data
+    '''
+    response = test_client.post(
+        f"/{mock_user["user"]["id"]}/transactions",
+        json={
+            "date": 4102444800,
+            "value": 400,
+            "type": "Despesa",
+            "category": "Entretenimento",
+            "description": "Almoço"
+        }
+)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "date"]
+
+
 ################### 	TESTES GERAIS 	 	 ###################
 
 def test_create_multiple_transactions(test_client, mock_user):
@@ -0,0 +1,159 @@
+import pytest
+
+from utils.cache import MemoryCache
+
+@pytest.fixture(scope='function')
+def mock_users(test_client):
+    '''
+    Cria dois usuários dublês para os testes do cache
+    '''
+    users = []
+    for email in ["emailcache1@gmail.com", "emailcache2@gmail.com"]:
+        response = test_client.post(
+            "/users",
+            json={"name": "Fulano Testador", "email": email, "password": "Senha@Forte123"}
+        )
+        users.append(response.json()["user"]["id"])
+    return users
+
+def post_transaction(test_client, user_id, value):
+    return test_client.post(
+        f"/{user_id}/transactions",
+        json={"date": "2025-04-20", "value": value, "type": "Despesa", "category": "Moradia", "description": ""}
+    ).json()
+
+def get_info(test_client, user_id):
+    return test_client.get(
+        f"/users/{user_id}/info",
+        params={"start_date": "2025-01-01", "end_date": "2025-12-31"}
+    ).json()
+
+def test_cache_hits_and_invalidation(test_client, mock_users):
+    '''
+    Testa se o resumo é servido do cache e descartado apenas para o usuário que teve escrita
+    '''
+    first, second = mock_users
+    post_transaction(test_client, first, 100)
+    post_transaction(test_client, second, 10)
+
+    assert get_info(test_client, first)["financialData"]["totalExpense"] == 100
+    assert get_info(test_client, first)["financialData"]["totalExpense"] == 100
+    assert get_info(test_client, second)["financialData"]["totalExpense"] == 10
+
+    stats = test_client.get("/cache/stats").json()
+    assert stats["endpoints"]["user_info"] == {"hits": 1, "misses": 2}
+
+    transaction = post_transaction(test_client, first, 50)
+    assert get_info(test_client, first)["financialData"]["totalExpense"] == 150
+    assert get_info(test_client, second)["financialData"]["totalExpense"] == 10
+
+    stats = test_client.get("/cache/stats").json()
+    assert stats["endpoints"]["user_info"] == {"hits": 2, "misses": 3}
+
+    test_client.delete(f"/{first}/transactions/{transaction["transaction_id"]}")
+    assert get_info(test_client, first)["financialData"]["totalExpense"] == 100
+
+def test_goal_write_invalidates_progress(test_client, mock_users):
+    '''
+    Testa se criar uma meta descarta o progresso de metas em cache
+    '''
+    user_id = mock_users[0]
+    post_transaction(test_client, user_id, 100)
+
+    assert test_client.get(f"/{user_id}/goals/info").json() == []
+
+    test_client.post(f"/{user_id}/goals", json={"value": 500, "type": "Despesa", "category": "Moradia"})
+    goals = test_client.get(f"/{user_id}/goals/info").json()
+    assert [(g["goal_value"], g["goal_progress"]) for g in goals] == [(500, 100)]
+
+def test_memory_cache_lru_and_ttl(monkeypatch):
+    '''
+    Testa a remoção por LRU e por tempo de vida do cache em memória
+    '''
+    cache = MemoryCache(max_entries=2, ttl=10)
+    cache.set((1, "a", None, None), "A")
+    cache.set((1, "b", None, None), "B")
+    cache.get((1, "a", None, None))
+    cache.set((2, "c", None, None), "C")
+
+    assert cache.get((1, "b", None, None)) is None
+    assert cache.get((1, "a", None, None)) == "A"
+
+    cache.invalidate_user(1)
+    assert cache.get((1, "a", None, None)) is None
+    assert cache.get((2, "c", None, None)) == "C"
+
+    monkeypatch.setattr("utils.cache.time.monotonic", lambda: 10**9)
+    assert cache.get((2, "c", None, None)) is None
+
+def test_write_during_calculation_is_not_cached():
+    '''
+    Testa se um resumo calculado durante uma escrita do mesmo usuário não fica no cache
+    '''
+    from utils.cache import DashboardCache
+
+    cache = DashboardCache(MemoryCache(max_entries=10, ttl=10))
+    calls = []
+
+    @cache.cached("summary", int)
+    def summary(user_id, db, start_date=None, end_date=None):
+        calls.append(user_id)
+        if len(calls) == 1:
+            # Escrita concorrente (ex.: outra requisição) enquanto o resumo é calculado
+            cache.invalidate_user(user_id)
+        return len(calls)
+
+    assert summary(1, None) == 1
+    assert summary(1, None) == 2
+    assert summary(1, None) == 2
+
+def test_memory_cache_generations_are_released():
+    '''
+    Testa se a geração de um usuário só existe durante os cálculos e se clear descarta as em andamento
+    '''
+    cache = MemoryCache(max_entries=10, ttl=10)
+    for user_id in range(100):
+        generation = cache.generation(user_id)
+        cache.invalidate_user(user_id)
+        cache.set((user_id, "a", None, None), "A", generation=generation)
+        cache.release(user_id)
+    assert cache._generations == {}
+    assert cache.get((1, "a", None, None)) is None
+
+    generation = cache.generation(1)
+    cache.clear()
+    cache.set((1, "a", None, None), "A", generation=generation)
+    cache.release(1)
+    assert cache.get((1, "a", None, None)) is None
+    assert cache._generations == {}
+
+def test_default_period_is_keyed_by_day(monkeypatch):
+    '''
+    Testa se um resumo sem end_date (período que termina hoje) é recalculado na virada do dia
+    '''
+    from datetime import date
+    from utils.cache import DashboardCache
+
+    class FakeDate(date):
+        current = date(2025, 4, 30)
+
+        @classmethod
+        def today(cls):
+            return cls.current
+    monkeypatch.setattr("utils.cache.date", FakeDate)
+
+    cache = DashboardCache(MemoryCache(max_entries=10, ttl=10**6))
+    calls = []
+
+    @cache.cached("summary", int)
+    def summary(user_id, db, start_date=None, end_date=None):
+        calls.append(end_date)
+        return len(calls)
+
+    assert summary(1, None) == 1
+    assert summary(1, None) == 1
+    assert summary(1, None, end_date=date(2025, 4, 30)) == 2
+
+    FakeDate.current = date(2025, 5, 1)
+    assert summary(1, None) == 3
+    assert summary(1, None, end_date=date(2025, 4, 30)) == 2
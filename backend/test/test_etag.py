@@ -0,0 +1,139 @@
+import pytest
+from sqlalchemy import event
+
+@pytest.fixture(scope='function')
+def mock_user(test_client):
+    '''
+    Cria um usuário dublê para realizar testes de ETag
+    '''
+    response = test_client.post(
+        "/users",
+        json={"name": "Fulano Testador", "email": "emailetag@gmail.com", "password": "Senha@Forte123"}
+    )
+    return response.json()
+
+def post_transaction(test_client, user_id, value):
+    return test_client.post(
+        f"/{user_id}/transactions",
+        json={"date": "2025-04-20", "value": value, "type": "Despesa", "category": "Moradia", "description": ""}
+    ).json()
+
+def test_not_modified_until_write(test_client, test_db_session, mock_user):
+    '''
+    Testa se o ETag se mantém até uma escrita e se If-None-Match devolve 304 só com a consulta da versão
+    '''
+    user_id = mock_user["user"]["id"]
+    post_transaction(test_client, user_id, 100)
+
+    response = test_client.get(f"/{user_id}/transactions")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = test_db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        response = test_client.get(f"/{user_id}/transactions", headers={"If-None-Match": etag})
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert len(statements) == 1
+
+    post_transaction(test_client, user_id, 50)
+
+    response = test_client.get(f"/{user_id}/transactions", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()) == 2
+
+def test_etag_per_url_and_route(test_client, mock_user):
+    '''
+    Testa se URLs diferentes têm ETags diferentes e se escritas de metas também mudam a versão
+    '''
+    user_id = mock_user["user"]["id"]
+
+    info = test_client.get(f"/users/{user_id}/info")
+    filtered = test_client.get(f"/users/{user_id}/info", params={"start_date": "2025-01-01"})
+    assert info.headers["ETag"] != filtered.headers["ETag"]
+
+    goals = test_client.get(f"/{user_id}/goals/info")
+    assert test_client.get(f"/{user_id}/goals/info", headers={"If-None-Match": goals.headers["ETag"]}).status_code == 304
+
+    test_client.post(f"/{user_id}/goals", json={"value": 500, "type": "Despesa", "category": "Moradia"})
+    assert test_client.get(f"/{user_id}/goals/info", headers={"If-None-Match": goals.headers["ETag"]}).status_code == 200
+
+    user = test_client.get(f"/users/{user_id}")
+    assert test_client.get(f"/users/{user_id}", headers={"If-None-Match": "*"}).status_code == 304
+    assert user.headers["ETag"] != goals.headers["ETag"]
+
+def test_etag_follows_json_file(test_client, mock_user, monkeypatch, tmp_path):
+    '''
+    Testa se, com DATA_SOURCE=json, o ETag muda quando o arquivo de transações é trocado
+    '''
+    import json
+    import os
+    from utils.settings import Settings
+
+    user_id = mock_user["user"]["id"]
+    path = tmp_path / "transactions.json"
+    transaction = {"user_id": user_id, "transaction_id": 1, "transaction_date": "2025-04-20", "transaction_value": 100,
+                   "transaction_type": "Despesa", "transaction_category": "Moradia", "transaction_description": ""}
+    path.write_text(json.dumps([transaction]), encoding="utf-8")
+
+    settings = Settings(data_source="json", json_data_path=str(path))
+    monkeypatch.setattr("utils.etag.get_settings", lambda: settings)
+    monkeypatch.setattr("adapter.transactions_adapter.get_settings", lambda: settings)
+
+    response = test_client.get(f"/{user_id}/transactions")
+    etag = response.headers["ETag"]
+    assert [t["transaction_value"] for t in response.json()] == [100]
+    assert test_client.get(f"/{user_id}/transactions", headers={"If-None-Match": etag}).status_code == 304
+
+    # O arquivo muda sem nenhuma escrita pela API (a versão do usuário no banco continua a mesma)
+    path.write_text(json.dumps([transaction, {**transaction, "transaction_id": 2, "transaction_value": 50}]), encoding="utf-8")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+
+    response = test_client.get(f"/{user_id}/transactions", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [t["transaction_value"] for t in response.json()] == [100, 50]
+
+def test_default_period_changes_with_the_month(test_client, mock_user, monkeypatch):
+    '''
+    Testa se o resumo sem end_date (12 meses até hoje) deixa de responder 304 na virada do mês
+    '''
+    from datetime import date
+
+    class FakeDate(date):
+        current = date(2025, 4, 30)
+
+        @classmethod
+        def today(cls):
+            return cls.current
+    for module in ("utils.etag", "utils.cache", "services.transaction_service"):
+        monkeypatch.setattr(f"{module}.date", FakeDate)
+
+    user_id = mock_user["user"]["id"]
+    post_transaction(test_client, user_id, 100)
+
+    response = test_client.get(f"/{user_id}/transactions/info")
+    etag = response.headers["ETag"]
+    assert response.json()["lastYearTransactions"][-1]["transaction_month"] == "Abr"
+    assert test_client.get(f"/{user_id}/transactions/info", headers={"If-None-Match": etag}).status_code == 304
+
+    # Com end_date informado o ETag não depende do dia
+    dated = test_client.get(f"/{user_id}/transactions/info", params={"end_date": "2025-04-30"}).headers["ETag"]
+
+    FakeDate.current = date(2025, 5, 1)
+    response = test_client.get(f"/{user_id}/transactions/info", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["lastYearTransactions"][-1]["transaction_month"] == "Mai"
+    assert test_client.get(f"/{user_id}/transactions/info", params={"end_date": "2025-04-30"},
+                           headers={"If-None-Match": dated}).status_code == 304
@@ -1,4 +1,5 @@
 import pytest
+from datetime import date
 
 @pytest.fixture(scope='function')
 def mock_user_and_transactions(test_client):
@@ -136,3 +137,301 @@ def test_with_transactions(test_client, mock_user_and_transactions):
     assert_test(response_mock, 3, mock_user_and_transactions)
     assert_test(response_A, 2, user_A)
     assert_test(response_B, 1, user_B)
+
+###################     TESTES DE RESUMO MENSAL   ###################
+
+def test_transactions_info_last_year(test_client, mock_user_and_transactions):
+    '''
+    Testa se o resumo dos últimos 12 meses agrupa as transações por mês e preenche com zero os meses sem transações
+    '''
+    response = test_client.get(
+        f"/{mock_user_and_transactions["user"]["id"]}/transactions/info",
+        params={"end_date": "2025-06-30"}
+    )
+
+    assert response.status_code == 200
+    months = response.json()["lastYearTransactions"]
+    assert len(months) == 12
+    assert [m["transaction_month"] for m in months][:3] == ["Jul", "Ago", "Set"]
+
+    april = months[9]
+    assert april == {"transaction_month": "Abr", "month_income": 201, "month_expense": 402}
+
+    for month in months[:9] + months[10:]:
+        assert month["month_income"] == 0
+        assert month["month_expense"] == 0
+
+def test_transactions_info_without_end_date(test_client, mock_user_and_transactions):
+    '''
+    Testa se, sem end_date, o resumo mostra os 12 meses terminados no mês atual
+    '''
+    response = test_client.get(f"/{mock_user_and_transactions["user"]["id"]}/transactions/info")
+
+    assert response.status_code == 200
+    months = response.json()["lastYearTransactions"]
+    assert len(months) == 12
+    assert months[-1]["transaction_month"] == ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"][date.today().month - 1]
+
+###################     TESTES DE SÉRIE TEMPORAL   ###################
+
+def get_series(test_client, user, **params):
+    return test_client.get(f"/{user["user"]["id"]}/transactions/series", params=params)
+
+def test_series_by_day_and_week(test_client, mock_user_and_transactions):
+    '''
+    Testa se a série agrupa por dia e por semana (de segunda a domingo) e preenche com zero os períodos vazios
+    '''
+    days = get_series(test_client, mock_user_and_transactions, granularity="day", start_date="2025-04-19", end_date="2025-04-22").json()
+    assert days["periods"] == ["2025-04-19", "2025-04-20", "2025-04-21", "2025-04-22"]
+    assert days["expense"] == [0, 201, 201, 0]
+    assert days["income"] == [0, 0, 0, 201]
+    assert days["categories"] == []
+
+    # 20/04/2025 é um domingo: fica na semana que começa em 14/04
+    weeks = get_series(test_client, mock_user_and_transactions, granularity="week", start_date="2025-04-14", end_date="2025-05-04").json()
+    assert weeks["periods"] == ["2025-04-14", "2025-04-21", "2025-04-28"]
+    assert weeks["expense"] == [201, 201, 0]
+    assert weeks["income"] == [0, 201, 0]
+
+def test_series_by_category(test_client, mock_user_and_transactions):
+    '''
+    Testa a matriz categoria x período, com meses inteiros e com um período que começa no meio do trimestre
+    '''
+    months = get_series(test_client, mock_user_and_transactions, granularity="month",
+                        start_date="2025-01-01", end_date="2025-06-30", by_category=True).json()
+    assert months["periods"] == [f"2025-0{month}-01" for month in range(1, 7)]
+    assert months["expense"] == [0, 0, 0, 402, 0, 0]
+    assert months["categories"] == [
+        {"transaction_type": "Despesa", "transaction_category": "Alimentação", "values": [0, 0, 0, 201, 0, 0]},
+        {"transaction_type": "Despesa", "transaction_category": "Entretenimento", "values": [0, 0, 0, 201, 0, 0]},
+        {"transaction_type": "Receita", "transaction_category": "Salário", "values": [0, 0, 0, 201, 0, 0]},
+    ]
+
+    quarters = get_series(test_client, mock_user_and_transactions, granularity="quarter",
+                          start_date="2025-02-15", end_date="2025-12-31", by_category=True).json()
+    assert quarters["periods"] == ["2025-01-01", "2025-04-01", "2025-07-01", "2025-10-01"]
+    assert quarters["expense"] == [0, 402, 0, 0]
+    assert quarters["income"] == [0, 201, 0, 0]
+    assert len(quarters["categories"]) == 3
+
+    # Transações fora do período não entram
+    assert get_series(test_client, mock_user_and_transactions, granularity="quarter",
+                      start_date="2025-04-21", end_date="2025-06-30").json()["expense"] == [201]
+
+def test_series_defaults_and_errors(test_client, mock_user_and_transactions):
+    '''
+    Testa o período padrão (últimos anos até o atual) e as datas e granularidades inválidas
+    '''
+    years = get_series(test_client, mock_user_and_transactions, granularity="year").json()
+    assert len(years["periods"]) == 10
+    assert years["periods"][-1] == f"{date.today().year}-01-01"
+    assert years["expense"][years["periods"].index("2025-01-01")] == 402
+
+    assert get_series(test_client, mock_user_and_transactions, start_date="2025-05-01", end_date="2025-04-01").status_code == 400
+    assert get_series(test_client, mock_user_and_transactions, granularity="day", start_date="2015-01-01", end_date="2025-01-01").status_code == 400
+    assert get_series(test_client, mock_user_and_transactions, granularity="hour").status_code == 422
+    assert test_client.get("/999999/transactions/series").status_code == 404
+
+def test_series_default_period_after_day_changes(test_client, mock_user_and_transactions, monkeypatch):
+    '''
+    Testa se a série sem datas deixa de responder 304 quando o dia muda e o período padrão anda
+    '''
+    class FakeDate(date):
+        current = date(2025, 4, 21)
+
+        @classmethod
+        def today(cls):
+            return cls.current
+    for module in ("utils.etag", "services.transaction_service"):
+        monkeypatch.setattr(f"{module}.date", FakeDate)
+
+    response = get_series(test_client, mock_user_and_transactions, granularity="day")
+    etag = response.headers["ETag"]
+    assert response.json()["periods"][-1] == "2025-04-21"
+    assert test_client.get(f"/{mock_user_and_transactions["user"]["id"]}/transactions/series", params={"granularity": "day"},
+                           headers={"If-None-Match": etag}).status_code == 304
+
+    FakeDate.current = date(2025, 4, 22)
+    response = test_client.get(f"/{mock_user_and_transactions["user"]["id"]}/transactions/series", params={"granularity": "day"},
+                               headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["periods"][-1] == "2025-04-22"
+    assert response.json()["income"][-1] == 201
+
+###################     TESTES DE PAGINAÇÃO   ###################
+
+def test_keyset_pagination(test_client, mock_user_and_transactions):
+    '''
+    Testa se a listagem paginada percorre todas as transações em ordem de data, sem repetir nenhuma
+    '''
+    user_id = mock_user_and_transactions["user"]["id"]
+
+    first_page = test_client.get(f"/{user_id}/transactions", params={"limit": 2})
+    assert first_page.status_code == 200
+    assert [t["transaction_date"] for t in first_page.json()] == ["2025-04-20", "2025-04-21"]
+    assert "X-Next-Cursor" in first_page.headers
+
+    second_page = test_client.get(
+        f"/{user_id}/transactions",
+        params={"limit": 2, "after": first_page.headers["X-Next-Cursor"]}
+    )
+    assert [t["transaction_date"] for t in second_page.json()] == ["2025-04-22"]
+    assert "X-Next-Cursor" not in second_page.headers
+
+def test_invalid_cursor(test_client, mock_user_and_transactions):
+    '''
+    Testa se o sistema recusa um cursor de paginação inválido
+    '''
+    response = test_client.get(f"/{mock_user_and_transactions["user"]["id"]}/transactions", params={"after": "invalido"})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Cursor de paginação inválido."}
+
+###################     TESTES DE BUSCA   ###################
+
+def post_described(test_client, user_id, date, description, type="Despesa", category="Transporte"):
+    return test_client.post(
+        f"/{user_id}/transactions",
+        json={"date": date, "value": 30, "type": type, "category": category, "description": description}
+    ).json()
+
+def test_search_descriptions(test_client, mock_user_and_transactions):
+    '''
+    Testa se a busca encontra palavras (e prefixos) da descrição, sem acento e sem diferenciar maiúsculas
+    '''
+    user_id = mock_user_and_transactions["user"]["id"]
+    post_described(test_client, user_id, "2025-05-01", "Uber para o trabalho")
+    post_described(test_client, user_id, "2025-05-02", "UBER")
+    post_described(test_client, user_id, "2025-05-03", "Ônibus")
+
+    def search(text, **params):
+        response = test_client.get(f"/{user_id}/transactions", params={"search": text, **params})
+        assert response.status_code == 200
+        return [t["transaction_description"] for t in response.json()]
+
+    # A descrição mais curta é a mais relevante
+    assert search("uber") == ["UBER", "Uber para o trabalho"]
+    assert search("ube") == ["UBER", "Uber para o trabalho"]
+    assert search("uber trabalho") == ["Uber para o trabalho"]
+    assert search("onibus") == ["Ônibus"]
+    assert search("parque", transaction_category="Alimentação") == ["Fim de semana no parque"]
+    assert search("taxi") == []
+    # Operadores do FTS são tratados como texto comum
+    assert search('"uber"* -') == ["UBER", "Uber para o trabalho"]
+    assert search("*") == []
+
+def test_search_follows_writes(test_client, mock_user_and_transactions):
+    '''
+    Testa se o índice de busca acompanha edições e exclusões e não mistura usuários
+    '''
+    user_id = mock_user_and_transactions["user"]["id"]
+    other = test_client.post(
+        "/users",
+        json={"name": "Outro Testador", "email": "outrobusca@gmail.com", "password": "Senha@Forte123"}
+    ).json()["user"]["id"]
+    post_described(test_client, other, "2025-05-01", "Uber")
+
+    transaction = post_described(test_client, user_id, "2025-05-01", "Uber")
+    test_client.put(
+        f"/{user_id}/transactions/{transaction['transaction_id']}",
+        json={"date": "2025-05-01", "value": 30, "type": "Despesa", "category": "Transporte", "description": "Táxi"}
+    )
+
+    def search(text):
+        return [t["transaction_id"] for t in test_client.get(f"/{user_id}/transactions", params={"search": text}).json()]
+
+    assert search("uber") == []
+    assert search("taxi") == [transaction["transaction_id"]]
+
+    test_client.delete(f"/{user_id}/transactions/{transaction['transaction_id']}")
+    assert search("taxi") == []
+
+def test_search_pagination(test_client, mock_user_and_transactions):
+    '''
+    Testa se os resultados da busca são paginados pelo cursor, sem repetir nenhum
+    '''
+    user_id = mock_user_and_transactions["user"]["id"]
+    ids = {post_described(test_client, user_id, f"2025-05-0{day}", "Mercado")["transaction_id"] for day in range(1, 6)}
+
+    seen = []
+    params = {"search": "mercado", "limit": 2}
+    while True:
+        response = test_client.get(f"/{user_id}/transactions", params=params)
+        seen += [t["transaction_id"] for t in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["after"] = response.headers["X-Next-Cursor"]
+
+    assert len(seen) == len(ids) and set(seen) == ids
+    # Mesma relevância: das mais recentes para as mais antigas
+    assert seen == sorted(ids, reverse=True)
+
+    # Um cursor da listagem comum não serve para a busca
+    keyset_cursor = test_client.get(f"/{user_id}/transactions", params={"limit": 1}).headers["X-Next-Cursor"]
+    response = test_client.get(f"/{user_id}/transactions", params={"search": "mercado", "after": keyset_cursor})
+    assert response.status_code == 400
+
+def test_ndjson_stream(test_client, mock_user_and_transactions):
+    '''
+    Testa se a listagem em NDJSON devolve uma transação por linha
+    '''
+    import json
+
+    response = test_client.get(f"/{mock_user_and_transactions["user"]["id"]}/transactions", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == test_client.get(f"/{mock_user_and_transactions["user"]["id"]}/transactions").json()
+
+def test_ndjson_stream_sends_batches(test_db_session, mock_user_and_transactions, monkeypatch):
+    '''
+    Testa se o NDJSON é enviado em um bloco por lote lido do banco, e não em um bloco por linha
+    '''
+    from database import transactions as crud_transactions
+    from services import transaction_service
+
+    monkeypatch.setattr(crud_transactions, "STREAM_BATCH_SIZE", 2)
+    chunks = list(transaction_service.stream_transactions_by_user(mock_user_and_transactions["user"]["id"], test_db_session))
+    assert [chunk.count(b"\n") for chunk in chunks] == [2, 1]
+
+def test_list_matches_dto_serialization(test_client, test_db_session, mock_user_and_transactions):
+    '''
+    Testa se a listagem serializada direto pelo orjson é igual à serialização pelos DTOs
+    '''
+    import json
+    from pydantic import TypeAdapter
+    from database.models import Transaction
+    from dto.transactions_dto import TransactionsListResponse
+    from mapper.transactions_mapper import TransactionMapper
+
+    user_id = mock_user_and_transactions["user"]["id"]
+    transactions = test_db_session.query(Transaction).filter(Transaction.user_id == user_id)\
+        .order_by(Transaction.transaction_date, Transaction.transaction_id).all()
+    expected = TypeAdapter(list[TransactionsListResponse]).dump_json(TransactionMapper.to_list_response(transactions))
+
+    response = test_client.get(f"/{user_id}/transactions")
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == json.loads(expected)
+    assert all(isinstance(t["transaction_value"], float) for t in response.json())
+
+###################     TESTES DE TRANSAÇÃO ESPECÍFICA   ###################
+
+def test_specific_transaction(test_client, mock_user_and_transactions):
+    '''
+    Testa a busca de uma única transação do usuário e os erros de transação ou usuário inexistentes
+    '''
+    user_id = mock_user_and_transactions["user"]["id"]
+    transactions = test_client.get(f"/{user_id}/transactions").json()
+
+    response = test_client.get(f"/{user_id}/transactions/{transactions[1]["transaction_id"]}")
+    assert response.status_code == 200
+    assert response.json() == transactions[1]
+
+    response = test_client.get(f"/{user_id}/transactions/{transactions[-1]["transaction_id"] + 1}")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Transação Não Encontrada."}
+
+    response = test_client.get(f"/{user_id + 1}/transactions/{transactions[1]["transaction_id"]}")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "User not found"}
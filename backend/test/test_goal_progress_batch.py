@@ -0,0 +1,69 @@
+import pytest
+from datetime import date
+from sqlalchemy import event
+
+from services.goal_service import get_goals_progress_for_users
+
+@pytest.fixture(scope='function')
+def mock_users(test_client):
+    '''
+    Cria quatro usuários dublês: três com metas e transações e um sem metas
+    '''
+    users = []
+    for index in range(4):
+        response = test_client.post(
+            "/users",
+            json={"name": "Fulano Testador", "email": f"emaillote{index}@gmail.com", "password": "Senha@Forte123"}
+        )
+        users.append(response.json()["user"]["id"])
+
+    for index, user_id in enumerate(users[:3]):
+        test_client.post(f"/{user_id}/goals", json={"value": 500, "type": "Despesa", "category": "Moradia"})
+        test_client.post(f"/{user_id}/goals", json={"value": 3000, "type": "Receita", "category": "Salário"})
+        for day, value in [(5, 100), (20, 50 * (index + 1))]:
+            test_client.post(
+                f"/{user_id}/transactions",
+                json={"date": f"2025-04-{day:02d}", "value": value, "type": "Despesa", "category": "Moradia", "description": ""}
+            )
+    return users
+
+@pytest.mark.parametrize("period", [
+    {},
+    {"start_date": date(2025, 4, 1), "end_date": date(2025, 4, 30)},
+    {"start_date": date(2025, 4, 10), "end_date": date(2025, 4, 30)},
+])
+def test_batch_matches_single_user(test_client, test_db_session, mock_users, period):
+    '''
+    Testa se o progresso em lote é igual ao da rota de cada usuário, com meses inteiros ou parciais
+    '''
+    batch = dict(get_goals_progress_for_users(test_db_session, mock_users + [mock_users[-1] + 100], **period))
+
+    assert list(batch) == mock_users
+    assert batch[mock_users[3]] == []
+    for user_id in mock_users:
+        params = {key: value.isoformat() for key, value in period.items()}
+        expected = test_client.get(f"/{user_id}/goals/info", params=params).json()
+        assert [goal.model_dump() for goal in batch[user_id]] == expected
+
+def test_batch_statement_count_is_constant(test_db_session, mock_users):
+    '''
+    Testa se todos os usuários são processados em uma única consulta, e uma lista em uma consulta por bloco de IDs
+    '''
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = test_db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        everyone = dict(get_goals_progress_for_users(test_db_session))
+        assert len(statements) == 1
+
+        statements.clear()
+        chunked = dict(get_goals_progress_for_users(test_db_session, mock_users, chunk_size=2))
+        assert len(statements) == 2
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert everyone == chunked
+    assert [goal.goal_progress for goal in everyone[mock_users[1]]] == [200, 0]
@@ -0,0 +1,118 @@
+import json
+import os
+import random
+import pytest
+from datetime import date, timedelta
+
+from adapter.json_store import TransactionJsonStore, write_snapshot
+from adapter.transactions_adapter import TransactionAdapter
+from utils.settings import Settings
+
+def random_transactions(count):
+    rng = random.Random(42)
+    return [
+        {
+            "user_id": rng.randint(1, 5),
+            "transaction_id": transaction_id,
+            "transaction_date": (date(2025, 1, 1) + timedelta(days=rng.randint(0, 90))).isoformat(),
+            "transaction_value": round(rng.uniform(1, 500), 2),
+            "transaction_type": rng.choice(["Receita", "Despesa"]),
+            "transaction_category": rng.choice(["Moradia", "Salário", "Alimentação"]),
+            "transaction_description": rng.choice(["", "Mercado", "Pão de açúcar"]),
+        }
+        for transaction_id in range(1, count + 1)
+    ]
+
+def expected(transactions, user_id, transaction_type=None, transaction_category=None, start_date=None, end_date=None, after=None, limit=None):
+    # Mesma semântica da consulta no banco, sem índice
+    result = sorted(
+        (t for t in transactions
+         if t["user_id"] == user_id
+         and (not transaction_type or t["transaction_type"] == transaction_type)
+         and (not transaction_category or t["transaction_category"] == transaction_category)
+         and (not start_date or t["transaction_date"] >= start_date.isoformat())
+         and (not end_date or t["transaction_date"] <= end_date.isoformat())
+         and (not after or (t["transaction_date"], t["transaction_id"]) > (after[0].isoformat(), after[1]))),
+        key=lambda t: (t["transaction_date"], t["transaction_id"])
+    )
+    return result[:limit] if limit else result
+
+@pytest.fixture(params=["json", "ndjson", "bin"])
+def store_file(request, tmp_path):
+    '''
+    Grava as mesmas transações em cada formato aceito pelo store
+    '''
+    transactions = random_transactions(500)
+    path = tmp_path / f"transactions.{request.param}"
+
+    if request.param == "json":
+        path.write_text(json.dumps(transactions), encoding="utf-8")
+    elif request.param == "ndjson":
+        path.write_text("\n".join(json.dumps(t) for t in transactions), encoding="utf-8")
+    else:
+        write_snapshot(transactions, str(path))
+
+    return transactions, str(path)
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"transaction_type": "Despesa"},
+    {"transaction_category": "Moradia", "start_date": date(2025, 2, 1), "end_date": date(2025, 2, 28)},
+    {"after": (date(2025, 2, 10), 250), "limit": 5},
+    {"transaction_type": "Receita", "after": (date(2025, 3, 1), 0), "limit": 3},
+    {"transaction_category": "Inexistente"},
+])
+def test_store_filters(store_file, filters):
+    '''
+    Testa se o store devolve o mesmo resultado da filtragem completa, em todos os formatos
+    '''
+    transactions, path = store_file
+    store = TransactionJsonStore(path)
+
+    for user_id in [1, 3, 99]:
+        assert store.get_transactions(user_id, **filters) == expected(transactions, user_id, **filters)
+
+def test_store_point_lookup(store_file):
+    '''
+    Testa a busca de uma única transação por (usuário, ID), em todos os formatos
+    '''
+    transactions, path = store_file
+    store = TransactionJsonStore(path)
+
+    for transaction in transactions[::37]:
+        assert store.get_transaction(transaction["user_id"], transaction["transaction_id"]) == transaction
+        assert store.get_transaction(transaction["user_id"] + 1, transaction["transaction_id"]) is None
+
+    assert store.get_transaction(1, 10**6) is None
+
+def test_store_reloads_on_change(tmp_path):
+    '''
+    Testa se o arquivo só é relido quando muda
+    '''
+    path = tmp_path / "transactions.json"
+    transactions = random_transactions(10)
+    path.write_text(json.dumps(transactions), encoding="utf-8")
+
+    store = TransactionJsonStore(str(path))
+    index = store._current_index()
+    assert store._current_index() is index
+
+    transactions.append({**transactions[0], "transaction_id": 999})
+    path.write_text(json.dumps(transactions), encoding="utf-8")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+
+    user_id = transactions[0]["user_id"]
+    assert store._current_index() is not index
+    assert 999 in [t["transaction_id"] for t in store.get_transactions(user_id)]
+
+def test_adapter_json_source(monkeypatch, store_file):
+    '''
+    Testa se o Adapter aplica os filtros quando DATA_SOURCE=json
+    '''
+    transactions, path = store_file
+    # As configurações são lidas uma vez por processo: o teste troca a instância usada pelo Adapter
+    monkeypatch.setattr("adapter.transactions_adapter.get_settings",
+                        lambda: Settings(data_source="json", json_data_path=path))
+
+    adapter = TransactionAdapter()
+    assert adapter.get_transactions(2, transaction_type="Despesa", limit=4) == expected(transactions, 2, transaction_type="Despesa", limit=4)
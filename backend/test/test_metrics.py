@@ -0,0 +1,65 @@
+import re
+import pytest
+from sqlalchemy import event
+
+from utils.metrics import instrument_engine, registry
+
+@pytest.fixture(scope='function')
+def metrics_client(test_client, test_db_session):
+    '''
+    Instrumenta a engine do banco de teste e zera as métricas acumuladas
+    '''
+    instrument_engine(test_db_session.get_bind())
+    registry.reset()
+    yield test_client
+    registry.reset()
+
+def test_server_timing_counts_statements(metrics_client, test_db_session):
+    '''
+    Testa se o Server-Timing informa a mesma quantidade de comandos SQL executados na requisição
+    '''
+    user_id = metrics_client.post(
+        "/users",
+        json={"name": "Fulano Testador", "email": "emailmetricas@gmail.com", "password": "Senha@Forte123"}
+    ).json()["user"]["id"]
+
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = test_db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        response = metrics_client.get(f"/users/{user_id}/info")
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert response.status_code == 200
+    timing = re.match(r'db;desc="(\d+) statements";dur=([\d.]+), app;dur=([\d.]+)$', response.headers["Server-Timing"])
+    assert timing is not None
+    assert int(timing.group(1)) == len(statements)
+    assert float(timing.group(2)) <= float(timing.group(3))
+
+def test_metrics_endpoint(metrics_client, monkeypatch):
+    '''
+    Testa se /metrics exporta requisições, comandos SQL e cache no formato do Prometheus, respeitando a amostragem
+    '''
+    metrics_client.get("/users/1")
+    metrics_client.get("/users/1/info")
+
+    monkeypatch.setattr("utils.metrics.METRICS_SAMPLE_RATE", 0.0)
+    response = metrics_client.get("/users/1")
+    assert "Server-Timing" not in response.headers
+
+    metrics = metrics_client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    text = metrics.text
+    assert 'http_requests_total{method="GET",route="/users/{user_id}",status="404"} 2' in text
+    assert 'http_request_duration_seconds_count{route="/users/{user_id}"} 2' in text
+    # Só a primeira requisição para /users/{user_id} foi amostrada
+    assert 'db_statements_per_request_count{route="/users/{user_id}"} 1' in text
+    assert re.search(r'db_time_seconds_total\{route="/users/\{user_id\}/info"\} [\d.]+', text)
+    assert re.search(r'db_slowest_statement_seconds\{statement="SELECT .*"\} [\d.]+', text)
+    assert 'dashboard_cache_requests_total{endpoint="user_info",outcome="miss"}' in text
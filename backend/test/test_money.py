@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import inspect, text
+
+from database.config import create_db_engine
+from database.migrations import run_migrations
+from database.types import from_cents, to_cents
+
+@pytest.fixture(scope='function')
+def mock_user(test_client):
+    '''
+    Cria um usuário dublê para os testes de valores monetários
+    '''
+    response = test_client.post(
+        "/users",
+        json={"name": "Fulano Centavos", "email": "emailcentavos@gmail.com", "password": "Senha@Forte123"}
+    )
+    return response.json()
+
+def test_cents_conversion():
+    assert to_cents(0.1) == 10
+    assert to_cents(19.99) == 1999
+    assert to_cents(1234567.89) == 123456789
+    assert from_cents(1999) == 19.99
+    assert from_cents(to_cents(0.1) + to_cents(0.2)) == 0.3
+
+def test_totals_are_exact(test_client, test_db_session, mock_user):
+    '''
+    Testa se somas de muitos centavos não acumulam o erro do ponto flutuante
+    '''
+    user_id = mock_user["user"]["id"]
+    for value, transaction_type, category in [(0.1, "Receita", "Salário")] * 30 + [(0.2, "Despesa", "Moradia")] * 7:
+        test_client.post(f"/{user_id}/transactions",
+                         json={"date": "2025-03-10", "value": value, "type": transaction_type, "category": category, "description": ""})
+
+    financial_data = test_client.get(f"/users/{user_id}/info").json()["financialData"]
+    assert financial_data == {"totalIncome": 3.0, "totalExpense": 1.4, "currentBalance": 1.6}
+
+    # No banco o valor fica em centavos inteiros
+    stored = test_db_session.execute(text("SELECT DISTINCT transaction_value FROM transactions WHERE user_id = :user_id "
+                                          "ORDER BY 1"), {"user_id": user_id}).scalars().all()
+    assert stored == [10, 20]
+
+def test_migration_converts_float_columns(tmp_path):
+    '''
+    Testa se um banco com as colunas antigas em REAL é convertido para centavos, com índices e triggers recriados
+    '''
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (user_id INTEGER PRIMARY KEY, user_email VARCHAR, user_name VARCHAR, "
+                          "user_hashed_password VARCHAR)"))
+        conn.execute(text("CREATE TABLE transactions (user_id INTEGER REFERENCES users (user_id), transaction_id INTEGER PRIMARY KEY, "
+                          "transaction_date DATE, transaction_value FLOAT, transaction_type VARCHAR, "
+                          "transaction_category VARCHAR, transaction_description VARCHAR)"))
+        conn.execute(text("CREATE TABLE goals (user_id INTEGER REFERENCES users (user_id), goal_id INTEGER PRIMARY KEY, "
+                          "goal_value FLOAT, goal_type VARCHAR, goal_category VARCHAR)"))
+        conn.execute(text("INSERT INTO users VALUES (1, 'a@b.com', 'Fulano', 'hash')"))
+        conn.execute(text("INSERT INTO transactions VALUES (1, 1, '2025-03-01', 0.1, 'Despesa', 'Moradia', ''), "
+                          "(1, 2, '2025-03-02', 0.2, 'Despesa', 'Moradia', ''), (1, 3, '2025-04-01', 1999.99, 'Receita', 'Salário', '')"))
+        conn.execute(text("INSERT INTO goals VALUES (1, 1, 150.5, 'Despesa', 'Moradia')"))
+
+    try:
+        run_migrations(engine)
+        # Aplicar de novo não altera nada
+        run_migrations(engine)
+
+        with engine.begin() as conn:
+            assert conn.execute(text("SELECT transaction_value FROM transactions ORDER BY transaction_id")).scalars().all() == [10, 20, 199999]
+            assert conn.execute(text("SELECT goal_value FROM goals")).scalar() == 15050
+            assert conn.execute(text("SELECT total_value FROM monthly_balances WHERE year_month = '2025-03'")).scalar() == 30
+
+            # Os triggers continuam mantendo o resumo mensal
+            conn.execute(text("INSERT INTO transactions VALUES (1, 4, '2025-03-03', 5, 'Despesa', 'Moradia', '')"))
+            assert conn.execute(text("SELECT total_value FROM monthly_balances WHERE year_month = '2025-03'")).scalar() == 35
+
+        indexes = {index["name"] for index in inspect(engine).get_indexes("transactions")}
+        assert {"ix_transactions_user_date", "ix_transactions_user_type_category_date"} <= indexes
+    finally:
+        engine.dispose()
@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import text
+
+from database.types import Money
+
+@pytest.fixture(scope='function')
+def mock_user(test_client):
+    '''
+    Cria um usuário dublê para realizar testes do resumo mensal
+    '''
+    response = test_client.post(
+        "/users",
+        json={"name": "Fulano Testador", "email": "emailresumo@gmail.com", "password": "Senha@Forte123"}
+    )
+    return response.json()
+
+def post_transaction(test_client, user_id, date, value, type, category):
+    response = test_client.post(
+        f"/{user_id}/transactions",
+        json={"date": date, "value": value, "type": type, "category": category, "description": ""}
+    )
+    return response.json()
+
+def get_balances(test_db_session, user_id):
+    return test_db_session.execute(
+        text("SELECT year_month, transaction_type, transaction_category, total_value, transaction_count "
+             "FROM monthly_balances WHERE user_id = :user_id ORDER BY year_month, transaction_type, transaction_category")
+        .columns(total_value=Money),
+        {"user_id": user_id}
+    ).all()
+
+def test_balance_follows_writes(test_client, test_db_session, mock_user):
+    '''
+    Testa se a tabela de resumo mensal acompanha criações, edições e exclusões de transações
+    '''
+    user_id = mock_user["user"]["id"]
+
+    first = post_transaction(test_client, user_id, "2025-03-10", 100, "Despesa", "Moradia")
+    post_transaction(test_client, user_id, "2025-03-15", 50, "Despesa", "Moradia")
+    post_transaction(test_client, user_id, "2025-04-01", 300, "Receita", "Salário")
+
+    assert get_balances(test_db_session, user_id) == [
+        ("2025-03", "Despesa", "Moradia", 150, 2),
+        ("2025-04", "Receita", "Salário", 300, 1),
+    ]
+
+    test_client.put(
+        f"/{user_id}/transactions/{first["transaction_id"]}",
+        json={"date": "2025-04-02", "value": 80, "type": "Despesa", "category": "Saúde", "description": ""}
+    )
+
+    assert get_balances(test_db_session, user_id) == [
+        ("2025-03", "Despesa", "Moradia", 50, 1),
+        ("2025-04", "Despesa", "Saúde", 80, 1),
+        ("2025-04", "Receita", "Salário", 300, 1),
+    ]
+
+    test_client.delete(f"/{user_id}/transactions/{first["transaction_id"]}")
+
+    assert get_balances(test_db_session, user_id) == [
+        ("2025-03", "Despesa", "Moradia", 50, 1),
+        ("2025-04", "Receita", "Salário", 300, 1),
+    ]
+
+def test_info_whole_and_partial_months(test_client, mock_user):
+    '''
+    Testa se o resumo do usuário é o mesmo lendo do resumo mensal (meses inteiros) ou das transações (período parcial)
+    '''
+    user_id = mock_user["user"]["id"]
+
+    post_transaction(test_client, user_id, "2025-03-01", 100, "Despesa", "Moradia")
+    post_transaction(test_client, user_id, "2025-03-31", 40, "Despesa", "Transporte")
+    post_transaction(test_client, user_id, "2025-04-30", 300, "Receita", "Salário")
+    post_transaction(test_client, user_id, "2025-05-01", 999, "Receita", "Salário")
+
+    whole_months = test_client.get(
+        f"/users/{user_id}/info",
+        params={"start_date": "2025-03-01", "end_date": "2025-04-30"}
+    ).json()
+
+    partial_months = test_client.get(
+        f"/users/{user_id}/info",
+        params={"start_date": "2025-02-28", "end_date": "2025-04-30"}
+    ).json()
+
+    assert whole_months["financialData"] == {"totalIncome": 300, "totalExpense": 140, "currentBalance": 160}
+    assert whole_months == partial_months
+
+    shifted = test_client.get(
+        f"/users/{user_id}/info",
+        params={"start_date": "2025-03-02", "end_date": "2025-04-29"}
+    ).json()
+
+    assert shifted["financialData"] == {"totalIncome": 0, "totalExpense": 40, "currentBalance": -40}
@@ -0,0 +1,107 @@
+import pytest
+from sqlalchemy import event
+
+@pytest.fixture(scope='function')
+def mock_users(test_client):
+    '''
+    Cria dois usuários dublês para contar as consultas das escritas
+    '''
+    users = []
+    for email in ["emailescrita1@gmail.com", "emailescrita2@gmail.com"]:
+        response = test_client.post(
+            "/users",
+            json={"name": "Fulano Testador", "email": email, "password": "Senha@Forte123"}
+        )
+        users.append(response.json()["user"]["id"])
+    return users
+
+@pytest.fixture(scope='function')
+def count_statements(test_client, test_db_session):
+    '''
+    Executa uma requisição e devolve (resposta, quantidade de comandos SQL executados)
+    '''
+    engine = test_db_session.get_bind()
+
+    def run(method, url, **kwargs):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            response = test_client.request(method, url, **kwargs)
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        return response, len(statements)
+
+    return run
+
+def test_transaction_mutations(count_statements, mock_users):
+    '''
+    Testa se criar, editar e excluir uma transação custa no máximo dois comandos SQL
+    '''
+    owner, other = mock_users
+    data = {"date": "2025-04-20", "value": 100, "type": "Despesa", "category": "Moradia", "description": ""}
+
+    response, statements = count_statements("POST", f"/{owner}/transactions", json=data)
+    assert response.status_code == 201
+    assert statements <= 2
+    transaction_id = response.json()["transaction_id"]
+
+    response, statements = count_statements("PUT", f"/{owner}/transactions/{transaction_id}",
+                                            json={**data, "value": 80, "type": "Receita", "category": "Salário"})
+    assert response.status_code == 200
+    assert (response.json()["transaction_value"], response.json()["transaction_type"]) == (80, "Receita")
+    assert statements <= 2
+
+    response, statements = count_statements("PUT", f"/{other}/transactions/{transaction_id}", json=data)
+    assert response.status_code == 403
+    assert statements <= 2
+
+    response, statements = count_statements("DELETE", f"/{other}/transactions/{transaction_id}")
+    assert response.status_code == 403
+    assert statements <= 2
+
+    response, statements = count_statements("DELETE", f"/{owner}/transactions/{transaction_id}")
+    assert response.status_code == 200
+    assert statements <= 2
+
+    response, _ = count_statements("DELETE", f"/{owner}/transactions/{transaction_id}")
+    assert response.json() == {"detail": "Transaction not found"}
+
+    response, _ = count_statements("POST", f"/{owner + other}/transactions", json=data)
+    assert response.status_code == 403
+
+def test_goal_mutations(count_statements, mock_users):
+    '''
+    Testa se criar (ou substituir), editar e excluir uma meta custa no máximo dois comandos SQL
+    '''
+    owner, other = mock_users
+
+    response, statements = count_statements("POST", f"/{owner}/goals", json={"value": 500, "type": "Despesa", "category": "Moradia"})
+    assert response.status_code == 201
+    assert statements <= 2
+    goal_id = response.json()["goal_id"]
+
+    # Mesma categoria: a meta existente é atualizada
+    response, statements = count_statements("POST", f"/{owner}/goals", json={"value": 700, "type": "Despesa", "category": "Moradia"})
+    assert response.json() == {"goal_id": goal_id, "goal_value": 700, "goal_type": "Despesa", "goal_category": "Moradia"}
+    assert statements <= 2
+
+    # A mesma categoria em outro usuário é outra meta
+    response, _ = count_statements("POST", f"/{other}/goals", json={"value": 100, "type": "Despesa", "category": "Moradia"})
+    assert response.status_code == 201
+    assert response.json()["goal_id"] != goal_id
+
+    response, statements = count_statements("PUT", f"/{owner}/goals/{goal_id}", json={"value": 900, "type": "Despesa", "category": "Saúde"})
+    assert response.status_code == 200
+    assert statements <= 2
+
+    response, statements = count_statements("PUT", f"/{other}/goals/{goal_id}", json={"value": 900, "type": "Despesa", "category": "Saúde"})
+    assert response.status_code == 403
+    assert statements <= 2
+
+    response, statements = count_statements("DELETE", f"/{owner}/goals/{goal_id}")
+    assert response.status_code == 200
+    assert statements <= 2
@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from database import users as crud_user
+from utils import password_hash
+
+@pytest.fixture(scope='function')
+def inline_hashing(monkeypatch):
+    '''
+    Executa o bcrypt na própria thread, para que o contexto alterado no teste valha também para o cálculo
+    '''
+    monkeypatch.setattr(password_hash, "HASH_WORKERS", 0)
+
+def test_login_rehashes_when_rounds_change(test_client, test_db_session, inline_hashing, monkeypatch):
+    '''
+    Testa se o login refaz o hash da senha quando o custo do bcrypt muda
+    '''
+    monkeypatch.setattr(password_hash, "password_context", CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=4))
+    user = test_client.post(
+        "/users",
+        json={"name": "Fulano Testador", "email": "emailhash@gmail.com", "password": "Senha@Forte123"}
+    ).json()
+    assert crud_user.get_user_by_id(test_db_session, user["user"]["id"]).user_hashed_password.startswith("$2b$04$")
+
+    monkeypatch.setattr(password_hash, "password_context", CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5))
+    response = test_client.post("/users/login", json={"email": "emailhash@gmail.com", "password": "Senha@Forte123"})
+
+    assert response.status_code == 200
+    test_db_session.expire_all()
+    assert crud_user.get_user_by_id(test_db_session, user["user"]["id"]).user_hashed_password.startswith("$2b$05$")
+
+def test_hash_queue_full(test_client, inline_hashing, monkeypatch):
+    '''
+    Testa se o cadastro responde 429 quando a fila de hashes está cheia
+    '''
+    full_queue = threading.BoundedSemaphore(1)
+    full_queue.acquire()
+    monkeypatch.setattr(password_hash, "_pending", full_queue)
+
+    response = test_client.post(
+        "/users",
+        json={"name": "Fulano Testador", "email": "emailfila@gmail.com", "password": "Senha@Forte123"}
+    )
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
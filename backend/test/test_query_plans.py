@@ -0,0 +1,139 @@
+import pytest
+from datetime import date
+from sqlalchemy import event
+
+from database import goals as crud_goals
+from database import transactions as crud_transactions
+from database.config import Base
+from database.models import User
+from database.schemas import GoalCreate, TransactionData
+
+@pytest.fixture(scope='function')
+def user_with_data(test_db_session):
+    '''
+    Cria um usuário com uma transação e uma meta diretamente no banco de teste
+    '''
+    user = User(user_email="emailplano@gmail.com", user_name="Fulano", user_hashed_password="hash")
+    test_db_session.add(user)
+    test_db_session.commit()
+
+    transaction = crud_transactions.create_transaction_db(
+        test_db_session, user.user_id,
+        TransactionData(date=date(2025, 4, 20), value=10, type="Despesa", category="Moradia", description="Aluguel")
+    )
+    goal = crud_goals.create_goal_db(
+        test_db_session, user.user_id,
+        GoalCreate(value=100, type="Despesa", category="Moradia")
+    )
+    return user, transaction, goal
+
+@pytest.fixture(scope='function')
+def captured_statements(test_db_session):
+    '''
+    Captura os comandos SQL executados pelo CRUD durante o teste
+    '''
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = test_db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(engine, "before_cursor_execute", capture)
+
+def query_plan(test_db_session, statement, parameters):
+    cursor = test_db_session.connection().connection.driver_connection.cursor()
+    return [row[3] for row in cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()]
+
+def assert_statements_use_index(test_db_session, statements):
+    checked = 0
+    for statement, parameters in statements:
+        if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            continue
+
+        for step in query_plan(test_db_session, statement, parameters):
+            # "SCAN tabela" indica leitura completa; "SEARCH tabela USING ..." indica uso de índice.
+            # Ler uma CTE já agregada ("SCAN by_category") não lê a tabela de novo
+            if step.startswith("SCAN") and step.split()[1] in Base.metadata.tables:
+                pytest.fail(f"Consulta sem índice: {statement}\n{step}")
+        checked += 1
+
+    assert checked > 0
+
+def test_transaction_queries_use_index(test_db_session, user_with_data, captured_statements):
+    '''
+    Testa se todas as consultas de database/transactions.py usam algum índice
+    '''
+    user, transaction, _ = user_with_data
+
+    crud_transactions.get_transaction_by_id(test_db_session, transaction.transaction_id)
+    crud_transactions.get_user_transaction(test_db_session, user.user_id, transaction.transaction_id)
+    crud_transactions.get_transactions_by_user(test_db_session, user.user_id)
+    crud_transactions.get_transactions_by_user(test_db_session, user.user_id,
+                                               transaction_type="Despesa",
+                                               transaction_category="Moradia",
+                                               start_date=date(2025, 1, 1),
+                                               end_date=date(2025, 12, 31))
+    crud_transactions.get_transactions_by_user(test_db_session, user.user_id, start_date=date(2025, 4, 2))
+    crud_transactions.get_transactions_by_user(test_db_session, user.user_id, after=(date(2025, 4, 1), 1), limit=10)
+    list(crud_transactions.stream_transactions_by_user(test_db_session, user.user_id, limit=10))
+    crud_transactions.get_transactions_by_user(test_db_session, user.user_id, search="aluguel", limit=10, offset=10)
+
+    for start_date, end_date in [(None, None), (date(2025, 1, 1), date(2025, 12, 31)), (date(2025, 1, 2), date(2025, 12, 30))]:
+        crud_transactions.get_transaction_agregate(test_db_session, user.user_id, "Despesa", start_date, end_date)
+        crud_transactions.get_transaction_sum(test_db_session, user.user_id, start_date, end_date)
+        crud_transactions.get_transactiom_sum_by_category(test_db_session, user.user_id, start_date, end_date)
+
+    crud_transactions.get_transaction_sum_by_month(test_db_session, user.user_id, date(2025, 1, 1), date(2025, 12, 31))
+    crud_transactions.get_transaction_sum_by_month(test_db_session, user.user_id, date(2025, 1, 5), date(2025, 12, 31))
+    for granularity in crud_transactions.SERIES_GRANULARITIES:
+        crud_transactions.get_transaction_series(test_db_session, user.user_id, granularity, date(2025, 1, 1), date(2025, 12, 31), by_category=True)
+        crud_transactions.get_transaction_series(test_db_session, user.user_id, granularity, date(2025, 1, 2), date(2025, 12, 30))
+    crud_transactions.get_user_summary(test_db_session, user.user_id, date(2025, 1, 1), date(2025, 12, 31))
+    crud_transactions.get_user_summary(test_db_session, user.user_id, date(2025, 1, 2), date(2025, 12, 30))
+
+    crud_transactions.get_transaction_owner(test_db_session, user.user_id, transaction.transaction_id)
+    crud_transactions.update_transaction(
+        test_db_session, user.user_id, transaction.transaction_id,
+        TransactionData(date=date(2025, 4, 21), value=20, type="Despesa", category="Moradia", description="Aluguel")
+    )
+    crud_transactions.delete_transaction(test_db_session, user.user_id, transaction.transaction_id)
+
+    assert_statements_use_index(test_db_session, captured_statements)
+
+def test_goal_queries_use_index(test_db_session, user_with_data, captured_statements):
+    '''
+    Testa se todas as consultas de database/goals.py usam algum índice
+    '''
+    user, _, goal = user_with_data
+
+    crud_goals.get_goal_by_id(test_db_session, goal.goal_id)
+    crud_goals.get_goal_by_category(test_db_session, "Moradia")
+    crud_goals.get_goal_by_user(test_db_session, user.user_id)
+    crud_goals.get_general_goals(test_db_session, user.user_id)
+    list(crud_goals.stream_goal_progress(test_db_session, [user.user_id]))
+    list(crud_goals.stream_goal_progress(test_db_session, [user.user_id], start_date=date(2025, 4, 2), end_date=date(2025, 4, 30)))
+    crud_goals.get_goal_owner(test_db_session, user.user_id, goal.goal_id)
+    crud_goals.update_goal(test_db_session, user.user_id, goal.goal_id, GoalCreate(value=200, type="Despesa", category="Moradia"))
+    crud_goals.create_goal_db(test_db_session, user.user_id, GoalCreate(value=300, type="Despesa", category="Moradia"))
+    crud_goals.delete_goal(test_db_session, user.user_id, goal.goal_id)
+
+    assert_statements_use_index(test_db_session, captured_statements)
+
+def test_user_summary_single_statement(test_db_session, user_with_data, captured_statements):
+    '''
+    Testa se o resumo do dashboard (usuário, totais, categorias e metas) sai de uma única consulta
+    '''
+    user, _, _ = user_with_data
+    user_id = user.user_id
+    captured_statements.clear()
+
+    summary = crud_transactions.get_user_summary(test_db_session, user_id, date(2025, 1, 1), date(2025, 12, 31))
+
+    assert len(captured_statements) == 1
+    assert summary == {"user_exists": True,
+                       "totals": {"Receita": 0, "Despesa": 10},
+                       "by_category": {"Receita": {}, "Despesa": {"Moradia": 10}},
+                       "goals": {"Despesa": 100, "Receita": 0}}
+    assert crud_transactions.get_user_summary(test_db_session, user_id + 999)["user_exists"] is False
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from fastapi.routing import APIRoute
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from database.config import create_db_engine, get_db, get_import_db, get_read_db, get_stream_db
+from main import app
+
+def dependency_calls(dependant):
+    for dependency in dependant.dependencies:
+        yield dependency.call
+        yield from dependency_calls(dependency)
+
+def test_get_routes_use_read_session():
+    '''
+    Testa se as rotas GET usam a sessão só de leitura e as de escrita a sessão comum
+    '''
+    checked = 0
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+
+        calls = set(dependency_calls(route.dependant)) & {get_db, get_read_db, get_import_db, get_stream_db}
+        if not calls:
+            continue
+
+        if route.methods == {"GET"}:
+            assert calls <= {get_read_db, get_stream_db}, route.path
+        else:
+            assert calls <= {get_db, get_import_db}, route.path
+        checked += 1
+
+    assert checked > 0
+
+def test_only_import_and_listing_are_async():
+    '''
+    Testa se só a importação em lote e a listagem de transações rodam no event loop (e podem
+    receber AsyncSession); as demais rotas com banco são "def" e rodam no threadpool
+    '''
+    async_routes = set()
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+
+        calls = set(dependency_calls(route.dependant))
+        if get_import_db in calls or get_stream_db in calls:
+            assert asyncio.iscoroutinefunction(route.endpoint), route.path
+            async_routes.add(route.path)
+        elif calls & {get_db, get_read_db}:
+            assert not asyncio.iscoroutinefunction(route.endpoint), route.path
+
+    assert async_routes == {"/{user_id}/transactions/bulk", "/{user_id}/transactions/"}
+
+def test_read_engine_is_read_only(tmp_path):
+    '''
+    Testa se a engine de leitura enxerga o que foi gravado, recusa escritas e não espera o escritor (WAL)
+    '''
+    url = f"sqlite:///{tmp_path / 'read.db'}"
+    engine = create_db_engine(url)
+    read_engine = create_db_engine(url, read_only=True)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+            conn.execute(text("INSERT INTO items VALUES (1)"))
+
+        with read_engine.connect() as reader:
+            assert reader.execute(text("SELECT count(*) FROM items")).scalar() == 1
+
+            with pytest.raises(OperationalError, match="readonly"):
+                reader.execute(text("INSERT INTO items VALUES (2)"))
+            reader.rollback()
+
+            # Com a trava de escrita ocupada, a leitura responde na hora com o último commit
+            with engine.connect() as writer:
+                writer.exec_driver_sql("BEGIN IMMEDIATE")
+                writer.execute(text("INSERT INTO items VALUES (3)"))
+                assert reader.execute(text("SELECT count(*) FROM items")).scalar() == 1
+                writer.commit()
+    finally:
+        engine.dispose()
+        read_engine.dispose()
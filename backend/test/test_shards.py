@@ -0,0 +1,162 @@
+import pytest
+from datetime import date
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from database import config
+from database import transactions as crud_transactions
+from database.config import create_db_engine, create_shard_engine, shard_of, shard_urls
+from database.migrations import move_to_shards, run_migrations
+from main import app
+from services.goal_service import get_goals_progress_for_users
+from utils.cache import dashboard_cache
+
+SHARDS = 2
+
+@pytest.fixture(scope='function')
+def sharded_databases(tmp_path, monkeypatch):
+    '''
+    Cria um banco principal e dois shards em um diretório temporário e faz get_db usá-los
+    '''
+    directory_url = f"sqlite:///{tmp_path / 'main.db'}"
+    engine = create_db_engine(directory_url)
+    shard_engines = [create_shard_engine(url, directory_url) for url in shard_urls(directory_url, SHARDS)]
+    read_engine = create_db_engine(directory_url, read_only=True)
+    read_shard_engines = [create_shard_engine(url, directory_url, read_only=True) for url in shard_urls(directory_url, SHARDS)]
+
+    run_migrations(engine)
+    for shard_engine in shard_engines:
+        run_migrations(shard_engine, shard=True)
+
+    monkeypatch.setattr(config, "DB_SHARDS", SHARDS)
+    monkeypatch.setattr(config, "SessionLocal", sessionmaker(autoflush=False, bind=engine))
+    monkeypatch.setattr(config, "ShardSessionLocal", [sessionmaker(autoflush=False, bind=shard_engine) for shard_engine in shard_engines])
+    monkeypatch.setattr(config, "ReadSessionLocal", sessionmaker(autoflush=False, bind=read_engine))
+    monkeypatch.setattr(config, "ReadShardSessionLocal", [sessionmaker(autoflush=False, bind=shard_engine) for shard_engine in read_shard_engines])
+    dashboard_cache.clear()
+
+    yield engine, shard_engines
+
+    dashboard_cache.clear()
+    for db_engine in [engine, *shard_engines, read_engine, *read_shard_engines]:
+        db_engine.dispose()
+
+def count_rows(db_engine, table):
+    with db_engine.connect() as conn:
+        return conn.execute(text(f"SELECT count(*) FROM main.{table}")).scalar()
+
+def test_shard_urls():
+    assert shard_urls("sqlite:///./database/transactions.db", 2) == [
+        "sqlite:///database/transactions.shard0.db",
+        "sqlite:///database/transactions.shard1.db",
+    ]
+    assert [shard_of(user_id, 4) for user_id in range(1, 6)] == [1, 2, 3, 0, 1]
+
+    with pytest.raises(RuntimeError):
+        shard_urls("sqlite://", 2)
+    with pytest.raises(RuntimeError):
+        shard_urls("postgresql://localhost/app", 2)
+
+def test_requests_use_the_user_shard(sharded_databases):
+    '''
+    Testa se cadastro e login usam o banco principal e as rotas /{user_id}/... o shard do usuário
+    '''
+    engine, shard_engines = sharded_databases
+    client = TestClient(app)
+
+    user_ids = []
+    for index in range(SHARDS):
+        response = client.post("/users", json={"name": "Fulano Shard", "email": f"shard{index}@gmail.com", "password": "Senha@Forte123"})
+        user_ids.append(response.json()["user"]["id"])
+
+        user_id = user_ids[-1]
+        assert client.post(f"/{user_id}/transactions", json={"date": "2025-04-20", "value": 10 + index, "type": "Despesa",
+                                                             "category": "Transporte", "description": "Uber"}).status_code == 201
+        assert client.post(f"/{user_id}/goals", json={"value": 100, "type": "Despesa", "category": "Transporte"}).status_code == 201
+
+    assert client.post("/users/login", json={"email": "shard0@gmail.com", "password": "Senha@Forte123"}).status_code == 200
+
+    # Os usuários ficam só no banco principal; transações e metas, só no shard de cada um
+    assert count_rows(engine, "users") == SHARDS
+    assert count_rows(engine, "transactions") == 0
+    assert {shard_of(user_id, SHARDS) for user_id in user_ids} == set(range(SHARDS))
+    for shard_engine in shard_engines:
+        assert not inspect(shard_engine).has_table("users")
+        assert count_rows(shard_engine, "transactions") == 1
+        assert count_rows(shard_engine, "goals") == 1
+
+    for index, user_id in enumerate(user_ids):
+        listing = client.get(f"/{user_id}/transactions", params={"search": "uber"})
+        assert [t["transaction_value"] for t in listing.json()] == [10 + index]
+        assert client.get(f"/{user_id}/transactions", headers={"If-None-Match": listing.headers["ETag"]},
+                          params={"search": "uber"}).status_code == 304
+
+        # O resumo junta a tabela de usuários (banco principal) com as transações e metas (shard)
+        info = client.get(f"/users/{user_id}/info").json()
+        assert info["financialData"]["totalExpense"] == 10 + index
+        assert info["generalGoals"] == [{"goal_type": "Despesa", "goal_value": 100}, {"goal_type": "Receita", "goal_value": 0}]
+
+    assert client.get("/999/transactions").status_code == 404
+
+def test_move_to_shards(sharded_databases):
+    '''
+    Testa se os dados gravados no banco principal antes do sharding vão para o shard de cada usuário
+    '''
+    engine, shard_engines = sharded_databases
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (user_id, user_email, user_name, user_hashed_password) "
+                          "VALUES (1, 'a@b.com', 'A', 'hash'), (2, 'b@b.com', 'B', 'hash')"))
+        conn.execute(text("INSERT INTO transactions VALUES (1, 1, '2025-03-01', 1000, 'Despesa', 'Moradia', 'Aluguel'), "
+                          "(2, 2, '2025-03-02', 500, 'Despesa', 'Moradia', 'Condomínio'), "
+                          "(2, 3, '2025-04-02', 700, 'Receita', 'Salário', '')"))
+        conn.execute(text("INSERT INTO goals VALUES (2, 1, 800, 'Despesa', 'Moradia')"))
+
+    move_to_shards(shard_engines)
+    # Repetir não duplica nada
+    move_to_shards(shard_engines)
+
+    for table in ("transactions", "goals", "monthly_balances"):
+        assert count_rows(engine, table) == 0
+
+    odd, even = shard_engines[1], shard_engines[0]
+    assert count_rows(odd, "transactions") == 1
+    assert count_rows(even, "transactions") == 2
+    assert count_rows(even, "goals") == 1
+
+    # Os triggers do shard montaram o resumo mensal e o índice de busca
+    with sessionmaker(bind=even)() as db:
+        assert crud_transactions.get_transaction_sum_by_month(db, 2, date(2025, 3, 1), date(2025, 4, 30)) == {
+            "2025-03": {"Despesa": 5}, "2025-04": {"Receita": 7}}
+        assert [t.transaction_id for t in crud_transactions.get_transactions_by_user(db, 2, search="condominio")] == [2]
+        assert crud_transactions.get_user_summary(db, 2)["totals"] == {"Receita": 7, "Despesa": 5}
+
+def test_goal_progress_batch_reads_every_shard(sharded_databases):
+    '''
+    Testa se o progresso em lote percorre todos os shards e junta os usuários em ordem de ID
+    '''
+    client = TestClient(app)
+
+    user_ids = []
+    for index in range(4):
+        response = client.post("/users", json={"name": "Fulano Shard", "email": f"lote{index}@gmail.com", "password": "Senha@Forte123"})
+        user_ids.append(response.json()["user"]["id"])
+
+    # O último usuário fica sem metas
+    for index, user_id in enumerate(user_ids[:3]):
+        client.post(f"/{user_id}/goals", json={"value": 500, "type": "Despesa", "category": "Moradia"})
+        client.post(f"/{user_id}/transactions", json={"date": "2025-04-20", "value": 100 * (index + 1), "type": "Despesa",
+                                                      "category": "Moradia", "description": ""})
+    assert {shard_of(user_id, SHARDS) for user_id in user_ids} == set(range(SHARDS))
+
+    expected = {user_id: client.get(f"/{user_id}/goals/info").json() for user_id in user_ids}
+    assert [goal["goal_progress"] for goal in expected[user_ids[2]]] == [300]
+    assert expected[user_ids[3]] == []
+
+    with config.SessionLocal() as db:
+        everyone = [(user_id, [goal.model_dump() for goal in goals]) for user_id, goals in get_goals_progress_for_users(db)]
+        assert everyone == sorted(expected.items())
+
+        chosen = [user_ids[3], user_ids[0], user_ids[1] + 100, user_ids[1]]
+        batch = [(user_id, [goal.model_dump() for goal in goals]) for user_id, goals in get_goals_progress_for_users(db, chosen, chunk_size=1)]
+        assert batch == sorted((user_id, expected[user_id]) for user_id in (user_ids[0], user_ids[1], user_ids[3]))
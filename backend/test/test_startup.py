@@ -0,0 +1,49 @@
+from sqlalchemy import text
+
+from database.config import create_db_engine, warm_up_engine
+from database.warmup import warm_up_queries
+from utils.settings import Settings, get_settings
+
+def test_settings_are_read_once(monkeypatch):
+    '''
+    Testa se as configurações vêm do ambiente e se get_settings devolve sempre a mesma instância
+    '''
+    monkeypatch.setenv("CACHE_TTL", "42")
+    monkeypatch.setenv("DB_ASYNC", "true")
+    settings = Settings()
+    assert settings.cache_ttl == 42
+    assert settings.db_async is True
+
+    assert get_settings() is get_settings()
+    assert get_settings().cache_ttl != 42
+
+def test_warm_up_opens_pool_connections(tmp_path):
+    '''
+    Testa se o aquecimento deixa conexões abertas no pool, já com os PRAGMAs aplicados
+    '''
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'warm.db'}")
+    try:
+        warm_up_engine(engine, 3)
+        assert engine.pool.checkedin() == 3
+
+        with engine.connect() as conn:
+            assert engine.pool.checkedin() == 2
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+
+        # Sem quantidade informada, enche o pool
+        warm_up_engine(engine)
+        assert engine.pool.checkedin() == engine.pool.size()
+    finally:
+        engine.dispose()
+
+def test_warm_up_queries_fill_statement_cache(test_db_session):
+    '''
+    Testa se o aquecimento deixa as consultas de leitura compiladas sem gravar nada no banco
+    '''
+    engine = test_db_session.get_bind()
+    engine.clear_compiled_cache()
+
+    warm_up_queries(test_db_session)
+
+    assert len(engine._compiled_cache) > 0
+    assert not test_db_session.new and not test_db_session.dirty
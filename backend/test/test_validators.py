@@ -0,0 +1,51 @@
+import pytest
+from datetime import date, datetime as dt, timedelta
+from fastapi import HTTPException
+
+from pydantic import ValidationError
+
+from database.schemas import TransactionCreate, TransactionData
+from utils.validators import validate_transaction
+
+def make(**fields):
+    return TransactionCreate(**{"date": "2025-04-20", "value": 10, "type": "Despesa", "category": "Moradia", **fields})
+
+def test_validate_transaction_normalizes_date():
+    '''
+    Testa se a validação devolve a transação com a data já convertida (e a hora descartada)
+    '''
+    assert make().date == "2025-04-20"
+    assert validate_transaction(make()) == TransactionData(date=date(2025, 4, 20), value=10, type="Despesa", category="Moradia")
+    assert validate_transaction(make(date="2025-04-20T23:59:00-03:00")).date == date(2025, 4, 20)
+
+def test_transaction_date_must_be_text():
+    '''
+    Testa se a data da requisição só é aceita como texto (um número não vira data por coerção)
+    '''
+    for value in (4102444800, 20250420, date(2025, 4, 20)):
+        with pytest.raises(ValidationError):
+            make(date=value)
+
+@pytest.mark.parametrize("fields, detail", [
+    ({"type": "Outro", "category": "Nenhuma", "value": -1}, "Tipo informado é inválido. Informe um entre [Receita, Despesa]."),
+    ({"type": "Receita", "value": -1}, "Categoria informada é inválida. Informe uma entre [Salário, Freelance, Investimentos, Outros]."),
+    ({"value": 0, "date": "ontem"}, "Valor informado é inválido. Informe um valor maior ou igual a zero."),
+    ({"date": "20/04/2025"}, "O formato da data informada é inválido. O formato esperado é YYYY-MM-DD (ou outro no formato ISO)"),
+    ({"date": (date.today() + timedelta(days=1)).isoformat()}, "A data informada é no futuro. Informe uma data até o dia atual."),
+])
+def test_validate_transaction_first_error(fields, detail):
+    '''
+    Testa se a validação em uma passada informa o primeiro campo inválido, na ordem tipo, categoria, valor e data
+    '''
+    with pytest.raises(HTTPException) as error:
+        validate_transaction(make(**fields))
+    assert error.value.status_code == 400
+    assert error.value.detail == detail
+
+def test_validate_transaction_reference_time():
+    '''
+    Testa se o momento de referência informado (usado na importação em lote) é respeitado
+    '''
+    with pytest.raises(HTTPException):
+        validate_transaction(make(date="2025-04-20"), now=dt(2025, 4, 19))
+    assert validate_transaction(make(date="2025-04-20"), now=dt(2025, 4, 20, 12)).date == date(2025, 4, 20)
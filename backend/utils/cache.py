@@ -0,0 +1,271 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+from datetime import date
+
+from pydantic import TypeAdapter
+
+from utils.settings import get_settings
+
+settings = get_settings()
+
+# Backend do cache dos resumos: memory (padrão), redis ou none
+CACHE_BACKEND = settings.cache_backend.lower()
+
+# Tempo de vida de cada resumo em segundos
+CACHE_TTL = settings.cache_ttl
+
+# Máximo de resumos guardados no cache em memória (LRU)
+CACHE_MAX_ENTRIES = settings.cache_max_entries
+
+# Servidor compatível com Redis (Redis, Valkey, KeyDB, Dragonfly...)
+CACHE_REDIS_URL = settings.cache_redis_url
+
+
+class MemoryCache:
+    """
+    Cache LRU com TTL no próprio processo. Os resumos de cada usuário são indexados
+    para que a invalidação remova apenas as entradas dele.
+
+    Enquanto um resumo do usuário está sendo calculado, ele tem uma geração, trocada a cada
+    invalidação: set com a geração lida antes do cálculo não guarda um resumo calculado antes
+    de uma escrita concorrente. A geração só existe durante os cálculos (generation até release),
+    então a memória não cresce com a quantidade de usuários que já escreveram.
+    """
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: int = CACHE_TTL) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple, tuple[float, object]] = OrderedDict()
+        self._keys_by_user: dict[int, set[tuple]] = {}
+        # user_id -> [geração, cálculos em andamento]; gerações de um contador único, nunca repetidas
+        self._generations: dict[int, list[int]] = {}
+        self._next_generation = count(1)
+        self._lock = threading.Lock()
+
+    def _remove(self, key: tuple) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+    def get(self, key: tuple, response_type=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def generation(self, user_id: int) -> int:
+        # Início de um cálculo: deve ser seguido de release(user_id)
+        with self._lock:
+            state = self._generations.setdefault(user_id, [next(self._next_generation), 0])
+            state[1] += 1
+            return state[0]
+
+    def release(self, user_id: int) -> None:
+        # Fim de um cálculo: sem outros em andamento, a geração do usuário é descartada
+        with self._lock:
+            state = self._generations.get(user_id)
+            if state is not None:
+                state[1] -= 1
+                if state[1] <= 0:
+                    del self._generations[user_id]
+
+    def set(self, key: tuple, value, response_type=None, generation: int | None = None) -> None:
+        with self._lock:
+            if generation is not None:
+                state = self._generations.get(key[0])
+                if state is None or state[0] != generation:
+                    return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            # Só importa para os cálculos em andamento; sem nenhum, não há geração a guardar
+            state = self._generations.get(user_id)
+            if state is not None:
+                state[0] = next(self._next_generation)
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            # Cálculos em andamento também não guardam mais nada (set não encontra a geração)
+            self._generations.clear()
+
+
+class RedisCache:
+    """
+    Cache compartilhado entre processos em um servidor compatível com Redis.
+    Cada usuário tem um hash com os seus resumos, então a invalidação é um único DEL.
+    A remoção por memória fica a cargo do servidor (ex.: maxmemory-policy allkeys-lru).
+
+    A geração de cada usuário também fica no servidor (INCR na invalidação), e set a compara
+    no próprio servidor antes de gravar: vale para todos os workers, e não só para o processo.
+    """
+    # Grava o resumo só se a geração não mudou desde a leitura (atômico no servidor)
+    _SET_IF_GENERATION = """
+    if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[3] then
+        return 0
+    end
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+    return 1
+    """
+
+    def __init__(self, url: str = CACHE_REDIS_URL, ttl: int = CACHE_TTL) -> None:
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requer o pacote redis (pip install redis).")
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self._set_if_generation = self.client.register_script(self._SET_IF_GENERATION)
+
+    @staticmethod
+    def _user_key(user_id: int) -> str:
+        return f"dashboard:{user_id}"
+
+    @staticmethod
+    def _generation_key(user_id: int) -> str:
+        return f"dashboard:{user_id}:generation"
+
+    @staticmethod
+    def _field(key: tuple) -> str:
+        return ":".join(str(part) for part in key[1:])
+
+    def get(self, key: tuple, response_type=None):
+        raw = self.client.hget(self._user_key(key[0]), self._field(key))
+        if raw is None:
+            return None
+        return TypeAdapter(response_type).validate_json(raw)
+
+    def generation(self, user_id: int) -> int:
+        return int(self.client.get(self._generation_key(user_id)) or 0)
+
+    def release(self, user_id: int) -> None:
+        # A geração no servidor expira sozinha (ver invalidate_user)
+        pass
+
+    def set(self, key: tuple, value, response_type=None, generation: int | None = None) -> None:
+        user_key = self._user_key(key[0])
+        raw = TypeAdapter(response_type).dump_json(value)
+        if generation is not None:
+            self._set_if_generation(keys=[user_key, self._generation_key(key[0])],
+                                    args=[self._field(key), raw, generation, self.ttl])
+            return
+
+        pipeline = self.client.pipeline()
+        pipeline.hset(user_key, self._field(key), raw)
+        pipeline.expire(user_key, self.ttl)
+        pipeline.execute()
+
+    def invalidate_user(self, user_id: int) -> None:
+        # A geração só precisa durar mais que um cálculo em andamento: expira junto com os resumos
+        pipeline = self.client.pipeline()
+        pipeline.incr(self._generation_key(user_id))
+        pipeline.expire(self._generation_key(user_id), self.ttl)
+        pipeline.delete(self._user_key(user_id))
+        pipeline.execute()
+
+    def clear(self) -> None:
+        for user_key in self.client.scan_iter("dashboard:*"):
+            self.client.delete(user_key)
+
+
+class DashboardCache:
+    """
+    Cache dos resumos do dashboard, chaveado por (user_id, endpoint, início, fim, dia atual se não houver fim),
+    com contadores de acertos e falhas por endpoint.
+    """
+    def __init__(self, backend: MemoryCache | RedisCache | None) -> None:
+        self.backend = backend
+        self._stats: dict[str, dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, endpoint: str, outcome: str) -> None:
+        with self._stats_lock:
+            counters = self._stats.setdefault(endpoint, {"hits": 0, "misses": 0})
+            counters[outcome] += 1
+
+    def cached(self, endpoint: str, response_type):
+        '''
+        Decorador para funções de serviço no formato fn(user_id, db, start_date, end_date)
+
+        Parâmetros:
+        endpoint (str): nome do resumo, parte da chave do cache
+        response_type: tipo devolvido pela função (usado para serializar no Redis)
+        '''
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(user_id: int, db, start_date: date | None = None, end_date: date | None = None):
+                if self.backend is None:
+                    return fn(user_id=user_id, db=db, start_date=start_date, end_date=end_date)
+
+                # Sem end_date o período padrão termina hoje (ex.: os 12 meses de transactions_info):
+                # o dia entra na chave, e o resumo de ontem não é servido depois da meia-noite
+                key = (user_id, endpoint, start_date, end_date, date.today() if end_date is None else None)
+                value = self.backend.get(key, response_type)
+                if value is not None:
+                    self._count(endpoint, "hits")
+                    return value
+
+                self._count(endpoint, "misses")
+                # Lida antes do cálculo: o backend descarta o resumo se houver uma escrita no meio
+                generation = self.backend.generation(user_id)
+                try:
+                    value = fn(user_id=user_id, db=db, start_date=start_date, end_date=end_date)
+                    self.backend.set(key, value, response_type, generation)
+                finally:
+                    self.backend.release(user_id)
+                return value
+            return wrapper
+        return decorator
+
+    def invalidate_user(self, user_id: int) -> None:
+        '''
+        Descarta todos os resumos do usuário. Chamado após qualquer escrita de transação ou meta dele
+        '''
+        if self.backend is not None:
+            self.backend.invalidate_user(user_id)
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+        with self._stats_lock:
+            self._stats.clear()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "backend": CACHE_BACKEND,
+                "endpoints": {endpoint: dict(counters) for endpoint, counters in self._stats.items()},
+                "hits": sum(counters["hits"] for counters in self._stats.values()),
+                "misses": sum(counters["misses"] for counters in self._stats.values()),
+            }
+
+
+def _create_backend():
+    if CACHE_BACKEND == "memory":
+        return MemoryCache()
+    if CACHE_BACKEND == "redis":
+        return RedisCache()
+    return None
+
+dashboard_cache = DashboardCache(_create_backend())
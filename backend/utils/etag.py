@@ -0,0 +1,95 @@
+import zlib
+from datetime import date
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+
+from adapter.json_store import get_store
+from database.config import get_read_db
+from database.versions import get_user_version
+from utils.settings import get_settings
+
+def build_etag(user_id: int, version: int, request: Request, source: str = "") -> str:
+    '''
+    Monta o ETag da resposta a partir da versão dos dados do usuário e da URL consultada
+
+    Parâmetros:
+    user_id (int): ID do usuário dono dos dados
+    version (int): versão atual dos dados do usuário
+    request (Request): requisição (caminho e query string entram no ETag)
+    source (str): versão da fonte de dados fora do banco (ver _data_source_version)
+
+    Retorna:
+    str: ETag fraco no formato W/"usuario.versao.url" (ou W/"usuario.versao.fonte.url")
+    '''
+    url = f"{request.url.path}?{request.url.query}".encode()
+    if source:
+        return f'W/"{user_id}.{version}.{source}.{zlib.crc32(url):08x}"'
+    return f'W/"{user_id}.{version}.{zlib.crc32(url):08x}"'
+
+def _data_source_version() -> str:
+    # Com DATA_SOURCE=json as transações vêm do arquivo, que muda sem passar pelas escritas da API
+    # (e sem mudar a versão do usuário): o ETag inclui o mtime e o tamanho dele
+    settings = get_settings()
+    if (settings.data_source or "db").lower() != "json":
+        return ""
+    try:
+        mtime_ns, size = get_store(settings.json_data_path).signature()
+    except FileNotFoundError:
+        # A própria rota responde o erro do arquivo ausente
+        return "missing"
+    return f"{mtime_ns:x}-{size:x}"
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+def _conditional_get(user_id: int, request: Request, response: Response, db: Session, *sources: str) -> str:
+    # Versão do usuário + fontes extras (arquivo JSON, dia do período padrão): 304 se o cliente já tiver o ETag
+    version = get_user_version(user_id=user_id, db=db)
+    etag = build_etag(user_id, version, request, ".".join(source for source in (_data_source_version(), *sources) if source))
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return etag
+
+def user_etag(
+    user_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db)
+) -> str:
+    '''
+    Dependência das rotas GET: consulta só a versão dos dados do usuário e, se o cliente
+    já tiver essa versão (If-None-Match), responde 304 antes das consultas da rota.
+
+    Retorna:
+    str: ETag da resposta (já incluído nos cabeçalhos das respostas comuns)
+
+    Levanta:
+    HTTPException: 304 NOT MODIFIED se o ETag enviado ainda for o atual
+    '''
+    return _conditional_get(user_id, request, response, db)
+
+def dated_user_etag(
+    user_id: int,
+    request: Request,
+    response: Response,
+    end_date: date | None = None,
+    db: Session = Depends(get_read_db)
+) -> str:
+    '''
+    Igual a user_etag, para as rotas cujo período padrão (sem end_date) termina no dia atual:
+    nesse caso o dia entra no ETag, e a virada do dia (ou do mês) devolve o período novo em vez de 304
+
+    Retorna:
+    str: ETag da resposta
+
+    Levanta:
+    HTTPException: 304 NOT MODIFIED se o ETag enviado ainda for o atual
+    '''
+    today = date.today().isoformat() if end_date is None else ""
+    return _conditional_get(user_id, request, response, db, today)
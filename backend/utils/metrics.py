@@ -0,0 +1,253 @@
+import heapq
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.settings import get_settings
+
+settings = get_settings()
+
+# Liga a instrumentação das requisições e do banco
+METRICS_ENABLED = settings.metrics_enabled
+
+# Fração das requisições em que os comandos SQL são medidos (0 a 1); as demais só contam duração e status
+METRICS_SAMPLE_RATE = settings.metrics_sample_rate
+
+# Comandos mais lentos que isso (ms) são registrados no log e contados como lentos
+METRICS_SLOW_QUERY_MS = settings.metrics_slow_query_ms
+
+# Quantidade de comandos mais lentos guardados (por requisição e no total do processo)
+METRICS_TOP_STATEMENTS = settings.metrics_top_statements
+
+# Inclui o texto dos comandos mais lentos no Server-Timing (expõe SQL ao cliente: só em desenvolvimento)
+METRICS_SERVER_TIMING_STATEMENTS = settings.metrics_server_timing_statements
+
+# Limites (em segundos) dos histogramas de duração
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+logger = logging.getLogger("metrics")
+
+
+class RequestMetrics:
+    """
+    Comandos SQL executados durante uma requisição amostrada
+    """
+    __slots__ = ("statements", "db_time", "slow", "slowest")
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.db_time = 0.0
+        self.slow = 0
+        # Heap de (duração, comando) com os METRICS_TOP_STATEMENTS mais lentos
+        self.slowest: list[tuple[float, str]] = []
+
+    def record(self, statement: str, duration: float) -> None:
+        self.statements += 1
+        self.db_time += duration
+        if duration * 1000 >= METRICS_SLOW_QUERY_MS:
+            self.slow += 1
+        if len(self.slowest) < METRICS_TOP_STATEMENTS:
+            heapq.heappush(self.slowest, (duration, statement))
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (duration, statement))
+
+
+# Métricas da requisição em andamento (None quando a requisição não foi amostrada)
+_current: ContextVar[RequestMetrics | None] = ContextVar("request_metrics", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+
+
+class MetricsRegistry:
+    """
+    Contadores e histogramas do processo, exportados no formato texto do Prometheus
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests: dict[tuple[str, str, int], int] = {}
+            self.request_duration: dict[str, Histogram] = {}
+            self.db_statements: dict[str, Histogram] = {}
+            self.db_time: dict[str, float] = {}
+            self.slow_statements: dict[str, int] = {}
+            # Comando -> maior duração observada, limitado aos METRICS_TOP_STATEMENTS mais lentos
+            self.slowest: dict[str, float] = {}
+
+    def observe_request(self, method: str, route: str, status: int, duration: float, sample: RequestMetrics | None) -> None:
+        with self._lock:
+            key = (method, route, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.request_duration.setdefault(route, Histogram(DURATION_BUCKETS)).observe(duration)
+
+            if sample is None:
+                return
+
+            self.db_statements.setdefault(route, Histogram(STATEMENT_COUNT_BUCKETS)).observe(sample.statements)
+            self.db_time[route] = self.db_time.get(route, 0.0) + sample.db_time
+            if sample.slow:
+                self.slow_statements[route] = self.slow_statements.get(route, 0) + sample.slow
+
+            for statement_duration, statement in sample.slowest:
+                if statement_duration > self.slowest.get(statement, 0.0):
+                    self.slowest[statement] = statement_duration
+            if len(self.slowest) > METRICS_TOP_STATEMENTS:
+                kept = heapq.nlargest(METRICS_TOP_STATEMENTS, self.slowest.items(), key=lambda item: item[1])
+                self.slowest = dict(kept)
+
+    def render(self, extra: list[str] | None = None) -> str:
+        '''
+        Gera o texto de /metrics (formato de exposição do Prometheus, versão 0.0.4)
+        '''
+        lines = []
+        with self._lock:
+            lines += ["# HELP http_requests_total Requisições HTTP atendidas.",
+                      "# TYPE http_requests_total counter"]
+            for (method, route, status), value in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {value}')
+
+            lines += _histogram_lines("http_request_duration_seconds", "Duração das requisições HTTP.", self.request_duration)
+            lines += _histogram_lines("db_statements_per_request", "Comandos SQL por requisição (amostradas).", self.db_statements)
+
+            lines += ["# HELP db_time_seconds_total Tempo gasto no banco pelas requisições amostradas.",
+                      "# TYPE db_time_seconds_total counter"]
+            for route, value in sorted(self.db_time.items()):
+                lines.append(f'db_time_seconds_total{{route="{_escape(route)}"}} {value:.6f}')
+
+            lines += ["# HELP db_slow_statements_total Comandos SQL acima de METRICS_SLOW_QUERY_MS.",
+                      "# TYPE db_slow_statements_total counter"]
+            for route, value in sorted(self.slow_statements.items()):
+                lines.append(f'db_slow_statements_total{{route="{_escape(route)}"}} {value}')
+
+            lines += ["# HELP db_slowest_statement_seconds Maior duração observada dos comandos SQL mais lentos.",
+                      "# TYPE db_slowest_statement_seconds gauge"]
+            for statement, value in sorted(self.slowest.items(), key=lambda item: -item[1]):
+                lines.append(f'db_slowest_statement_seconds{{statement="{_escape(_compact(statement))}"}} {value:.6f}')
+
+        return "\n".join(lines + (extra or [])) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+def _compact(statement: str, limit: int = 200) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit - 3] + "..."
+
+def _histogram_lines(name: str, description: str, histograms: dict[str, Histogram]) -> list[str]:
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+    for route, histogram in sorted(histograms.items()):
+        label = f'route="{_escape(route)}"'
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+        cumulative += histogram.counts[-1]
+        lines.append(f'{name}_bucket{{{label},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{label}}} {histogram.total:.6f}")
+        lines.append(f"{name}_count{{{label}}} {cumulative}")
+    return lines
+
+registry = MetricsRegistry()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    sample = _current.get()
+    if sample is None:
+        return
+    starts = conn.info.get("metrics_start")
+    if not starts:
+        return
+
+    duration = time.perf_counter() - starts.pop()
+    sample.record(statement, duration)
+    if duration * 1000 >= METRICS_SLOW_QUERY_MS:
+        logger.warning("Comando SQL lento (%.1f ms): %s", duration * 1000, _compact(statement, 500))
+
+def instrument_engine(engine: Engine) -> None:
+    '''
+    Registra os eventos que medem cada comando SQL da engine (síncrona ou engine.sync_engine da assíncrona)
+
+    Fora de uma requisição amostrada os eventos só consultam a ContextVar e retornam
+    '''
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def server_timing(sample: RequestMetrics, total: float) -> str:
+    '''
+    Valor do cabeçalho Server-Timing: tempo no banco, quantidade de comandos e tempo total até a resposta
+    '''
+    parts = [f'db;desc="{sample.statements} statements";dur={sample.db_time * 1000:.2f}']
+    if METRICS_SERVER_TIMING_STATEMENTS:
+        for rank, (duration, statement) in enumerate(sorted(sample.slowest, reverse=True), start=1):
+            parts.append(f'sql{rank};desc="{_escape(_compact(statement, 100))}";dur={duration * 1000:.2f}')
+    parts.append(f"app;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede cada requisição HTTP. Nas amostradas (METRICS_SAMPLE_RATE) também
+    conta os comandos SQL e o tempo no banco, devolvidos no cabeçalho Server-Timing.
+    Respostas em stream continuam contando os comandos executados durante o envio do corpo.
+    """
+    def __init__(self, app, sample_rate: float | None = None) -> None:
+        self.app = app
+        # None: usa METRICS_SAMPLE_RATE
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        sample_rate = METRICS_SAMPLE_RATE if self.sample_rate is None else self.sample_rate
+        sample = RequestMetrics() if random.random() < sample_rate else None
+        token = _current.set(sample)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if sample is not None:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(sample, time.perf_counter() - start).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            registry.observe_request(scope["method"], route.path if route else "unmatched", status,
+                                     time.perf_counter() - start, sample)
@@ -0,0 +1,66 @@
+import base64
+from datetime import date
+
+from fastapi import HTTPException, status
+
+def encode_cursor(transaction_date: date | str, transaction_id: int) -> str:
+    '''
+    Gera o cursor opaco que aponta para a transação informada
+
+    Parâmetros:
+    transaction_date (date | str): data da última transação entregue (date ou texto ISO)
+    transaction_id (int): ID da última transação entregue
+
+    Retorna:
+    str: cursor a ser enviado no parâmetro "after" da próxima página
+    '''
+    raw = f"{transaction_date}:{transaction_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[date, int]:
+    '''
+    Converte o cursor recebido de volta em (data, ID) da última transação entregue
+
+    Levanta:
+    HTTPException: se o cursor for inválido
+    '''
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        transaction_date, transaction_id = raw.split(":")
+        return date.fromisoformat(transaction_date), int(transaction_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido.",
+        )
+
+def encode_offset_cursor(offset: int) -> str:
+    '''
+    Gera o cursor opaco das listagens ordenadas por relevância (busca), que paginam por posição
+
+    Parâmetros:
+    offset (int): quantidade de resultados já entregues
+
+    Retorna:
+    str: cursor a ser enviado no parâmetro "after" da próxima página
+    '''
+    return base64.urlsafe_b64encode(f"offset:{offset}".encode()).decode().rstrip("=")
+
+def decode_offset_cursor(cursor: str) -> int:
+    '''
+    Converte o cursor de uma busca de volta na quantidade de resultados já entregues
+
+    Levanta:
+    HTTPException: se o cursor for inválido
+    '''
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, offset = raw.split(":")
+        if prefix != "offset" or int(offset) < 0:
+            raise ValueError(raw)
+        return int(offset)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido.",
+        )
@@ -1,6 +1,80 @@
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from utils.settings import get_settings
+
+settings = get_settings()
+
+# Custo do bcrypt. Ao mudar o valor, hashes antigos são refeitos no próximo login
+BCRYPT_ROUNDS = settings.bcrypt_rounds
+
+# Processos dedicados ao bcrypt (0 executa na própria thread da requisição)
+HASH_WORKERS = settings.password_hash_workers
+
+# Máximo de hashes aguardando ou em execução antes de responder 429
+HASH_MAX_PENDING = settings.password_hash_max_pending or max(HASH_WORKERS, 1) * 8
+
+password_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(HASH_MAX_PENDING)
+
+def _hash(password: str) -> str:
+    return password_context.hash(password)
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return password_context.verify_and_update(plain_password, hashed_password)
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+        return _pool
+
+def shutdown_pool() -> None:
+    '''
+    Encerra os processos de hash (chamado no encerramento da aplicação); um novo hash recria o pool
+    '''
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+def _submit(fn, *args) -> Future:
+    '''
+    Envia o cálculo para o pool de processos, recusando a requisição se a fila estiver cheia
+
+    Levanta:
+    HTTPException: 429 TOO MANY REQUESTS se já houver HASH_MAX_PENDING cálculos pendentes
+    '''
+    if not _pending.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Servidor ocupado. Tente novamente em instantes.",
+            headers={"Retry-After": "1"},
+        )
+
+    try:
+        if HASH_WORKERS > 0:
+            future = _get_pool().submit(fn, *args)
+        else:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+    except Exception:
+        _pending.release()
+        raise
+
+    future.add_done_callback(lambda _: _pending.release())
+    return future
 
 def get_password_hash(password: str) -> str:
     '''
@@ -10,9 +84,9 @@ def get_password_hash(password: str) -> str:
     password (str): string com a senha original.
 
     Retorna:
-    str: hash da senha    
+    str: hash da senha
     '''
-    return password_context.hash(password)
+    return _submit(_hash, password).result()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     '''
@@ -25,4 +99,17 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Retorna:
     bool: True se a senha bater, False caso contrário.
     '''
-    return password_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return verify_and_update_password(plain_password, hashed_password)[0]
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    '''
+    Verifica a senha e, se o hash salvo usar um custo diferente de BCRYPT_ROUNDS, gera um novo hash.
+
+    Parâmetros:
+    plain_password (str): A senha que o usuário digitou.
+    hashed_password (str): O hash que está salvo no banco.
+
+    Retorna:
+    tuple[bool, str | None]: se a senha bateu e o novo hash a ser salvo (ou None se não precisar trocar).
+    '''
+    return _submit(_verify_and_update, plain_password, hashed_password).result()
@@ -0,0 +1,78 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+# backend/.env, independente do diretório em que o servidor foi iniciado
+ENV_FILE = Path(__file__).resolve().parent.parent / ".env"
+
+
+class Settings(BaseSettings):
+    """
+    Configurações da aplicação, lidas das variáveis de ambiente e do arquivo .env
+    (as variáveis de ambiente têm prioridade). Os nomes seguem o .env.example, sem
+    diferenciar maiúsculas de minúsculas.
+    """
+    model_config = SettingsConfigDict(env_file=ENV_FILE, env_file_encoding="utf-8", extra="ignore")
+
+    # --- Banco de dados ---
+    database_url: str = "sqlite:///./database/transactions.db"
+    db_async: bool = False
+    # Banco das leituras (rotas GET), ex.: uma réplica do PostgreSQL (None: DATABASE_URL, só de leitura)
+    database_read_url: str | None = None
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -65536
+    sqlite_busy_timeout: int = 5000
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800
+    # Sharding por usuário (só SQLite em arquivo): 1 = um único banco
+    db_shards: int = 1
+    # Aplica as migrações pendentes na inicialização de cada worker (false: rodar `python -m database.migrations` no deploy)
+    db_migrate_on_startup: bool = True
+    # Conexões abertas na inicialização, antes da primeira requisição (None: o tamanho do pool)
+    db_warmup_connections: int | None = None
+    # Executa as consultas de leitura uma vez na inicialização, deixando o SQL compilado em cache
+    db_warmup_queries: bool = True
+
+    # --- Fonte de dados do Adapter ---
+    data_source: str = "db"
+    json_data_path: str = "./database/transactions.json"
+
+    # --- Importação em lote (POST /{user_id}/transactions/bulk) ---
+    bulk_max_bytes: int = 10 * 1024 * 1024
+    bulk_max_rows: int = 100000
+
+    # --- Hash de senhas ---
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = os.cpu_count() or 1
+    # None: 8 por processo de hash
+    password_hash_max_pending: int | None = None
+
+    # --- Cache dos resumos do dashboard ---
+    cache_backend: str = "memory"
+    cache_ttl: int = 300
+    cache_max_entries: int = 10000
+    cache_redis_url: str = "redis://localhost:6379/0"
+
+    # --- Métricas ---
+    metrics_enabled: bool = True
+    metrics_sample_rate: float = 1.0
+    metrics_slow_query_ms: float = 100
+    metrics_top_statements: int = 10
+    metrics_server_timing_statements: bool = False
+
+
+@lru_cache
+def get_settings() -> Settings:
+    '''
+    Configurações do processo, lidas uma única vez
+
+    Retorna:
+    Settings: a mesma instância em todas as chamadas (get_settings.cache_clear() força uma nova leitura)
+    '''
+    return Settings()
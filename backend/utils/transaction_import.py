@@ -0,0 +1,95 @@
+import csv
+import io
+import re
+
+from fastapi import HTTPException, status
+
+# Colunas esperadas no CSV, na mesma ordem dos campos de TransactionCreate
+CSV_COLUMNS = ["date", "value", "type", "category", "description"]
+
+_OFX_TRANSACTION = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.IGNORECASE | re.DOTALL)
+_OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+def parse_csv(content: bytes) -> list[dict]:
+    '''
+    Lê um arquivo CSV de transações com cabeçalho date,value,type,category,description
+
+    Parâmetros:
+    content (bytes): conteúdo do arquivo enviado
+
+    Retorna:
+    list[dict]: uma linha por transação, com as chaves de TransactionCreate
+
+    Levanta:
+    HTTPException: se o arquivo não estiver em UTF-8 ou o cabeçalho não tiver as colunas obrigatórias
+    '''
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"O arquivo CSV deve estar codificado em UTF-8 (byte inválido na posição {e.start}).",
+        )
+
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [column for column in CSV_COLUMNS[:4] if column not in (reader.fieldnames or [])]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Colunas ausentes no CSV: {', '.join(missing)}.",
+        )
+
+    return [{column: row.get(column) for column in CSV_COLUMNS} for row in reader]
+
+def parse_ofx(content: bytes) -> list[dict]:
+    '''
+    Lê as transações (<STMTTRN>) de um extrato bancário OFX
+
+    Valores positivos viram Receita e negativos viram Despesa, ambos na categoria "Outros".
+
+    Parâmetros:
+    content (bytes): conteúdo do arquivo enviado
+
+    Retorna:
+    list[dict]: uma linha por transação, com as chaves de TransactionCreate
+    '''
+    text = content.decode("latin-1")
+
+    rows = []
+    for block in _OFX_TRANSACTION.findall(text):
+        fields = {name.upper(): value.strip() for name, value in _OFX_FIELD.findall(block)}
+
+        posted = fields.get("DTPOSTED", "")
+        amount = fields.get("TRNAMT", "").replace(",", ".")
+        try:
+            value = float(amount)
+        except ValueError:
+            value = amount
+
+        rows.append({
+            "date": f"{posted[0:4]}-{posted[4:6]}-{posted[6:8]}" if len(posted) >= 8 else posted,
+            "value": abs(value) if isinstance(value, float) else value,
+            "type": "Despesa" if isinstance(value, float) and value < 0 else "Receita",
+            "category": "Outros",
+            "description": fields.get("MEMO") or fields.get("NAME"),
+        })
+
+    return rows
+
+def parse_file(filename: str | None, content: bytes) -> list[dict]:
+    '''
+    Escolhe o leitor de acordo com a extensão (ou o conteúdo) do arquivo enviado
+
+    Levanta:
+    HTTPException: se o formato não for CSV nem OFX
+    '''
+    name = (filename or "").lower()
+    if name.endswith(".ofx") or b"<OFX>" in content[:4096].upper():
+        return parse_ofx(content)
+    if name.endswith(".csv"):
+        return parse_csv(content)
+
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Formato de arquivo não suportado. Envie um arquivo .csv ou .ofx.",
+    )
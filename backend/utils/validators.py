@@ -1,9 +1,41 @@
 import re
-from datetime import datetime as dt
+from datetime import date, datetime as dt
 from fastapi import HTTPException, status
 
+from database.schemas import TransactionCreate, TransactionData
+
+# Tipos aceitos para metas e transações
+VALID_TYPES = frozenset({"Receita", "Despesa"})
+
+# Categorias aceitas para cada tipo, na ordem exibida nas mensagens de erro
+VALID_CATEGORIES = {"Receita": ("Salário", "Freelance", "Investimentos", "Outros"),
+                    "Despesa": ("Moradia", "Alimentação", "Transporte", "Entretenimento", "Utilidades", "Saúde", "Educação", "Outros")}
+
+# Mesmas categorias em conjuntos, para a verificação de pertinência
+_CATEGORY_SETS = {input_type: frozenset(categories) for input_type, categories in VALID_CATEGORIES.items()}
+
+# Expressões compiladas uma única vez, na importação do módulo
+EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+_UPPER_CASE = re.compile(r"[A-Z]")
+_LOWER_CASE = re.compile(r"[a-z]")
+_DIGIT = re.compile(r"\d")
+_SPECIAL_CHAR = re.compile(r"[!@#$%^&*(),.?\":{}|<>]")
+
+_INVALID_TYPE = "Tipo informado é inválido. Informe um entre [Receita, Despesa]."
+_INVALID_CATEGORY = {input_type: f"Categoria informada é inválida. Informe uma entre [{', '.join(categories)}]."
+                     for input_type, categories in VALID_CATEGORIES.items()}
+_INVALID_VALUE = "Valor informado é inválido. Informe um valor maior ou igual a zero."
+_INVALID_DATE = "O formato da data informada é inválido. O formato esperado é YYYY-MM-DD (ou outro no formato ISO)"
+_FUTURE_DATE = "A data informada é no futuro. Informe uma data até o dia atual."
+
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
 class FieldValidator:
 
+    # Mantido para quem lista as categorias (ex.: bench.generator)
+    VALID_CATEGORIES = VALID_CATEGORIES
+
     @staticmethod
     def validate_type(input_type: str):
         '''
@@ -18,12 +50,8 @@ class FieldValidator:
         Levanta:
         HTTPException: se o tipo for inválido
         '''
-        valid_types = ["Receita", "Despesa"]
-        if input_type not in valid_types:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Tipo informado é inválido. Informe um entre [Receita, Despesa].",
-            )
+        if input_type not in VALID_TYPES:
+            raise _bad_request(_INVALID_TYPE)
         
         # Retorna nulo caso todas as verificações forem válidas
         return None
@@ -45,20 +73,8 @@ class FieldValidator:
         Levanta:
         HTTPException: se a categoria for inválida
         '''
-        valid_categories = {"Receita": ["Salário", "Freelance", "Investimentos", "Outros"],
-                            "Despesa":["Moradia", "Alimentação", "Transporte", "Entretenimento", "Utilidades", "Saúde", "Educação", "Outros"]}
-
-        if input_category not in valid_categories[input_type]:
-            if input_type == "Receita":
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Categoria informada é inválida. Informe uma entre [Salário, Freelance, Investimentos, Outros].",
-                )
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Categoria informada é inválida. Informe uma entre [Moradia, Alimentação, Transporte, Entretenimento, Utilidades, Saúde, Educação, Outros].",
-                )
+        if input_category not in _CATEGORY_SETS[input_type]:
+            raise _bad_request(_INVALID_CATEGORY[input_type])
         
         # Retorna nulo caso todas as verificações forem válidas
         return None
@@ -78,10 +94,7 @@ class FieldValidator:
         HTTPException: se o valor for inválido
         '''
         if input_value <= 0:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Valor informado é inválido. Informe um valor maior ou igual a zero.",
-                )
+            raise _bad_request(_INVALID_VALUE)
         
         # Retorna nulo caso todas as verificações forem válidas
         return None
@@ -101,7 +114,7 @@ class PasswordValidator:
         
     @staticmethod
     def __verify_upper_case(password: str):
-        if not re.search(r"[A-Z]", password):
+        if not _UPPER_CASE.search(password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="A senha deve conter ao menos uma letra maiúscula.",
@@ -112,7 +125,7 @@ class PasswordValidator:
     
     @staticmethod
     def __verify_lower_case(password: str):
-        if not re.search(r"[a-z]", password):
+        if not _LOWER_CASE.search(password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="A senha deve conter ao menos uma letra minúscula.",
@@ -123,7 +136,7 @@ class PasswordValidator:
     
     @staticmethod
     def __verify_number(password: str):
-        if not re.search(r"\d", password):
+        if not _DIGIT.search(password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="A senha deve conter ao menos um dígito.",
@@ -134,7 +147,7 @@ class PasswordValidator:
     
     @staticmethod
     def __verify_special_char(password: str):
-        if not re.search(r"[!@#$%^&*(),.?\":{}|<>]", password):
+        if not _SPECIAL_CHAR.search(password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="A senha deve conter pelo menos um caractere especial.",
@@ -185,8 +198,7 @@ def validate_email_format(email: str):
     Levanta:
     HTTPException: se o formato do email for inválido
     '''
-    pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-    if not re.match(pattern, email):
+    if not EMAIL_PATTERN.match(email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="O formato do email é inválido.",
@@ -220,37 +232,65 @@ def validate_unique_email(db, email: str):
     # Retorna nulo cado a data seja válida
     return None
 
-def validate_date_ISO_format(date: str):
+def validate_date_ISO_format(date: str, now: dt | None = None) -> date:
     '''
     Verifica se a data cadastrada segue o formato válido (ISO String)
 
     Parâmetros:
     date (string): string da data informada pelo usuário
+    now (datetime): momento de referência para datas sem fuso (padrão: agora). Na importação em
+        lote é calculado uma vez para todas as linhas
 
     Retorna:
-    None
+    date: a data já convertida (a parte de horário, se houver, é descartada)
 
     Levanta:
     HTTPException: se o formato da data for inválido ou se a data informada for no futuro
     '''
     try:
         validation_date = dt.fromisoformat(date)
-    except:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="O formato da data informada é inválido. O formato esperado é YYYY-MM-DD (ou outro no formato ISO)",
-        )
-    
-    if (validation_date.tzinfo == None):
-        today = dt.now()
-    else:
-        today = dt.now(tz=validation_date.tzinfo)
-    
-    if (validation_date > today):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="A data informada é no futuro. Informe uma data até o dia atual.",
-        )
-    
-    # Retorna nulo cado a data seja válida
-    return None
\ No newline at end of file
+    except (TypeError, ValueError):
+        raise _bad_request(_INVALID_DATE)
+
+    if (validation_date.tzinfo is not None):
+        now = dt.now(tz=validation_date.tzinfo)
+    elif (now is None):
+        now = dt.now()
+
+    if (validation_date > now):
+        raise _bad_request(_FUTURE_DATE)
+
+    return validation_date.date()
+
+def validate_transaction(transaction: TransactionCreate, now: dt | None = None) -> TransactionData:
+    '''
+    Valida tipo, categoria, valor e data de uma transação em uma única passada,
+    na mesma ordem (e com as mesmas mensagens) das validações individuais
+
+    Parâmetros:
+    transaction (TransactionCreate): transação recebida, com a data em texto ISO
+    now (datetime): momento de referência para a data (ver validate_date_ISO_format)
+
+    Retorna:
+    TransactionData: os mesmos campos, com a data já convertida para date, pronta para o CRUD
+
+    Levanta:
+    HTTPException: 400 BAD REQUEST no primeiro campo inválido
+    '''
+    if transaction.type not in VALID_TYPES:
+        raise _bad_request(_INVALID_TYPE)
+
+    if transaction.category not in _CATEGORY_SETS[transaction.type]:
+        raise _bad_request(_INVALID_CATEGORY[transaction.type])
+
+    if transaction.value <= 0:
+        raise _bad_request(_INVALID_VALUE)
+
+    # model_construct: os campos já foram validados acima, sem uma segunda passada do pydantic
+    return TransactionData.model_construct(
+        date=validate_date_ISO_format(transaction.date, now),
+        value=transaction.value,
+        type=transaction.type,
+        category=transaction.category,
+        description=transaction.description,
+    )